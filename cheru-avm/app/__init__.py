@@ -0,0 +1,4 @@
+import time
+
+# Taken before any other app module loads, for the startup-time report.
+IMPORT_STARTED = time.perf_counter()
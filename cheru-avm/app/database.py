@@ -1,15 +1,146 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
 
-from app.utils.config import get_settings
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, OperationalError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+
+from app.utils.config import Settings, get_settings
+from app.utils.metrics import install_query_counter
+from app.utils.pool import InstrumentedQueuePool, install_idle_pre_ping
+from app.utils.replicas import ReplicaRouter
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+
+def _uses_queue_pool(database_url: str) -> bool:
+    # In-memory SQLite needs SQLAlchemy's single-connection pool.
+    url = make_url(database_url)
+    return not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"))
+
+
+def pool_options(
+    config: Settings,
+    database_url: str,
+    poolclass: Optional[type] = None,
+) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"pool_pre_ping": config.db_pool_pre_ping == "always"}
+    if _uses_queue_pool(database_url):
+        options.update(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+        )
+        if poolclass is not None:
+            options["poolclass"] = poolclass
+    return options
+
+
+def _create_engine(database_url: str) -> Engine:
+    created = create_engine(
+        database_url,
+        **pool_options(settings, database_url, InstrumentedQueuePool),
+    )
+    if settings.db_pool_pre_ping == "idle":
+        install_idle_pre_ping(created, settings.db_pool_pre_ping_idle_seconds)
+    install_query_counter(created)
+    return created
+
+
+# The primary takes every write; replicas only serve ReadSession reads.
+engine = _create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_router = ReplicaRouter(
+    engine,
+    [_create_engine(url) for url in settings.replica_urls],
+    retry_seconds=settings.replica_retry_seconds,
+)
+
+
+class ReadSession(Session):
+    """Read-only session served by a healthy replica, or the primary without one.
+
+    The replica is chosen on first use and kept for the session. Setting
+    ``info["pin_primary"]`` before the first query reads from the primary,
+    for loads that must see a write the replicas may not have yet.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get("pin_primary"):
+            return engine
+        bind = self.info.get("bind")
+        if bind is None:
+            bind = self.info["bind"] = replica_router.choose()
+        return bind
+
+
+@event.listens_for(ReadSession, "before_flush")
+def _refuse_writes(session: Session, flush_context, instances) -> None:
+    raise RuntimeError("ReadSession is read-only; write through SessionLocal")
+
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+
+T = TypeVar("T")
+
+
+def run_read(session: Session, read: Callable[[Session], T]) -> T:
+    """Run ``read(session)``, failing over to another replica if its replica is down.
+
+    After a connection failure the replica is marked down and the read is
+    retried on the next healthy one, ending with the primary. Failures on
+    the primary, or on sessions not routed by ReadSession, are raised.
+    """
+    while True:
+        try:
+            return read(session)
+        except (OperationalError, DisconnectionError):
+            bind = session.info.pop("bind", None)
+            session.rollback()
+            if bind is None or bind is engine:
+                raise
+            replica_router.mark_down(bind)
+
 
 Base = declarative_base()
 
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(
+            f"No async driver known for {url.get_backend_name()}; set ASYNC_DATABASE_URL"
+        )
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+# The async engine is only built when DATABASE_ASYNC is enabled, so the sync
+# deployment needs neither the async drivers nor greenlet.
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = settings.async_database_url or to_async_url(settings.database_url)
+    async_engine = create_async_engine(_async_url, **pool_options(settings, _async_url))
+    if settings.db_pool_pre_ping == "idle":
+        install_idle_pre_ping(async_engine.sync_engine, settings.db_pool_pre_ping_idle_seconds)
+    install_query_counter(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +148,18 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database mode is disabled; set DATABASE_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,13 +1,48 @@
 import logging
+import threading
+import time
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app import IMPORT_STARTED
 from app.database import Base, SessionLocal, engine
-from app.models import Amenity, Area  # noqa: F401
+from app.models import (  # noqa: F401
+    Amenity,
+    ApartmentProject,
+    Area,
+    AreaPrice,
+    ComparableSale,
+    EstimateLog,
+)
+from app.routes.areas import router as areas_router
 from app.routes.estimate import router as estimate_router
+from app.routes.internal import router as internal_router
+from app.routes.metrics import router as metrics_router
 from app.services.bootstrap import ensure_reference_data
+from app.services.readiness import readiness
+from app.services.cache_backend import cache_backend
+from app.services.estimate_log import EstimateLogFull, estimate_log
+from app.services.migrations import (
+    ensure_name_keys,
+    ensure_price_history,
+    record_schema_version,
+    schema_fingerprint,
+    schema_is_current,
+)
+from app.services.reference_data import reference_cache, subscribe_to_invalidations
+from app.services.startup import startup_report
+from app.services.valuation import load_coefficients, use_coefficients
+from app.utils.admission import (
+    RETRY_AFTER_SECONDS,
+    AdmissionMiddleware,
+    AdmissionShed,
+    admission_controller,
+    shed_response,
+)
 from app.utils.config import get_settings
+from app.utils.metrics import MetricsMiddleware
 
 settings = get_settings()
 
@@ -15,9 +50,20 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s %(message)s",
 )
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Cheru Estimator AVM Backend", version="1.0.0")
 
+# Added first so it runs innermost: shed responses still get CORS headers
+# and are counted by the metrics middleware. Single estimates are admitted
+# by the result cache on a miss, so only the uncached endpoints go through
+# the middleware.
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        path_prefixes=("/api/estimate/batch", "/api/estimate/scenarios"),
+    )
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
@@ -25,20 +71,128 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, slow_request_ms=settings.metrics_slow_request_ms)
 
 app.include_router(estimate_router, prefix="/api", tags=["estimates"])
+app.include_router(areas_router, prefix="/api", tags=["areas"])
+app.include_router(internal_router, prefix="/internal", tags=["internal"])
+if settings.metrics_enabled:
+    app.include_router(metrics_router)
 
 
-@app.on_event("startup")
-def startup() -> None:
-    Base.metadata.create_all(bind=engine)
+@app.exception_handler(EstimateLogFull)
+def estimate_log_full(request, exc: EstimateLogFull) -> JSONResponse:
+    # Estimates that cannot be audited are not served.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": RETRY_AFTER_SECONDS},
+    )
+
+
+@app.exception_handler(AdmissionShed)
+def admission_shed(request, exc: AdmissionShed) -> JSONResponse:
+    return shed_response(exc.reason)
+
+
+startup_report.record("import", time.perf_counter() - IMPORT_STARTED)
+
+
+def _migrate() -> None:
+    fingerprint = schema_fingerprint(Base.metadata)
+    if settings.startup_mode == "production" and schema_is_current(engine, fingerprint):
+        startup_report.skip("ddl")
+        return
+    with startup_report.phase("ddl"):
+        Base.metadata.create_all(bind=engine)
+        ensure_name_keys(engine)
+        record_schema_version(engine, fingerprint)
+
+
+def _bootstrap() -> None:
+    # Imported here so numpy and the k-d tree load during warm-up, not
+    # before the server can accept connections.
+    with startup_report.phase("deferred_imports"):
+        from app.services.comparables import (
+            comparables_cache,
+            subscribe_to_comparable_invalidations,
+        )
+
+    with startup_report.phase("db_connect"):
+        engine.connect().close()
+    _migrate()
+    if settings.coefficients_path:
+        with startup_report.phase("coefficients"):
+            use_coefficients(load_coefficients(settings.coefficients_path))
+    subscribe_to_invalidations()
+    subscribe_to_comparable_invalidations()
     db = SessionLocal()
     try:
-        ensure_reference_data(db)
+        with startup_report.phase("seed"):
+            ensure_reference_data(db)
+            ensure_price_history(engine)
+        with startup_report.phase("reference_data"):
+            reference_cache.get(db)
+        with startup_report.phase("comparables"):
+            comparables_cache.load(db)
     finally:
         db.close()
+    estimate_log.start()
+    readiness.mark_ready()
+    startup_report.ready()
+
+
+def _bootstrap_in_background() -> None:
+    try:
+        _bootstrap()
+    except Exception as exc:
+        logger.exception("Startup failed; the service stays not ready")
+        startup_report.fail(repr(exc))
+        readiness.mark_not_ready("startup failed")
+
+
+@app.on_event("startup")
+def startup() -> None:
+    # Seeding and cache warm-up happen once here; estimate requests only
+    # check the readiness flag and never do bootstrap work themselves.
+    readiness.mark_not_ready("starting")
+    if settings.startup_mode == "production":
+        # Accept connections (and liveness probes) at once; /health/ready
+        # stays 503 until the warm-up thread finishes.
+        threading.Thread(
+            target=_bootstrap_in_background,
+            name="startup-warm-up",
+            daemon=True,
+        ).start()
+    else:
+        _bootstrap()
+    startup_report.serving()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    readiness.mark_not_ready("shutting down")
+    # Queued audit entries are written before the process exits.
+    estimate_log.drain(settings.estimate_log_drain_seconds)
+    cache_backend.close()
 
 
 @app.get("/health")
 def health_check():
+    return {"status": "ok", "live": True, "ready": readiness.ready}
+
+
+@app.get("/health/live")
+def liveness_check():
     return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness_check():
+    if not readiness.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "reason": readiness.reason},
+        )
+    return {"status": "ready"}
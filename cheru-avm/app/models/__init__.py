@@ -1,4 +1,15 @@
 from app.models.amenity import Amenity
+from app.models.apartment_project import ApartmentProject
 from app.models.area import Area
+from app.models.area_price import AreaPrice
+from app.models.comparable_sale import ComparableSale
+from app.models.estimate_log import EstimateLog
 
-__all__ = ["Amenity", "Area"]
+__all__ = [
+    "Amenity",
+    "ApartmentProject",
+    "Area",
+    "AreaPrice",
+    "ComparableSale",
+    "EstimateLog",
+]
@@ -1,15 +1,27 @@
 import uuid
 
-from sqlalchemy import Column, Numeric, String
+from sqlalchemy import Column, Index, Numeric, String
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import validates
 
 from app.database import Base
+from app.utils.names import normalize_amenity_name
 
 
 class Amenity(Base):
     __tablename__ = "amenities"
+    __table_args__ = (
+        Index("ix_amenities_property_type_name_key", "property_type", "name_key", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
+    # Canonical lookup key (see normalize_amenity_name), kept in sync with name.
+    name_key = Column(String)
     property_type = Column(String, nullable=False)
     value_percent = Column(Numeric, nullable=False)
+
+    @validates("name")
+    def _set_name_key(self, key, value):
+        self.name_key = normalize_amenity_name(value)
+        return value
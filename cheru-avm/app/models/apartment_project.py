@@ -0,0 +1,29 @@
+import uuid
+
+from sqlalchemy import Column, Float, Index, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import validates
+
+from app.database import Base
+from app.utils.names import normalize_project_name
+
+
+class ApartmentProject(Base):
+    __tablename__ = "apartment_projects"
+    __table_args__ = (
+        Index("ix_apartment_projects_area_name_key", "area", "name_key", unique=True),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=False)
+    # Canonical lookup key (see normalize_project_name), kept in sync with name.
+    name_key = Column(String)
+    area = Column(String, nullable=False)
+    average_price_per_sqm = Column(Numeric, nullable=False)
+    latitude = Column(Float)
+    longitude = Column(Float)
+
+    @validates("name")
+    def _set_name_key(self, key, value):
+        self.name_key = normalize_project_name(value)
+        return value
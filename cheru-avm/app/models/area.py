@@ -2,8 +2,10 @@ import uuid
 
 from sqlalchemy import Column, DateTime, Numeric, String, func
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import validates
 
 from app.database import Base
+from app.utils.names import normalize_area_name
 
 
 class Area(Base):
@@ -11,7 +13,14 @@ class Area(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True, nullable=False, index=True)
+    # Canonical lookup key (see normalize_area_name), kept in sync with name.
+    name_key = Column(String, unique=True, index=True)
     land_price_per_acre = Column(Numeric, nullable=False)
     apartment_price_per_sqm = Column(Numeric, nullable=False)
     house_price_per_sqm = Column(Numeric, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @validates("name")
+    def _set_name_key(self, key, value):
+        self.name_key = normalize_area_name(value)
+        return value
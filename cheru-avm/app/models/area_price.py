@@ -0,0 +1,27 @@
+import uuid
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Numeric, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class AreaPrice(Base):
+    """Area prices in effect from ``effective_from`` until the next row for the area."""
+
+    __tablename__ = "area_prices"
+    __table_args__ = (
+        UniqueConstraint("area_id", "effective_from", name="uq_area_prices_area_effective"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    area_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("areas.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    effective_from = Column(Date, nullable=False)
+    land_price_per_acre = Column(Numeric, nullable=False)
+    apartment_price_per_sqm = Column(Numeric, nullable=False)
+    house_price_per_sqm = Column(Numeric, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
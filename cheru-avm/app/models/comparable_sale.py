@@ -0,0 +1,26 @@
+import uuid
+
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class ComparableSale(Base):
+    """A recorded transaction used as a comparable by comps valuation."""
+
+    __tablename__ = "comparable_sales"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    property_type = Column(String, nullable=False, index=True)
+    area_id = Column(UUID(as_uuid=True), ForeignKey("areas.id", ondelete="SET NULL"))
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    # Building size for apartments and houses; plot size for houses and land.
+    size_sqm = Column(Float)
+    land_size_acres = Column(Float)
+    year_built = Column(Integer)
+    price = Column(Numeric, nullable=False)
+    sold_on = Column(Date, nullable=False)
+    source = Column(String, nullable=False, default="transaction")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
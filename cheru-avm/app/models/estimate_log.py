@@ -0,0 +1,23 @@
+import uuid
+
+from sqlalchemy import JSON, Column, DateTime, Float, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from app.database import Base
+
+
+class EstimateLog(Base):
+    """Audit record of one estimate served by the API."""
+
+    __tablename__ = "estimate_logs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # When the estimate was served; rows are written later by the log writer.
+    served_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    endpoint = Column(String, nullable=False)
+    property_type = Column(String, nullable=False)
+    area = Column(String)
+    valuation_method = Column(String, nullable=False)
+    estimated_value = Column(Float)
+    request = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    response = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
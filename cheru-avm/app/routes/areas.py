@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.schemas.area import AreaSuggestionItem, AreaSuggestionResponse
+from app.services.reference_data import ReferenceSnapshot, get_reference_data
+
+router = APIRouter()
+
+
+@router.get("/areas/suggest", response_model=AreaSuggestionResponse)
+def suggest_areas(
+    response: Response,
+    q: str = Query(..., max_length=100),
+    limit: int = Query(default=10, ge=1, le=25),
+    reference: ReferenceSnapshot = Depends(get_reference_data),
+):
+    # Served from the in-memory snapshot, so it is cheap enough to call on
+    # every keystroke; browsers may reuse answers for a short while.
+    response.headers["Cache-Control"] = "public, max-age=60"
+    suggestions = reference.area_resolver.suggest(q, limit)
+    return AreaSuggestionResponse(
+        query=q,
+        suggestions=[
+            AreaSuggestionItem(name=item.name, match=item.match, score=item.score)
+            for item in suggestions
+        ],
+    )
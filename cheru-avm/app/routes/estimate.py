@@ -1,29 +1,56 @@
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Callable, Hashable, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
 
-from app.database import get_db
-from app.models import Amenity, Area
-from app.services.bootstrap import ensure_reference_data
 from app.schemas.estimate import (
     ApartmentEstimateRequest,
+    BatchEstimateItem,
+    BatchEstimateRequest,
+    BatchEstimateResponse,
+    ComparableItem,
     EstimateRequest,
     EstimateResponse,
     HouseEstimateRequest,
     LandEstimateRequest,
+    ScenarioCell,
+    ScenarioRequest,
+    ScenarioResponse,
+    format_validation_error,
+    parse_estimate_request,
 )
-from app.services.valuation import estimate_apartment, estimate_house, estimate_land
+from app.services.area_resolver import unknown_area_message
+from app.services.estimate_log import estimate_log
+from app.services.reference_data import (
+    AmenityRecord,
+    AreaRecord,
+    ProjectRecord,
+    ReferenceSnapshot,
+    get_reference_data,
+    get_reference_data_async,
+)
+from app.services.result_cache import estimate_cache_key, result_cache
+from app.services.valuation import (
+    SHAPE_MULTIPLIERS,
+    confidence_score,
+    estimate_apartment,
+    estimate_house,
+    estimate_land,
+    year_built_error,
+)
+from app.utils.config import get_settings
+from app.utils.metrics import handler_span, span
 
-router = APIRouter()
+if TYPE_CHECKING:
+    from app.services.comparables import ComparablesIndex
 
-CLASSIC_PROPERTY_YEAR = 1985
-YEAR_CLASSIC_MESSAGE = (
-    "This property is too classic for automated estimation. "
-    "Please contact our team for a professional valuation."
-)
+# The comps and scenario services pull in numpy; they are imported where
+# used so the app can start serving before they load (startup warm-up
+# imports them right after).
+
+router = APIRouter()
+settings = get_settings()
 
 DISCLAIMER_TEXT = (
     "Kindly note that this is an automatic estimated value. "
@@ -32,132 +59,431 @@ DISCLAIMER_TEXT = (
 )
 
 
-def _confidence_score(property_type: str, amenity_count: int) -> float:
-    base_scores = {
-        "land": 0.78,
-        "house": 0.82,
-        "apartment": 0.85,
-    }
-    base = base_scores.get(property_type, 0.75)
-    adjusted = base + min(amenity_count, 5) * 0.02
-    return round(min(adjusted, 0.95), 2)
-
-
-
-def _get_area(db: Session, area_name: str) -> Area:
-    area = (
-        db.query(Area)
-        .filter(func.lower(Area.name) == area_name.strip().lower())
-        .one_or_none()
-    )
-    if not area:
-        raise HTTPException(status_code=400, detail="Unknown area")
-    return area
+def _get_area(reference: ReferenceSnapshot, area_name: str) -> AreaRecord:
+    match = reference.resolve_area(area_name)
+    if match.area is None:
+        # A known area asked for a date before its price history is a bad
+        # as_of, not a bad area name.
+        status_code = 422 if match.method == "unpriced" else 400
+        raise HTTPException(status_code=status_code, detail=unknown_area_message(match))
+    return match.area
 
 
 def _get_amenities(
-    db: Session,
+    reference: ReferenceSnapshot,
     amenity_names: List[str],
     property_type: str,
-) -> List[Amenity]:
+) -> List[AmenityRecord]:
     if not amenity_names:
         return []
-    alias_map = {
-        "solar panels": "solar",
-        "backup generator": "backup_generator",
-        "parking": "parking",
-        "lift": "lift",
-        "balcony": "balcony",
-        "security": "security",
-        "garage": "garage",
-        "garden": "garden",
-        "pool": "pool",
-        "gym": "gym",
-    }
-
-    normalized = []
-    for name in amenity_names:
-        cleaned = name.strip().lower().replace("_", " ")
-        normalized.append(alias_map.get(cleaned, cleaned.replace(" ", "_")))
-    amenities = (
-        db.query(Amenity)
-        .filter(func.lower(Amenity.name).in_(normalized))
-        .filter(Amenity.property_type == property_type)
-        .all()
-    )
-    found_names = {amenity.name.lower() for amenity in amenities}
-    missing = [name for name in normalized if name not in found_names]
+    amenities, missing = reference.resolve_amenities(amenity_names, property_type)
     if missing:
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown amenities: {', '.join(sorted(set(missing)))}",
+            detail=f"Unknown amenities: {', '.join(missing)}",
         )
     return amenities
 
 
-@router.post("/estimate", response_model=EstimateResponse)
+def _build_comps_estimate(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot,
+    area: AreaRecord,
+    comparables: "ComparablesIndex",
+    project: Optional[ProjectRecord] = None,
+) -> Optional[EstimateResponse]:
+    from app.services.comparables import comparable_features
 
-def create_estimate(payload: EstimateRequest, db: Session = Depends(get_db)):
-    current_year = datetime.now().year
-    ensure_reference_data(db)
-    area = _get_area(db, payload.area)
+    latitude, longitude = payload.latitude, payload.longitude
+    if latitude is None and project is not None:
+        # A named development pins the subject closer than its area centroid.
+        latitude, longitude = project.latitude, project.longitude
+    location = comparables.location(area.id, latitude, longitude)
+    if location is None:
+        return None
+    if isinstance(payload, LandEstimateRequest):
+        size = payload.land_size_acres
+        multiplier = SHAPE_MULTIPLIERS[payload.plot_shape]
+        features = comparable_features("land", *location, land_size_acres=size)
+    else:
+        with span("amenities"):
+            _get_amenities(reference, payload.amenities, payload.property_type)
+        multiplier = 1.0
+        if isinstance(payload, ApartmentEstimateRequest):
+            size = payload.size_sqm
+            features = comparable_features(
+                "apartment", *location, size_sqm=size, year_built=payload.year_built
+            )
+        else:
+            size = payload.house_size_sqm
+            features = comparable_features(
+                "house",
+                *location,
+                size_sqm=size,
+                land_size_acres=payload.land_size_acres,
+                year_built=payload.year_built,
+            )
+
+    with span("comparables"):
+        result = comparables.estimate(
+            payload.property_type,
+            features,
+            payload.as_of or date.today(),
+            reference.prices,
+            k=settings.comps_neighbours,
+            as_of=payload.as_of is not None,
+        )
+    if result is None:
+        return None
+
+    base_value = result.unit_price * size
+    estimated_value = base_value * multiplier
+    if isinstance(payload, LandEstimateRequest):
+        breakdown = {
+            "land_base_value": base_value,
+            "land_shape_multiplier": multiplier,
+            "land_final_value": estimated_value,
+        }
+        base_price_per_sqm = None
+    else:
+        breakdown = {
+            "base_price_per_sqm": result.unit_price,
+            "final_price_per_sqm": result.unit_price,
+        }
+        base_price_per_sqm = result.unit_price
+
+    with span("response"):
+        return EstimateResponse(
+            property_type=payload.property_type,
+            area=area.name,
+            project=None if project is None else project.name,
+            estimated_value=estimated_value,
+            value=estimated_value,
+            low_estimate=result.low_unit_price * size * multiplier,
+            high_estimate=result.high_unit_price * size * multiplier,
+            base_price_per_sqm=base_price_per_sqm,
+            breakdown=breakdown,
+            confidence_score=result.confidence,
+            disclaimer=DISCLAIMER_TEXT,
+            valuation_method="comps",
+            comparables=[
+                ComparableItem(**{**match._asdict(), "id": str(match.id)})
+                for match in result.comparables
+            ],
+        )
+
+
+def _build_estimate(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot,
+    current_year: int,
+    comparables: Optional["ComparablesIndex"] = None,
+) -> EstimateResponse:
+    if payload.as_of is not None:
+        reference = reference.as_of(payload.as_of)
+        current_year = payload.as_of.year
+    with span("area"):
+        area = _get_area(reference, payload.area)
+    project = None
+    if isinstance(payload, ApartmentEstimateRequest):
+        # An unrecognised project name falls back to the area price.
+        project = reference.project(area, payload.apartment_name)
 
     if hasattr(payload, "year_built"):
-        if payload.year_built > current_year:
-            raise HTTPException(
-                status_code=400,
-                detail=f"year_built must be between 1970 and {current_year}",
-            )
-        if payload.year_built < CLASSIC_PROPERTY_YEAR:
-            raise HTTPException(status_code=400, detail=YEAR_CLASSIC_MESSAGE)
+        year_error = year_built_error(payload.year_built, current_year)
+        if year_error:
+            raise HTTPException(status_code=400, detail=year_error)
+
+    if comparables is not None:
+        # Too few comparables nearby falls through to the area model.
+        estimate = _build_comps_estimate(payload, reference, area, comparables, project)
+        if estimate is not None:
+            return estimate
 
     if isinstance(payload, LandEstimateRequest):
-        result = estimate_land(area, payload.land_size_acres, payload.plot_shape)
+        with span("valuation"):
+            result = estimate_land(area, payload.land_size_acres, payload.plot_shape)
         estimated_value = result["estimated_value"]
         breakdown = result["breakdown"]
         base_price_per_sqm = None
-        confidence_score = _confidence_score(payload.property_type, 0)
+        confidence = confidence_score(payload.property_type, 0)
     elif isinstance(payload, ApartmentEstimateRequest):
-        amenities = _get_amenities(db, payload.amenities, "apartment")
-        result = estimate_apartment(
-            area,
-            payload.size_sqm,
-            payload.year_built,
-            amenities,
-        )
+        with span("amenities"):
+            amenities = _get_amenities(reference, payload.amenities, "apartment")
+        with span("valuation"):
+            result = estimate_apartment(
+                area,
+                payload.size_sqm,
+                payload.year_built,
+                amenities,
+                current_year,
+                project,
+            )
         estimated_value = result["estimated_value"]
         breakdown = result["breakdown"]
         base_price_per_sqm = breakdown["base_price_per_sqm"]
-        confidence_score = _confidence_score(payload.property_type, len(amenities))
+        confidence = confidence_score(payload.property_type, len(amenities), project is not None)
     elif isinstance(payload, HouseEstimateRequest):
-        amenities = _get_amenities(db, payload.amenities, "house")
-        result = estimate_house(
-            area,
-            payload.house_size_sqm,
-            payload.land_size_acres,
-            payload.year_built,
-            payload.plot_shape,
-            amenities,
-        )
+        with span("amenities"):
+            amenities = _get_amenities(reference, payload.amenities, "house")
+        with span("valuation"):
+            result = estimate_house(
+                area,
+                payload.house_size_sqm,
+                payload.land_size_acres,
+                payload.year_built,
+                payload.plot_shape,
+                amenities,
+                current_year,
+            )
         estimated_value = result["estimated_value"]
         breakdown = result["breakdown"]
         base_price_per_sqm = breakdown["base_price_per_sqm"]
-        confidence_score = _confidence_score(payload.property_type, len(amenities))
+        confidence = confidence_score(payload.property_type, len(amenities))
     else:
         raise HTTPException(status_code=400, detail="Unsupported property type")
 
     low_estimate = estimated_value * 0.90
     high_estimate = estimated_value * 1.10
 
-    return EstimateResponse(
-        property_type=payload.property_type,
-        area=area.name,
-        estimated_value=estimated_value,
-        value=estimated_value,
-        low_estimate=low_estimate,
-        high_estimate=high_estimate,
-        base_price_per_sqm=base_price_per_sqm,
-        breakdown=breakdown,
-        confidence_score=confidence_score,
-        disclaimer=DISCLAIMER_TEXT,
+    with span("response"):
+        return EstimateResponse(
+            property_type=payload.property_type,
+            area=area.name,
+            project=None if project is None else project.name,
+            estimated_value=estimated_value,
+            value=estimated_value,
+            low_estimate=low_estimate,
+            high_estimate=high_estimate,
+            base_price_per_sqm=base_price_per_sqm,
+            breakdown=breakdown,
+            confidence_score=confidence,
+            disclaimer=DISCLAIMER_TEXT,
+        )
+
+
+def _comparables() -> "ComparablesIndex":
+    from app.services.comparables import comparables_cache
+
+    return comparables_cache.get()
+
+
+def _cache_key_and_build(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot,
+    current_year: int,
+) -> Tuple[Tuple[Hashable, ...], Callable[[], EstimateResponse]]:
+    with span("cache_key"):
+        key = estimate_cache_key(payload, current_year)
+    comparables = None
+    if payload.valuation_method == "comps":
+        comparables = _comparables()
+        key += (comparables.fingerprint,)
+    return key, lambda: _build_estimate(payload, reference, current_year, comparables)
+
+
+def _cached_estimate(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot,
+    current_year: int,
+) -> EstimateResponse:
+    key, build = _cache_key_and_build(payload, reference, current_year)
+    return result_cache.get_or_build(key, reference, build)
+
+
+def create_estimate(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot = Depends(get_reference_data),
+):
+    with handler_span(payload.property_type):
+        estimate = _cached_estimate(payload, reference, datetime.now().year)
+        estimate_log.record("estimate", payload, estimate)
+        return estimate
+
+
+async def create_estimate_async(
+    payload: EstimateRequest,
+    reference: ReferenceSnapshot = Depends(get_reference_data_async),
+):
+    # Valuation is CPU-only once reference data is cached, so the async
+    # handler runs on the event loop without a threadpool hop; concurrent
+    # misses await one build instead of blocking the loop.
+    with handler_span(payload.property_type):
+        key, build = _cache_key_and_build(payload, reference, datetime.now().year)
+        estimate = await result_cache.get_or_build_async(key, reference, build)
+        estimate_log.record("estimate", payload, estimate)
+        return estimate
+
+
+router.add_api_route(
+    "/estimate",
+    create_estimate_async if settings.database_async else create_estimate,
+    methods=["POST"],
+    response_model=EstimateResponse,
+)
+
+
+@router.post("/estimate/batch", response_model=BatchEstimateResponse)
+def create_estimate_batch(
+    payload: BatchEstimateRequest,
+    reference: ReferenceSnapshot = Depends(get_reference_data),
+):
+    max_items = settings.estimate_batch_max_items
+    if len(payload.items) > max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can contain at most {max_items} items",
+        )
+
+    current_year = datetime.now().year
+    results = []
+    served = []
+    with handler_span("batch"):
+        for index, item in enumerate(payload.items):
+            if not isinstance(item, dict):
+                results.append(
+                    BatchEstimateItem(
+                        index=index,
+                        status_code=422,
+                        error="Item must be a JSON object",
+                    )
+                )
+                continue
+            if payload.as_of is not None and "as_of" not in item:
+                item = {**item, "as_of": payload.as_of}
+            try:
+                request = parse_estimate_request(item)
+                comparables = None
+                if request.valuation_method == "comps":
+                    comparables = _comparables()
+                estimate = _build_estimate(request, reference, current_year, comparables)
+            except ValidationError as exc:
+                results.append(
+                    BatchEstimateItem(
+                        index=index,
+                        status_code=422,
+                        error=format_validation_error(exc),
+                    )
+                )
+            except HTTPException as exc:
+                results.append(
+                    BatchEstimateItem(index=index, status_code=exc.status_code, error=exc.detail)
+                )
+            else:
+                served.append((request, estimate))
+                results.append(BatchEstimateItem(index=index, status_code=200, result=estimate))
+
+        estimate_log.record_many("batch", served)
+
+    succeeded = sum(1 for item in results if item.result is not None)
+    return BatchEstimateResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
     )
+
+
+@router.post("/estimate/scenarios", response_model=ScenarioResponse)
+def create_estimate_scenarios(
+    payload: ScenarioRequest,
+    reference: ReferenceSnapshot = Depends(get_reference_data),
+):
+    from app.services.scenarios import SIZE_FIELDS, value_grid
+    from app.services.vectorized import valuation_tables
+
+    with handler_span("scenarios"):
+        try:
+            request = parse_estimate_request(payload.base)
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=format_validation_error(exc))
+        if request.valuation_method != "area":
+            raise HTTPException(
+                status_code=400,
+                detail="Scenarios are valued with the area model only",
+            )
+        is_land = isinstance(request, LandEstimateRequest)
+        if is_land and (payload.years_built or payload.toggle_amenities):
+            raise HTTPException(
+                status_code=400,
+                detail="Land scenarios only vary land_size_acres",
+            )
+
+        try:
+            # Axis values go through the request model so they obey the same
+            # rules as a single estimate.
+            model = type(request)
+            size_field = SIZE_FIELDS[request.property_type]
+            sizes = [
+                getattr(model.model_validate({**payload.base, size_field: size}), size_field)
+                for size in dict.fromkeys(payload.sizes)
+            ] or [getattr(request, size_field)]
+            years_built = [
+                model.model_validate({**payload.base, "year_built": year}).year_built
+                for year in dict.fromkeys(payload.years_built)
+            ] or [None if is_land else request.year_built]
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=format_validation_error(exc))
+
+        cell_count = len(sizes) * len(years_built) * 2 ** len(payload.toggle_amenities)
+        max_cells = settings.scenario_max_cells
+        if cell_count > max_cells:
+            raise HTTPException(
+                status_code=413,
+                detail=f"A scenario grid can contain at most {max_cells} cells",
+            )
+
+        current_year = datetime.now().year
+        tables = valuation_tables(reference).as_of(request.as_of)
+        if request.as_of is not None:
+            reference = reference.as_of(request.as_of)
+            current_year = request.as_of.year
+        with span("area"):
+            area = _get_area(reference, request.area)
+        for year_built in years_built:
+            if year_built is None:
+                continue
+            year_error = year_built_error(year_built, current_year)
+            if year_error:
+                raise HTTPException(status_code=400, detail=year_error)
+
+        project = None
+        base_amenities: List[AmenityRecord] = []
+        toggles: List[AmenityRecord] = []
+        if not is_land:
+            with span("amenities"):
+                base_amenities = _get_amenities(
+                    reference, request.amenities, request.property_type
+                )
+                toggles = [
+                    amenity
+                    for amenity in _get_amenities(
+                        reference, payload.toggle_amenities, request.property_type
+                    )
+                    if amenity not in base_amenities
+                ]
+        if isinstance(request, ApartmentEstimateRequest):
+            project = reference.project(area, request.apartment_name)
+
+        with span("valuation"):
+            cells = value_grid(
+                tables,
+                request,
+                area,
+                project,
+                base_amenities,
+                toggles,
+                sizes,
+                years_built,
+                current_year,
+            )
+        with span("response"):
+            response = ScenarioResponse(
+                property_type=request.property_type,
+                area=area.name,
+                project=None if project is None else project.name,
+                amenities=[amenity.name for amenity in base_amenities],
+                cells=[ScenarioCell(**cell) for cell in cells],
+                disclaimer=DISCLAIMER_TEXT,
+            )
+        estimate_log.record("scenarios", payload, response)
+        return response
@@ -0,0 +1,81 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import engine, get_db, replica_router, settings
+from app.services.cache_backend import (
+    INVALIDATION_CHANNEL,
+    REFERENCE_SNAPSHOT_KEY,
+    cache_backend,
+)
+from app.services.reference_data import reference_cache
+from app.services.result_cache import result_cache
+from app.services.startup import startup_report
+from app.utils.admission import admission_controller
+from app.utils.pool import pool_status
+
+INTERNAL_TOKEN_HEADER = "X-Internal-Token"
+
+
+def require_internal_token(
+    token: Optional[str] = Header(default=None, alias=INTERNAL_TOKEN_HEADER),
+) -> None:
+    # These endpoints reload data and expose pool internals on the public
+    # app, so they need the shared secret; without one configured they
+    # answer as if they did not exist.
+    expected = settings.internal_api_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid internal API token")
+
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+
+@router.post("/reference-data/reload")
+def reload_reference_data(db: Session = Depends(get_db)):
+    snapshot = reference_cache.reload(db)
+    cache_backend.publish(INVALIDATION_CHANNEL, REFERENCE_SNAPSHOT_KEY)
+    return {
+        "version": snapshot.version,
+        "areas": len(snapshot.areas),
+        "amenities": len(snapshot.amenities),
+    }
+
+
+@router.get("/db-pool")
+def db_pool_status():
+    return {
+        **pool_status(engine),
+        "pre_ping": settings.db_pool_pre_ping,
+        "recycle_seconds": settings.db_pool_recycle,
+        "replicas": [
+            {**status, **pool_status(replica)}
+            for status, replica in zip(replica_router.status(), replica_router.replicas)
+        ],
+        "replica_failovers": replica_router.failovers,
+    }
+
+
+@router.get("/startup")
+def startup_stats():
+    return startup_report.as_dict()
+
+
+@router.get("/admission")
+def admission_stats():
+    return admission_controller.stats()
+
+
+@router.get("/estimate-cache")
+def estimate_cache_stats():
+    return result_cache.stats()
+
+
+@router.delete("/estimate-cache")
+def clear_estimate_cache():
+    result_cache.clear()
+    return result_cache.stats()
@@ -0,0 +1,258 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import async_engine, engine, replica_router
+from app.services.estimate_log import estimate_log
+from app.services.reference_data import reference_cache
+from app.services.result_cache import result_cache
+from app.services.startup import startup_report
+from app.utils.admission import admission_controller
+from app.utils.metrics import CONTENT_TYPE, Gauges, registry
+from app.utils.pool import pool_status
+
+router = APIRouter()
+
+
+def _ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return round(hits / lookups, 4) if lookups else 0.0
+
+
+def _estimate_cache_lookups():
+    stats = result_cache.stats()
+    yield {"result": "hit"}, stats["hits"]
+    yield {"result": "miss"}, stats["misses"]
+
+
+def _estimate_cache_ratio():
+    yield {}, result_cache.stats()["hit_ratio"]
+
+
+def _reference_cache_lookups():
+    yield {"result": "hit"}, reference_cache.hits
+    yield {"result": "load"}, reference_cache.loads
+
+
+def _reference_cache_ratio():
+    yield {}, _ratio(reference_cache.hits, reference_cache.loads)
+
+
+def _reference_version():
+    snapshot = reference_cache.snapshot
+    yield {}, snapshot.version if snapshot is not None else 0
+
+
+def _comparables_loaded():
+    # Not imported at module level: it loads numpy (see routes.estimate).
+    from app.services.comparables import comparables_cache
+
+    index = comparables_cache.index
+    if index is not None:
+        for property_type, comparable_set in index.sets.items():
+            yield {"property_type": property_type}, len(comparable_set)
+
+
+def _shared_cache_computes():
+    backend = result_cache.shared
+    if backend is not None:
+        yield {"result": "computed"}, backend.computes
+        yield {"result": "coalesced"}, backend.coalesced
+
+
+def _estimate_coalesced():
+    yield {}, result_cache.stats()["coalesced"]
+
+
+def _admission_in_flight():
+    yield {}, admission_controller.in_flight
+
+
+def _admission_queue_depth():
+    yield {}, admission_controller.queue_depth
+
+
+def _admission_shed():
+    for reason, count in admission_controller.shed.items():
+        yield {"reason": reason}, count
+
+
+def _estimate_log_entries():
+    yield {"result": "written"}, estimate_log.written
+    yield {"result": "dropped"}, estimate_log.dropped
+    yield {"result": "refused"}, estimate_log.refused
+
+
+def _estimate_log_depth():
+    yield {}, estimate_log.depth
+
+
+def _replica_healthy():
+    for index, replica in enumerate(replica_router.replicas):
+        yield {"replica": str(index)}, int(replica_router.healthy(replica))
+
+
+def _replica_failovers():
+    yield {}, replica_router.failovers
+
+
+def _startup_phases():
+    for phase, seconds in startup_report.phases.items():
+        yield {"phase": phase}, seconds
+
+
+def _startup_ready():
+    if startup_report.ready_after is not None:
+        yield {}, startup_report.ready_after
+
+
+def _pool_gauges(key: str):
+    def collect():
+        engines = [("sync", engine)]
+        if async_engine is not None:
+            engines.append(("async", async_engine.sync_engine))
+        for index, replica in enumerate(replica_router.replicas):
+            engines.append((f"replica{index}", replica))
+        for name, pool_engine in engines:
+            yield {"engine": name}, pool_status(pool_engine).get(key)
+
+    return collect
+
+
+registry.register(
+    Gauges(
+        "avm_estimate_cache_lookups_total",
+        "Estimate result cache lookups by outcome.",
+        _estimate_cache_lookups,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges("avm_estimate_cache_hit_ratio", "Estimate result cache hit ratio.", _estimate_cache_ratio)
+)
+registry.register(
+    Gauges(
+        "avm_shared_cache_fills_total",
+        "Shared cache misses by whether this worker computed the value or waited for another.",
+        _shared_cache_computes,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_estimate_coalesced_total",
+        "Estimate requests that waited for an identical in-flight computation.",
+        _estimate_coalesced,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_admission_in_flight",
+        "Estimate requests currently admitted.",
+        _admission_in_flight,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_admission_queue_depth",
+        "Estimate requests waiting for admission.",
+        _admission_queue_depth,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_admission_shed_total",
+        "Estimate requests rejected by admission control, by reason.",
+        _admission_shed,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_reference_cache_lookups_total",
+        "Reference data lookups served from memory (hit) or reloaded (load).",
+        _reference_cache_lookups,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_reference_cache_hit_ratio",
+        "Reference data lookups served from memory.",
+        _reference_cache_ratio,
+    )
+)
+registry.register(
+    Gauges("avm_reference_data_version", "Loaded reference data version.", _reference_version)
+)
+registry.register(
+    Gauges(
+        "avm_comparables_loaded",
+        "Comparable sales held in memory for comps valuation.",
+        _comparables_loaded,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_estimate_log_entries_total",
+        "Estimate audit log entries written, dropped as unwritable, or refused on a full queue.",
+        _estimate_log_entries,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_estimate_log_queue_depth",
+        "Estimate audit log entries waiting to be written.",
+        _estimate_log_depth,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_startup_phase_seconds",
+        "Time spent in each startup phase.",
+        _startup_phases,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_startup_ready_seconds",
+        "Time from the first app import until the service reported ready.",
+        _startup_ready,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_db_replica_healthy",
+        "Whether each read replica is in rotation (1) or skipped after a failure (0).",
+        _replica_healthy,
+    )
+)
+registry.register(
+    Gauges(
+        "avm_db_replica_failovers_total",
+        "Reads moved off a replica after a connection failure.",
+        _replica_failovers,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauges(
+        "avm_db_pool_checked_out",
+        "Connections currently checked out of the pool.",
+        _pool_gauges("checked_out"),
+    )
+)
+registry.register(
+    Gauges(
+        "avm_db_pool_checkout_timeouts_total",
+        "Pool checkouts that timed out.",
+        _pool_gauges("timeouts"),
+        kind="counter",
+    )
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
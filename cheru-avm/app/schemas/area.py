@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class AreaSuggestionItem(BaseModel):
+    name: str
+    match: str
+    score: float
+
+
+class AreaSuggestionResponse(BaseModel):
+    query: str
+    suggestions: List[AreaSuggestionItem]
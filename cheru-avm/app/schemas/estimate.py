@@ -1,15 +1,42 @@
-from datetime import datetime
-from typing import List, Literal, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 
 PlotShape = Literal["normal", "corner", "irregular"]
+ValuationMethod = Literal["area", "comps"]
+
+# Last date seen by _is_future; today only moves forward, so any date up to
+# it is past without reading the clock (bulk runs validate millions of rows).
+_known_today = date.min
+
+
+def _is_future(value: date) -> bool:
+    global _known_today
+    if value <= _known_today:
+        return False
+    _known_today = date.today()
+    return value > _known_today
 
 
 class EstimateBase(BaseModel):
     property_type: Literal["apartment", "house", "land"]
     area: str
+    # Value with the area prices in effect on this date instead of today's.
+    as_of: Optional[date] = None
+    # "comps" values from the nearest comparable sales, falling back to the
+    # area model where there are too few; coordinates default to the area centre.
+    valuation_method: ValuationMethod = "area"
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
+
+    @field_validator("as_of")
+    @classmethod
+    def validate_as_of(cls, value: Optional[date]) -> Optional[date]:
+        if value is not None and _is_future(value):
+            raise ValueError("as_of cannot be in the future")
+        return value
 
 
 class ApartmentEstimateRequest(EstimateBase):
@@ -58,6 +85,29 @@ class LandEstimateRequest(EstimateBase):
 
 EstimateRequest = ApartmentEstimateRequest | HouseEstimateRequest | LandEstimateRequest
 
+ESTIMATE_REQUEST_MODELS = {
+    "apartment": ApartmentEstimateRequest,
+    "house": HouseEstimateRequest,
+    "land": LandEstimateRequest,
+}
+
+
+def parse_estimate_request(data: Dict[str, Any]) -> EstimateRequest:
+    # Dispatching on property_type keeps validation errors specific to one model.
+    property_type = data.get("property_type")
+    if not isinstance(property_type, str) or property_type not in ESTIMATE_REQUEST_MODELS:
+        # property_type is missing or not one of its literals, so this raises.
+        EstimateBase.model_validate(data)
+    return ESTIMATE_REQUEST_MODELS[property_type].model_validate(data)
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    messages = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error["loc"])
+        messages.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return "; ".join(messages)
+
 
 class EstimateBreakdown(BaseModel):
     base_price_per_sqm: Optional[float] = None
@@ -71,9 +121,23 @@ class EstimateBreakdown(BaseModel):
     building_value_after_amenities: Optional[float] = None
 
 
+class ComparableItem(BaseModel):
+    id: str
+    # "project" items are apartment projects: price is their average per sqm
+    # and they have no sale date.
+    source: str = "transaction"
+    sold_on: Optional[date] = None
+    price: float
+    adjusted_unit_price: float
+    distance_km: float
+    weight: float
+
+
 class EstimateResponse(BaseModel):
     property_type: str
     area: str
+    # The apartment project whose price per sqm was used, when one was recognised.
+    project: Optional[str] = None
     estimated_value: float
     value: float
     low_estimate: float
@@ -82,3 +146,59 @@ class EstimateResponse(BaseModel):
     breakdown: EstimateBreakdown
     confidence_score: float = Field(..., ge=0, le=1)
     disclaimer: str
+    valuation_method: ValuationMethod = "area"
+    comparables: Optional[List[ComparableItem]] = None
+
+
+class BatchEstimateRequest(BaseModel):
+    # Items are validated one by one so a bad item fails alone, not the batch;
+    # that includes items that are not JSON objects at all.
+    items: List[Any] = Field(..., min_length=1)
+    # Default for items that do not set their own as_of.
+    as_of: Optional[date] = None
+
+
+class BatchEstimateItem(BaseModel):
+    index: int
+    status_code: int
+    result: Optional[EstimateResponse] = None
+    error: Optional[str] = None
+
+
+class BatchEstimateResponse(BaseModel):
+    results: List[BatchEstimateItem]
+    succeeded: int
+    failed: int
+
+
+class ScenarioRequest(BaseModel):
+    # The base property, validated like a single estimate request.
+    base: Dict[str, Any]
+    # Floor area (land: acres) and year_built values to vary over; an empty
+    # list keeps the base value.
+    sizes: List[float] = Field(default_factory=list)
+    years_built: List[int] = Field(default_factory=list)
+    # Amenities switched on and off on top of the base amenities; every
+    # combination is valued.
+    toggle_amenities: List[str] = Field(default_factory=list, max_length=8)
+
+
+class ScenarioCell(BaseModel):
+    size: float
+    year_built: Optional[int] = None
+    # Toggled amenities switched on in this cell.
+    amenities: List[str]
+    estimated_value: float
+    low_estimate: float
+    high_estimate: float
+    confidence_score: float = Field(..., ge=0, le=1)
+
+
+class ScenarioResponse(BaseModel):
+    property_type: str
+    area: str
+    project: Optional[str] = None
+    # Amenities included in every cell.
+    amenities: List[str]
+    cells: List[ScenarioCell]
+    disclaimer: str
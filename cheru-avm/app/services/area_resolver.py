@@ -0,0 +1,256 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.utils.names import AREA_ALIASES, clean_area_query
+
+# Words people append to an area name that never distinguish one area from
+# another; dropped only when fuzzy matching.
+NOISE_TOKENS = frozenset(
+    {"estate", "estates", "area", "nairobi", "kenya", "county", "road", "rd", "phase", "the"}
+)
+FUZZY_CANDIDATES = 12
+MIN_FUZZY_LENGTH = 3
+MIN_SIMILARITY = 0.2
+
+
+class AreaSuggestion(NamedTuple):
+    name: str
+    match: str
+    score: float
+
+
+class AreaMatch(NamedTuple):
+    area: Optional[Any]
+    method: Optional[str]
+    suggestions: List[AreaSuggestion]
+    # Set when the name is known but cannot be used, e.g. no prices on a date.
+    detail: Optional[str] = None
+
+
+def unknown_area_message(match: AreaMatch) -> str:
+    if match.detail:
+        return match.detail
+    if not match.suggestions:
+        return "Unknown area"
+    names = ", ".join(suggestion.name for suggestion in match.suggestions)
+    return f"Unknown area. Did you mean: {names}?"
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[index : index + 3] for index in range(len(padded) - 2))
+
+
+def _with_deletions(text: str) -> List[str]:
+    return [text] + [text[:index] + text[index + 1 :] for index in range(len(text))]
+
+
+def max_edits(text: str) -> int:
+    return min(3, max(1, len(text) // 4))
+
+
+def edit_distance(left: str, right: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up once it exceeds ``limit``."""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, 1):
+        current = [i]
+        row_min = i
+        for j, right_char in enumerate(right, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (left_char != right_char),
+            )
+            if (
+                i > 1
+                and j > 1
+                and left_char == right[j - 2]
+                and left[i - 2] == right_char
+            ):
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+            row_min = min(row_min, cost)
+        if row_min > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class AreaResolver:
+    """Precomputed alias, n-gram, deletion and trigram indexes over area names.
+
+    Built once per reference snapshot; every lookup is in-memory. Typos are
+    found through a single-deletion index (a name and a query meet if they
+    are equal after deleting at most one character from each), so only a
+    handful of candidates ever reach the edit-distance check. Trigram
+    similarity ranks suggestions when nothing is close enough to resolve.
+    """
+
+    def __init__(self, areas: Iterable) -> None:
+        self.areas: List = list(areas)
+        self.keys: List[str] = [clean_area_query(area.name) for area in self.areas]
+        self.by_key: Dict[str, int] = {key: index for index, key in enumerate(self.keys)}
+        self.aliases: Dict[str, int] = {
+            clean_area_query(alias): self.by_key[clean_area_query(name)]
+            for alias, name in AREA_ALIASES.items()
+            if clean_area_query(name) in self.by_key
+        }
+
+        self.deletes: Dict[str, List[int]] = defaultdict(list)
+        for index, key in enumerate(self.keys):
+            if len(key) >= MIN_FUZZY_LENGTH:
+                for variant in _with_deletions(key):
+                    self.deletes[variant].append(index)
+
+        self.trigrams: List[FrozenSet[str]] = [_trigrams(key) for key in self.keys]
+        self.trigram_index: Dict[str, List[int]] = defaultdict(list)
+        for index, grams in enumerate(self.trigrams):
+            for gram in grams:
+                self.trigram_index[gram].append(index)
+        # Trigrams shared by more names than this carry little signal and are
+        # skipped when gathering candidates (the rarest few are always used).
+        self.common_trigram = max(64, len(self.keys) // 50)
+
+        # Sorted (text, area index, is_full_name) entries for typeahead:
+        # full names plus every later word, so "val" finds "Spring Valley".
+        prefixes = [(key, index, True) for index, key in enumerate(self.keys)]
+        for index, key in enumerate(self.keys):
+            for token in key.split()[1:]:
+                prefixes.append((token, index, False))
+        prefixes.sort()
+        self.prefixes: List[Tuple[str, int, bool]] = prefixes
+        self.prefix_keys: List[str] = [entry[0] for entry in prefixes]
+
+    def resolve(self, query: str, suggestions: int = 3) -> AreaMatch:
+        key = clean_area_query(query)
+        if not key:
+            return AreaMatch(None, None, [])
+        index = self.by_key.get(key)
+        if index is not None:
+            return AreaMatch(self.areas[index], "exact", [])
+        index = self.aliases.get(key)
+        if index is not None:
+            return AreaMatch(self.areas[index], "alias", [])
+        index = self._contained_area(key)
+        if index is not None:
+            return AreaMatch(self.areas[index], "token", [])
+
+        near = self._near(key)
+        if near and (len(near) == 1 or near[1][0] > near[0][0]):
+            return AreaMatch(self.areas[near[0][1]], "fuzzy", [])
+        ranked = [
+            AreaSuggestion(self.areas[index].name, "fuzzy", 1 - distance / len(self.keys[index]))
+            for distance, index in near
+        ]
+        return AreaMatch(None, None, self._merge(ranked, self._similar(key, suggestions), suggestions))
+
+    def _contained_area(self, key: str) -> Optional[int]:
+        # The longest run of words in the query that is an area name or alias,
+        # e.g. "Kileleshwa Estate" or "Nairobi West, Nairobi".
+        tokens = key.split()
+        for length in range(len(tokens) - 1, 0, -1):
+            found = set()
+            for start in range(len(tokens) - length + 1):
+                phrase = " ".join(tokens[start : start + length])
+                index = self.by_key.get(phrase, self.aliases.get(phrase))
+                if index is not None:
+                    found.add(index)
+            if len(found) == 1:
+                return found.pop()
+            if found:
+                return None
+        return None
+
+    def _near(self, key: str) -> List[Tuple[int, int]]:
+        """Names within their typo allowance of the query, as (distance, index)."""
+        variants = {key}
+        stripped = " ".join(token for token in key.split() if token not in NOISE_TOKENS)
+        if stripped:
+            variants.add(stripped)
+        best: Dict[int, int] = {}
+        for variant in variants:
+            if len(variant) < MIN_FUZZY_LENGTH:
+                continue
+            candidates = set()
+            for deleted in _with_deletions(variant):
+                candidates.update(self.deletes.get(deleted, ()))
+            for index in candidates:
+                allowed = min(2, max_edits(self.keys[index]))
+                distance = edit_distance(variant, self.keys[index], allowed)
+                if distance <= allowed and distance < best.get(index, allowed + 1):
+                    best[index] = distance
+        return sorted(
+            ((distance, index) for index, distance in best.items()),
+            key=lambda item: (item[0], self.keys[item[1]]),
+        )
+
+    def _similar(self, key: str, limit: int) -> List[AreaSuggestion]:
+        """Names ranked by trigram (Dice) similarity to the query."""
+        if len(key) < MIN_FUZZY_LENGTH or limit <= 0:
+            return []
+        grams = _trigrams(key)
+        postings = sorted(
+            (self.trigram_index[gram] for gram in grams if gram in self.trigram_index),
+            key=len,
+        )
+        overlaps: Counter = Counter()
+        for rank, posting in enumerate(postings):
+            if rank >= 3 and len(posting) > self.common_trigram:
+                break
+            overlaps.update(posting)
+        scored = []
+        for index, _ in overlaps.most_common(FUZZY_CANDIDATES):
+            shared = len(grams & self.trigrams[index])
+            scored.append((2 * shared / (len(grams) + len(self.trigrams[index])), index))
+        scored.sort(key=lambda item: (-item[0], self.keys[item[1]]))
+        return [
+            AreaSuggestion(self.areas[index].name, "fuzzy", round(similarity, 3))
+            for similarity, index in scored[:limit]
+            if similarity >= MIN_SIMILARITY
+        ]
+
+    @staticmethod
+    def _merge(
+        first: Sequence[AreaSuggestion],
+        second: Sequence[AreaSuggestion],
+        limit: int,
+    ) -> List[AreaSuggestion]:
+        merged: List[AreaSuggestion] = []
+        seen = set()
+        for suggestion in chain(first, second):
+            if suggestion.name not in seen and len(merged) < limit:
+                seen.add(suggestion.name)
+                merged.append(
+                    AreaSuggestion(suggestion.name, suggestion.match, round(suggestion.score, 3))
+                )
+        return merged
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[AreaSuggestion]:
+        """Typeahead: name prefixes first, then word prefixes, then fuzzy matches."""
+        key = clean_area_query(prefix)
+        if not key or limit <= 0:
+            return []
+        results: List[AreaSuggestion] = []
+        seen = set()
+        word_matches: List[int] = []
+        start = bisect_left(self.prefix_keys, key)
+        for text, index, is_full_name in self.prefixes[start:]:
+            if not text.startswith(key) or len(results) >= limit:
+                break
+            if is_full_name:
+                seen.add(index)
+                results.append(AreaSuggestion(self.areas[index].name, "prefix", 1.0))
+            elif len(word_matches) < limit:
+                word_matches.append(index)
+        for index in word_matches:
+            if index not in seen and len(results) < limit:
+                seen.add(index)
+                results.append(AreaSuggestion(self.areas[index].name, "word", 0.9))
+        if len(results) < limit:
+            results = self._merge(results, self._similar(key, limit), limit)
+        return results
@@ -0,0 +1,312 @@
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from typing import Any, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services.bulk import PreparedRow, RowRejected, _value_group, prepare_row
+from app.services.reference_data import ReferenceSnapshot, normalize_area_name
+from app.services.valuation import ValuationCoefficients, active_coefficients, use_coefficients
+from app.services.vectorized import ValuationTables
+
+PROPERTY_TYPES = ("land", "apartment", "house")
+PROPERTY_TYPE_CODES = {property_type: code for code, property_type in enumerate(PROPERTY_TYPES)}
+# Same band as the low_estimate/high_estimate the API returns.
+BAND_LOW = 0.90
+BAND_HIGH = 1.10
+
+
+class Engine(NamedTuple):
+    """One valuation engine under test: a snapshot and the artifact it was loaded with."""
+
+    name: str
+    reference: ReferenceSnapshot
+    coefficients: Optional[ValuationCoefficients] = None
+
+    @property
+    def version(self) -> str:
+        return self.coefficients.version if self.coefficients else "database"
+
+
+class ChunkResult(NamedTuple):
+    rows: int
+    rejects: Counter
+    # One entry per valued row; estimates has one row per engine.
+    property_types: np.ndarray
+    areas: np.ndarray
+    actual: np.ndarray
+    estimates: np.ndarray
+    engine_seconds: Tuple[float, ...]
+
+
+def _sale_price(record: Dict[str, Any], price_field: str) -> float:
+    value = record.pop(price_field, None)
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        raise RowRejected(f"Missing or invalid {price_field}") from None
+    if not price > 0 or price == float("inf"):
+        raise RowRejected(f"{price_field} must be a positive number")
+    return price
+
+
+def _estimates(
+    rows: List[PreparedRow],
+    tables: ValuationTables,
+    current_year: int,
+) -> np.ndarray:
+    """Estimated values in row order, valued a column group at a time as in bulk."""
+    estimates = np.empty(len(rows), dtype=np.float64)
+    groups: Dict[Tuple[str, Optional[date]], List[int]] = {}
+    for position, row in enumerate(rows):
+        groups.setdefault((row.request.property_type, row.as_of), []).append(position)
+    for (property_type, as_of), positions in groups.items():
+        valued = _value_group(
+            tables.as_of(as_of),
+            property_type,
+            [rows[position] for position in positions],
+            current_year if as_of is None else as_of.year,
+        )
+        estimates[positions] = valued["estimated_value"]
+    return estimates
+
+
+def backtest_chunk(
+    chunk: List[Tuple[int, Any]],
+    engines: List[Tuple[Engine, ValuationTables]],
+    current_year: int,
+    price_field: str = "price",
+) -> ChunkResult:
+    """Value one chunk of labelled rows with every engine.
+
+    Rows are parsed and resolved once against the first engine's snapshot;
+    engines share area and amenity identities and differ only in prices.
+    """
+    reference = engines[0][0].reference
+    area_index = engines[0][1].area_index
+    prepared: List[PreparedRow] = []
+    actual: List[float] = []
+    rejects: Counter = Counter()
+    for row_number, raw in chunk:
+        try:
+            record = raw
+            if isinstance(raw, str):
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    raise RowRejected("Invalid JSON") from None
+            if not isinstance(record, dict):
+                raise RowRejected("Row is not a JSON object")
+            price = _sale_price(record, price_field)
+            prepared.append(prepare_row(row_number, record, reference, current_year))
+            actual.append(price)
+        except RowRejected as exc:
+            rejects[str(exc)] += 1
+
+    count = len(prepared)
+    estimates = np.empty((len(engines), count), dtype=np.float64)
+    engine_seconds = []
+    previous = active_coefficients()
+    try:
+        for position, (engine, tables) in enumerate(engines):
+            # Depreciation curves come from the active artifact.
+            use_coefficients(engine.coefficients)
+            started = time.perf_counter()
+            estimates[position] = _estimates(prepared, tables, current_year)
+            engine_seconds.append(time.perf_counter() - started)
+    finally:
+        use_coefficients(previous)
+
+    return ChunkResult(
+        rows=len(chunk),
+        rejects=rejects,
+        property_types=np.fromiter(
+            (PROPERTY_TYPE_CODES[row.request.property_type] for row in prepared),
+            dtype=np.int8,
+            count=count,
+        ),
+        areas=np.fromiter(
+            (area_index[normalize_area_name(row.area.name)] for row in prepared),
+            dtype=np.int32,
+            count=count,
+        ),
+        actual=np.array(actual, dtype=np.float64),
+        estimates=estimates,
+        engine_seconds=tuple(engine_seconds),
+    )
+
+
+# Per-process state for pool workers, set once by _init_worker as in bulk.
+_worker_state: Optional[tuple] = None
+
+
+def _init_worker(engines: List[Engine], current_year: int, price_field: str) -> None:
+    global _worker_state
+    _worker_state = (
+        [(engine, ValuationTables(engine.reference)) for engine in engines],
+        current_year,
+        price_field,
+    )
+
+
+def _backtest_chunk_in_worker(chunk: List[Tuple[int, Any]]) -> ChunkResult:
+    return backtest_chunk(chunk, *_worker_state)
+
+
+def backtest_chunks(
+    chunks: Iterable[List[Tuple[int, Any]]],
+    engines: List[Engine],
+    current_year: int,
+    price_field: str = "price",
+    workers: int = 1,
+) -> Iterator[ChunkResult]:
+    """Backtest chunks, at most ``2 * workers`` in flight, yielding results in order."""
+    if workers <= 1:
+        tables = [(engine, ValuationTables(engine.reference)) for engine in engines]
+        for chunk in chunks:
+            yield backtest_chunk(chunk, tables, current_year, price_field)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(engines, current_year, price_field),
+    ) as executor:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_backtest_chunk_in_worker, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class BacktestReport:
+    """Accumulates chunk results into error metrics per engine.
+
+    Counts and sums are folded in per chunk. Absolute errors are kept as
+    float32, 4 bytes per row per engine, so medians cover every row.
+    """
+
+    def __init__(self, engines: List[Engine]) -> None:
+        self.engines = engines
+        self.area_names = tuple(area.name for area in engines[0].reference.areas.values())
+        self.rows = 0
+        self.rejects: Counter = Counter()
+        self.engine_seconds = [0.0] * len(engines)
+        self.started_at = time.perf_counter()
+        self._groups: List[np.ndarray] = []
+        self._absolute_errors: List[List[np.ndarray]] = [[] for _ in engines]
+        size = len(PROPERTY_TYPES) * len(self.area_names)
+        self._valued = np.zeros(size, dtype=np.int64)
+        self._percent_errors = np.zeros((len(engines), size))
+        self._hits = np.zeros((len(engines), size), dtype=np.int64)
+
+    @property
+    def valued(self) -> int:
+        return int(self._valued.sum())
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def add(self, result: ChunkResult) -> None:
+        self.rows += result.rows
+        self.rejects.update(result.rejects)
+        size = len(self._valued)
+        groups = result.property_types.astype(np.int64) * len(self.area_names) + result.areas
+        self._groups.append(groups.astype(np.int32))
+        self._valued += np.bincount(groups, minlength=size)
+        actual = result.actual
+        for position, estimated in enumerate(result.estimates):
+            error = np.abs(estimated - actual)
+            hits = (actual >= estimated * BAND_LOW) & (actual <= estimated * BAND_HIGH)
+            self._percent_errors[position] += np.bincount(
+                groups, weights=error / actual, minlength=size
+            )
+            self._hits[position] += np.bincount(groups, weights=hits, minlength=size).astype(
+                np.int64
+            )
+            self._absolute_errors[position].append(error.astype(np.float32))
+            self.engine_seconds[position] += result.engine_seconds[position]
+
+    def _metrics(
+        self,
+        position: int,
+        groups: slice,
+        absolute_errors: np.ndarray,
+    ) -> Dict[str, Optional[float]]:
+        count = int(self._valued[groups].sum())
+        if not count:
+            return {"mape": None, "median_absolute_error": None, "hit_rate": None}
+        return {
+            "mape": round(float(self._percent_errors[position][groups].sum()) / count * 100, 3),
+            "median_absolute_error": round(float(np.median(absolute_errors)), 2),
+            "hit_rate": round(int(self._hits[position][groups].sum()) / count * 100, 2),
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        groups = np.concatenate(self._groups) if self._groups else np.empty(0, np.int32)
+        order = np.argsort(groups, kind="stable")
+        bounds = np.searchsorted(groups[order], np.arange(len(self._valued) + 1))
+        type_width = len(self.area_names)
+        errors = []
+        for chunks in self._absolute_errors:
+            column = np.concatenate(chunks) if chunks else np.empty(0, np.float32)
+            errors.append(column[order].astype(np.float64))
+
+        def summary(start: int, stop: int) -> Dict[str, Any]:
+            selected = slice(start, stop)
+            first, last = bounds[start], bounds[stop]
+            entry: Dict[str, Any] = {"rows": int(self._valued[selected].sum())}
+            for position, engine in enumerate(self.engines):
+                entry[engine.name] = self._metrics(
+                    position, selected, errors[position][first:last]
+                )
+            return entry
+
+        property_types = {}
+        areas = []
+        for code, property_type in enumerate(PROPERTY_TYPES):
+            start = code * type_width
+            if not self._valued[start:start + type_width].any():
+                continue
+            property_types[property_type] = summary(start, start + type_width)
+            for offset, name in enumerate(self.area_names):
+                if self._valued[start + offset]:
+                    areas.append(
+                        {
+                            "property_type": property_type,
+                            "area": name,
+                            **summary(start + offset, start + offset + 1),
+                        }
+                    )
+
+        return {
+            "engines": [
+                {
+                    "name": engine.name,
+                    "version": engine.version,
+                    "valuation_seconds": round(seconds, 3),
+                    "rows_per_second": round(self.valued / seconds, 1) if seconds else None,
+                }
+                for engine, seconds in zip(self.engines, self.engine_seconds)
+            ],
+            "rows": self.rows,
+            "valued": self.valued,
+            "rejected": sum(self.rejects.values()),
+            "reject_reasons": dict(self.rejects.most_common()),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "overall": summary(0, len(self._valued)),
+            "property_types": property_types,
+            "areas": areas,
+        }
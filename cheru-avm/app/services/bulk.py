@@ -0,0 +1,521 @@
+import csv
+import io
+import json
+import logging
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.schemas.estimate import (
+    ApartmentEstimateRequest,
+    EstimateBreakdown,
+    EstimateRequest,
+    HouseEstimateRequest,
+    format_validation_error,
+    parse_estimate_request,
+)
+from app.services.area_resolver import unknown_area_message
+from app.services.reference_data import (
+    AmenityRecord,
+    AreaRecord,
+    ProjectRecord,
+    ReferenceSnapshot,
+    normalize_area_name,
+)
+from app.services.valuation import (
+    ValuationCoefficients,
+    active_coefficients,
+    confidence_score,
+    use_coefficients,
+    year_built_error,
+)
+from app.services.vectorized import (
+    ValuationTables,
+    encode_shapes,
+    value_apartment,
+    value_house,
+    value_land,
+)
+
+logger = logging.getLogger(__name__)
+
+BREAKDOWN_FIELDS = tuple(EstimateBreakdown.model_fields)
+RESULT_FIELDS = (
+    "row",
+    "id",
+    "property_type",
+    "area",
+    "project",
+    "estimated_value",
+    "low_estimate",
+    "high_estimate",
+    "confidence_score",
+) + BREAKDOWN_FIELDS
+REJECT_FIELDS = ("row", "id", "reason", "record")
+
+CSV_LIST_FIELDS = {"amenities"}
+CSV_LIST_SEPARATOR = re.compile(r"[;|]")
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+class RowRejected(Exception):
+    pass
+
+
+class PreparedRow(NamedTuple):
+    row: int
+    record_id: Optional[str]
+    request: EstimateRequest
+    area: AreaRecord
+    amenities: List[AmenityRecord]
+    as_of: Optional[date] = None
+    project: Optional[ProjectRecord] = None
+
+
+class BulkStats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.valued = 0
+        self.rejected = 0
+        self.started_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "rows": self.rows,
+            "valued": self.valued,
+            "rejected": self.rejected,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(path: Path, explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit
+    try:
+        return FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Cannot infer the format of {path}; pass csv or ndjson explicitly"
+        ) from None
+
+
+def _csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    # Blank cells are dropped so the request models apply their defaults.
+    record: Dict[str, Any] = {}
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        value = value.strip()
+        if not value:
+            continue
+        if key in CSV_LIST_FIELDS:
+            record[key] = [item.strip() for item in CSV_LIST_SEPARATOR.split(value) if item.strip()]
+        else:
+            record[key] = value
+    return record
+
+
+def read_records(handle: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(row_number, record)`` pairs one line at a time.
+
+    NDJSON lines are yielded undecoded; ``process_chunk`` decodes them, which
+    keeps JSON parsing in the worker processes when running in parallel.
+    """
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(handle), start=1):
+            yield row_number, _csv_record(row)
+    elif fmt == "ndjson":
+        row_number = 0
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            row_number += 1
+            yield row_number, line
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def prepare_row(
+    row_number: int,
+    record: Any,
+    reference: ReferenceSnapshot,
+    current_year: int,
+    id_field: str = "id",
+) -> PreparedRow:
+    if not isinstance(record, dict):
+        raise RowRejected("Row is not a JSON object")
+    try:
+        request = parse_estimate_request(record)
+    except ValidationError as exc:
+        raise RowRejected(format_validation_error(exc)) from None
+    if request.valuation_method != "area":
+        raise RowRejected("Bulk files are valued with the area model only")
+
+    if request.as_of is not None:
+        reference = reference.as_of(request.as_of)
+        current_year = request.as_of.year
+    match = reference.resolve_area(request.area)
+    if match.area is None:
+        raise RowRejected(unknown_area_message(match))
+    area = match.area
+
+    amenities: List[AmenityRecord] = []
+    project = None
+    if isinstance(request, ApartmentEstimateRequest):
+        project = reference.project(area, request.apartment_name)
+    if isinstance(request, (ApartmentEstimateRequest, HouseEstimateRequest)):
+        year_error = year_built_error(request.year_built, current_year)
+        if year_error:
+            raise RowRejected(year_error)
+        if request.amenities:
+            amenities, missing = reference.resolve_amenities(
+                request.amenities, request.property_type
+            )
+            if missing:
+                raise RowRejected(f"Unknown amenities: {', '.join(missing)}")
+
+    record_id = record.get(id_field)
+    return PreparedRow(
+        row=row_number,
+        record_id=None if record_id is None else str(record_id),
+        request=request,
+        area=area,
+        amenities=amenities,
+        as_of=request.as_of,
+        project=project,
+    )
+
+
+def _value_group(
+    tables: ValuationTables,
+    property_type: str,
+    rows: List[PreparedRow],
+    current_year: int,
+) -> dict:
+    count = len(rows)
+    area_index = np.fromiter(
+        (tables.area_index[normalize_area_name(row.area.name)] for row in rows),
+        dtype=np.intp,
+        count=count,
+    )
+    requests = [row.request for row in rows]
+    if property_type == "land":
+        return value_land(
+            tables,
+            area_index,
+            np.fromiter((request.land_size_acres for request in requests), np.float64, count),
+            encode_shapes(request.plot_shape for request in requests),
+        )
+    masks = np.fromiter(
+        (tables.encode_amenities(row.amenities, property_type) for row in rows),
+        dtype=np.uint64,
+        count=count,
+    )
+    year_built = np.fromiter((request.year_built for request in requests), np.int64, count)
+    if property_type == "apartment":
+        project_price_per_sqm = None
+        if any(row.project is not None for row in rows):
+            project_price_per_sqm = np.fromiter(
+                (
+                    np.nan if row.project is None else row.project.average_price_per_sqm
+                    for row in rows
+                ),
+                np.float64,
+                count,
+            )
+        return value_apartment(
+            tables,
+            area_index,
+            np.fromiter((request.size_sqm for request in requests), np.float64, count),
+            year_built,
+            masks,
+            current_year,
+            project_price_per_sqm,
+        )
+    return value_house(
+        tables,
+        area_index,
+        np.fromiter((request.house_size_sqm for request in requests), np.float64, count),
+        np.fromiter((request.land_size_acres for request in requests), np.float64, count),
+        year_built,
+        encode_shapes(request.plot_shape for request in requests),
+        masks,
+        current_year,
+    )
+
+
+def value_rows(
+    rows: List[PreparedRow],
+    tables: ValuationTables,
+    current_year: int,
+) -> List[Dict[str, Any]]:
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    groups: Dict[Tuple[str, Optional[date]], List[int]] = {}
+    for position, row in enumerate(rows):
+        groups.setdefault((row.request.property_type, row.as_of), []).append(position)
+
+    for (property_type, as_of), positions in groups.items():
+        group_rows = [rows[position] for position in positions]
+        valued = _value_group(
+            tables.as_of(as_of),
+            property_type,
+            group_rows,
+            current_year if as_of is None else as_of.year,
+        )
+        estimated = valued["estimated_value"]
+        low = (estimated * 0.90).tolist()
+        high = (estimated * 1.10).tolist()
+        estimated = estimated.tolist()
+        breakdown = {name: column.tolist() for name, column in valued["breakdown"].items()}
+        for offset, (position, row) in enumerate(zip(positions, group_rows)):
+            result = {
+                "row": row.row,
+                "id": row.record_id,
+                "property_type": property_type,
+                "area": row.area.name,
+                "project": None if row.project is None else row.project.name,
+                "estimated_value": estimated[offset],
+                "low_estimate": low[offset],
+                "high_estimate": high[offset],
+                "confidence_score": confidence_score(
+                    property_type, len(row.amenities), row.project is not None
+                ),
+            }
+            for name in BREAKDOWN_FIELDS:
+                column = breakdown.get(name)
+                result[name] = None if column is None else column[offset]
+            results[position] = result
+    return results
+
+
+def process_chunk(
+    chunk: List[Tuple[int, Any]],
+    reference: ReferenceSnapshot,
+    tables: ValuationTables,
+    current_year: int,
+    id_field: str = "id",
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    prepared = []
+    rejects = []
+    for row_number, raw in chunk:
+        record = raw
+        try:
+            if isinstance(raw, str):
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    raise RowRejected("Invalid JSON") from None
+            prepared.append(prepare_row(row_number, record, reference, current_year, id_field))
+        except RowRejected as exc:
+            record_id = record.get(id_field) if isinstance(record, dict) else None
+            rejects.append(
+                {
+                    "row": row_number,
+                    "id": record_id,
+                    "reason": str(exc),
+                    "record": raw if isinstance(raw, str) else json.dumps(raw, default=str),
+                }
+            )
+    return value_rows(prepared, tables, current_year), rejects
+
+
+class ChunkOutput(NamedTuple):
+    rows: int
+    valued: int
+    rejected: int
+    # Lists of records, or text already rendered in the output format.
+    results: Union[List[Dict[str, Any]], str]
+    rejects: Union[List[Dict[str, Any]], str]
+
+
+def render_records(
+    records: Iterable[Dict[str, Any]],
+    fmt: str,
+    fields: Tuple[str, ...],
+) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore").writerows(records)
+        return buffer.getvalue()
+    if fmt == "ndjson":
+        return "".join(json.dumps(record) + "\n" for record in records)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _process_chunk_output(
+    chunk: List[Tuple[int, Any]],
+    reference: ReferenceSnapshot,
+    tables: ValuationTables,
+    current_year: int,
+    id_field: str,
+    output_format: Optional[str],
+) -> ChunkOutput:
+    results, rejects = process_chunk(chunk, reference, tables, current_year, id_field)
+    output = ChunkOutput(len(chunk), len(results), len(rejects), results, rejects)
+    if output_format is None:
+        return output
+    return output._replace(
+        results=render_records(results, output_format, RESULT_FIELDS),
+        rejects=render_records(rejects, output_format, REJECT_FIELDS),
+    )
+
+
+# Per-process state for pool workers, set once by _init_worker so the
+# reference snapshot is pickled to each worker a single time, not per chunk.
+_worker_state: Optional[tuple] = None
+
+
+def _init_worker(
+    reference: ReferenceSnapshot,
+    current_year: int,
+    id_field: str,
+    output_format: Optional[str],
+    coefficients: Optional[ValuationCoefficients] = None,
+) -> None:
+    global _worker_state
+    use_coefficients(coefficients)
+    _worker_state = (
+        reference,
+        ValuationTables(reference),
+        current_year,
+        id_field,
+        output_format,
+    )
+
+
+def _process_chunk_in_worker(chunk: List[Tuple[int, Any]]) -> ChunkOutput:
+    return _process_chunk_output(chunk, *_worker_state)
+
+
+def process_chunks(
+    chunks: Iterable[List[Tuple[int, Any]]],
+    reference: ReferenceSnapshot,
+    current_year: int,
+    id_field: str = "id",
+    workers: int = 1,
+    output_format: Optional[str] = None,
+) -> Iterator[ChunkOutput]:
+    """Value chunks and yield their output in input order.
+
+    With more than one worker the chunks are valued in a process pool, at
+    most ``2 * workers`` in flight so memory stays bounded. Passing
+    ``output_format`` renders the output inside the workers, which keeps
+    serialisation off the parent process.
+    """
+    if workers <= 1:
+        tables = ValuationTables(reference)
+        for chunk in chunks:
+            yield _process_chunk_output(
+                chunk, reference, tables, current_year, id_field, output_format
+            )
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(reference, current_year, id_field, output_format, active_coefficients()),
+    ) as executor:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_process_chunk_in_worker, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class RecordWriter:
+    def __init__(self, handle: IO[str], fmt: str, fields: Tuple[str, ...]) -> None:
+        self.handle = handle
+        self.fmt = fmt
+        self.fields = fields
+        if fmt == "csv":
+            csv.DictWriter(handle, fieldnames=fields).writeheader()
+        elif fmt != "ndjson":
+            raise ValueError(f"Unsupported format: {fmt}")
+
+    def write(self, records: Union[Iterable[Dict[str, Any]], str]) -> None:
+        if not isinstance(records, str):
+            records = render_records(records, self.fmt, self.fields)
+        self.handle.write(records)
+        self.handle.flush()
+
+
+def run_bulk(
+    records: Iterable[Tuple[int, Any]],
+    reference: ReferenceSnapshot,
+    writer: RecordWriter,
+    reject_writer: RecordWriter,
+    current_year: int,
+    chunk_size: int = 10_000,
+    id_field: str = "id",
+    progress_every: int = 100_000,
+    workers: int = 1,
+) -> BulkStats:
+    stats = BulkStats()
+    next_report = progress_every
+    if writer.fmt != reject_writer.fmt:
+        raise ValueError("Results and rejects must use the same output format")
+    for output in process_chunks(
+        chunked(records, chunk_size),
+        reference,
+        current_year,
+        id_field,
+        workers,
+        output_format=writer.fmt,
+    ):
+        writer.write(output.results)
+        reject_writer.write(output.rejects)
+        stats.rows += output.rows
+        stats.valued += output.valued
+        stats.rejected += output.rejected
+        if stats.rows >= next_report:
+            logger.info(
+                "Processed %s rows (%s rejected) at %.0f rows/sec",
+                stats.rows,
+                stats.rejected,
+                stats.rows_per_second,
+            )
+            next_report += progress_every
+    return stats
@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "invalidate"
+REFERENCE_SNAPSHOT_KEY = "reference:snapshot"
+
+_LOCK_STRIPES = 64
+
+
+class CacheBackend(ABC):
+    """Key/value store with pub/sub and stampede-safe ``get_or_compute``.
+
+    Values are strings. Keys and channels are namespaced with ``prefix`` so
+    every worker that shares a backend builds identical keys. Subclasses
+    implement storage and pub/sub; shared backends also override
+    ``_acquire``/``_release`` with a lock other processes can see.
+    """
+
+    shared = False
+
+    def __init__(self, prefix: str, lock_timeout: float) -> None:
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self._local_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self.computes = 0
+        self.coalesced = 0
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    @abstractmethod
+    def get(self, name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, name: str, value: str, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def _acquire(self, name: str) -> Optional[str]:
+        return "local"
+
+    def _release(self, name: str, token: str) -> None:
+        pass
+
+    def get_or_compute(
+        self,
+        name: str,
+        compute: Callable[[], str],
+        ttl_seconds: float,
+    ) -> str:
+        # A cold key is computed once: threads in this process queue on a
+        # striped lock, and other processes wait on a lock held in the backend.
+        value = self.get(name)
+        if value is not None:
+            return value
+        stripe = self._local_locks[zlib.crc32(name.encode()) % _LOCK_STRIPES]
+        with stripe:
+            value = self.get(name)
+            if value is not None:
+                self.coalesced += 1
+                return value
+            token = self._acquire(name)
+            if token is None:
+                value = self._wait_for(name)
+                if value is not None:
+                    self.coalesced += 1
+                    return value
+            try:
+                value = compute()
+                self.computes += 1
+                self.set(name, value, ttl_seconds)
+                return value
+            finally:
+                if token is not None:
+                    self._release(name, token)
+
+    def _wait_for(self, name: str) -> Optional[str]:
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = self.get(name)
+            if value is not None:
+                return value
+            delay = min(delay * 2, 0.1)
+        logger.warning("Timed out waiting for %s; computing it locally", name)
+        return None
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process backend: an LRU with TTLs and synchronous pub/sub."""
+
+    def __init__(self, prefix: str, lock_timeout: float, max_entries: int = 1024) -> None:
+        super().__init__(prefix, lock_timeout)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[str]:
+        key = self.key(name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, name: str, value: str, ttl_seconds: float) -> None:
+        key = self.key(name)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(self.key(name), None)
+
+    def publish(self, channel: str, message: str) -> None:
+        for callback in list(self._subscribers.get(self.key(channel), [])):
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        self._subscribers.setdefault(self.key(channel), []).append(callback)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend shared by every worker and pod through a Redis server.
+
+    ``client`` is any redis-py compatible client, e.g. ``redis.Redis`` or, in
+    tests and local development, ``fakeredis.FakeRedis``.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str, lock_timeout: float) -> None:
+        super().__init__(prefix, lock_timeout)
+        self.client = client
+        self._pubsub = None
+        self._listener = None
+        self._callbacks: Dict[str, List[Callable[[str], None]]] = {}
+
+    def get(self, name: str) -> Optional[str]:
+        value = self.client.get(self.key(name))
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, name: str, value: str, ttl_seconds: float) -> None:
+        self.client.set(self.key(name), value, px=max(int(ttl_seconds * 1000), 1))
+
+    def delete(self, name: str) -> None:
+        self.client.delete(self.key(name))
+
+    def publish(self, channel: str, message: str) -> None:
+        self.client.publish(self.key(channel), message)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        key = self.key(channel)
+        self._callbacks.setdefault(key, []).append(callback)
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{key: self._dispatch})
+        if self._listener is None:
+            self._listener = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def _dispatch(self, message) -> None:
+        channel = message["channel"]
+        channel = channel.decode() if isinstance(channel, bytes) else channel
+        data = message["data"]
+        data = data.decode() if isinstance(data, bytes) else str(data)
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(data)
+            except Exception:
+                logger.exception("Cache invalidation callback failed")
+
+    def _acquire(self, name: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = self.client.set(
+            self.key(f"lock:{name}"),
+            token,
+            nx=True,
+            px=int(self.lock_timeout * 1000),
+        )
+        return token if acquired else None
+
+    def _release(self, name: str, token: str) -> None:
+        # Only delete the lock if it is still ours (it may have expired and
+        # been taken by another worker in the meantime).
+        lock_key = self.key(f"lock:{name}")
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(lock_key)
+                current = pipe.get(lock_key)
+                current = current.decode() if isinstance(current, bytes) else current
+                if current == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except Exception:
+                logger.warning("Could not release cache lock %s", lock_key, exc_info=True)
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+def _redis_client(url: str):
+    if url.startswith("fakeredis://"):
+        try:
+            import fakeredis
+        except ImportError as exc:
+            raise RuntimeError("REDIS_URL=fakeredis:// requires the fakeredis package") from exc
+        return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("CACHE_BACKEND=redis requires the redis package") from exc
+    return redis.Redis.from_url(url)
+
+
+def create_cache_backend(config: Settings) -> CacheBackend:
+    if config.cache_backend == "redis":
+        return RedisCacheBackend(
+            _redis_client(config.redis_url),
+            prefix=config.cache_key_prefix,
+            lock_timeout=config.cache_lock_timeout_seconds,
+        )
+    return LocalCacheBackend(
+        prefix=config.cache_key_prefix,
+        lock_timeout=config.cache_lock_timeout_seconds,
+    )
+
+
+cache_backend = create_cache_backend(get_settings())
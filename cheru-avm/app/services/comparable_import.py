@@ -0,0 +1,187 @@
+import json
+import math
+import uuid
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Area, ComparableSale
+from app.services.comparables import mark_comparables_changed
+from app.services.price_import import DEFAULT_BATCH_SIZE, _insert
+from app.utils.names import normalize_area_name
+
+PROPERTY_TYPES = ("land", "apartment", "house")
+# Training and backtest files name a house's floor area house_size_sqm.
+FIELD_ALIASES = {"house_size_sqm": "size_sqm"}
+MAX_ERRORS = 20
+# Ids are derived from the sale itself, so importing a file twice updates
+# rows instead of duplicating them.
+SALE_NAMESPACE = uuid.UUID("0b6a3f50-8d2e-4c1b-9a57-3c5e2f1d7a44")
+
+
+class ComparableFileError(ValueError):
+    pass
+
+
+class ComparableImportReport:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.written = 0
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "written": self.written,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+def _number(record: Dict[str, Any], field: str, required: bool) -> Optional[float]:
+    value = record.get(field)
+    if value in (None, ""):
+        if required:
+            raise ComparableFileError(f"{field}: required")
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ComparableFileError(f"{field}: not a number: {value!r}") from None
+    if not math.isfinite(number):
+        raise ComparableFileError(f"{field}: not a number: {value!r}")
+    return number
+
+
+def _positive(record: Dict[str, Any], field: str, required: bool) -> Optional[float]:
+    number = _number(record, field, required)
+    if number is not None and number <= 0:
+        raise ComparableFileError(f"{field}: must be greater than 0")
+    return number
+
+
+def parse_sale(
+    record: Dict[str, Any],
+    area_ids: Dict[str, uuid.UUID],
+    today: date,
+) -> Dict[str, Any]:
+    """One comparable_sales row from a file record, validated like the comps index expects."""
+    record = {FIELD_ALIASES.get(key, key): value for key, value in record.items()}
+    property_type = str(record.get("property_type") or "").strip().lower()
+    if property_type not in PROPERTY_TYPES:
+        raise ComparableFileError(f"property_type: must be one of {', '.join(PROPERTY_TYPES)}")
+
+    latitude = _number(record, "latitude", required=True)
+    longitude = _number(record, "longitude", required=True)
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ComparableFileError("latitude/longitude: out of range")
+    price = _positive(record, "price", required=True)
+    building = property_type != "land"
+    size_sqm = _positive(record, "size_sqm", required=building)
+    land_size_acres = _positive(record, "land_size_acres", required=property_type != "apartment")
+    year_built = _number(record, "year_built", required=building)
+    if year_built is not None:
+        if not year_built.is_integer() or not 1800 <= year_built <= today.year + 5:
+            raise ComparableFileError(f"year_built: not a plausible year: {record['year_built']!r}")
+        year_built = int(year_built)
+
+    try:
+        sold_on = date.fromisoformat(str(record.get("sold_on") or "").strip())
+    except ValueError:
+        raise ComparableFileError("sold_on: must be a YYYY-MM-DD date") from None
+    if sold_on > today:
+        raise ComparableFileError("sold_on: cannot be in the future")
+
+    area_id = None
+    area_name = " ".join(str(record.get("area") or "").split())
+    if area_name:
+        area_id = area_ids.get(normalize_area_name(area_name))
+        if area_id is None:
+            raise ComparableFileError(f"area: unknown area {area_name!r}")
+
+    row = {
+        "property_type": property_type,
+        "area_id": area_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "size_sqm": size_sqm,
+        "land_size_acres": land_size_acres,
+        "year_built": year_built,
+        "price": price,
+        "sold_on": sold_on,
+    }
+    if record.get("id") not in (None, ""):
+        try:
+            row["id"] = uuid.UUID(str(record["id"]))
+        except ValueError:
+            raise ComparableFileError(f"id: not a UUID: {record['id']!r}") from None
+    else:
+        key = json.dumps(row, default=str, sort_keys=True)
+        row["id"] = uuid.uuid5(SALE_NAMESPACE, key)
+    return row
+
+
+def import_comparables(
+    session: Session,
+    records: Iterable[Tuple[int, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    today: Optional[date] = None,
+) -> ComparableImportReport:
+    """Upsert ``(row_number, record)`` pairs into comparable_sales by id.
+
+    Rows are validated and written a batch at a time so large files stream.
+    Any invalid row raises ``ComparableFileError`` once the file has been
+    read, listing the first errors; the caller rolls the session back.
+    """
+    today = today or date.today()
+    area_ids = dict(session.query(Area.name_key, Area.id))
+    report = ComparableImportReport()
+    errors: List[str] = []
+    pending: Dict[uuid.UUID, Dict[str, Any]] = {}
+
+    def flush() -> None:
+        if not pending:
+            return
+        statement = _insert(session, ComparableSale)
+        statement = statement.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                field: statement.excluded[field]
+                for field in next(iter(pending.values()))
+                if field != "id"
+            },
+        )
+        session.execute(statement, list(pending.values()))
+        report.written += len(pending)
+        pending.clear()
+
+    for row_number, record in records:
+        report.rows += 1
+        try:
+            if isinstance(record, str):
+                try:
+                    record = json.loads(record)
+                except json.JSONDecodeError:
+                    raise ComparableFileError("invalid JSON") from None
+            if not isinstance(record, dict):
+                raise ComparableFileError("row is not a JSON object")
+            row = parse_sale(record, area_ids, today)
+        except ComparableFileError as exc:
+            errors.append(f"row {row_number}: {exc}")
+            continue
+        if errors:
+            # The import will be rolled back; keep validating without writing.
+            continue
+        # The last row for an id wins within a batch, as across batches.
+        pending[row["id"]] = row
+        if len(pending) >= batch_size:
+            flush()
+
+    if errors:
+        shown = "\n".join(errors[:MAX_ERRORS])
+        more = f"\n... and {len(errors) - MAX_ERRORS} more" if len(errors) > MAX_ERRORS else ""
+        raise ComparableFileError(f"{len(errors)} invalid row(s):\n{shown}{more}")
+    flush()
+    if report.written:
+        mark_comparables_changed(session)
+    return report
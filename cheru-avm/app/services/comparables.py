@@ -0,0 +1,556 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+from datetime import date
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import ApartmentProject, Area, ComparableSale
+from app.services.cache_backend import INVALIDATION_CHANNEL, cache_backend
+from app.services.kdtree import KDTree
+from app.services.price_history import PriceHistory
+from app.utils.names import normalize_area_name
+
+logger = logging.getLogger(__name__)
+
+COMPARABLES_KEY = "comparables"
+SALE_SOURCE = "transaction"
+PROJECT_SOURCE = "project"
+
+# Coordinates are projected to kilometres around central Nairobi, which is
+# accurate to well under 1% across the metro area.
+ORIGIN_LATITUDE = -1.2864
+ORIGIN_LONGITUDE = 36.8172
+KM_PER_DEGREE = 111.32
+_KM_PER_DEGREE_LONGITUDE = KM_PER_DEGREE * math.cos(math.radians(ORIGIN_LATITUDE))
+
+# Attribute scales, in "kilometre equivalents" of the search distance: a 25%
+# size gap weighs about as much as 1 km, and so do 10 years of age.
+SIZE_WEIGHT = 4.0
+YEAR_WEIGHT = 0.1
+
+DEFAULT_NEIGHBOURS = 10
+MIN_COMPARABLES = 3
+MAX_DISTANCE = 10.0
+RECENCY_HALF_LIFE_YEARS = 3.0
+LOW_QUANTILE = 0.2
+HIGH_QUANTILE = 0.8
+
+# Area price column that moves with each property type's comparables.
+PRICE_INDEX_FIELDS = {
+    "apartment": "apartment_price_per_sqm",
+    "house": "house_price_per_sqm",
+    "land": "land_price_per_acre",
+}
+
+
+class ComparableRecord(NamedTuple):
+    id: uuid.UUID
+    property_type: str
+    area_id: Optional[uuid.UUID]
+    latitude: float
+    longitude: float
+    size_sqm: Optional[float]
+    land_size_acres: Optional[float]
+    year_built: Optional[int]
+    price: float
+    # None for apartment projects, whose price per sqm is a current average.
+    sold_on: Optional[date]
+    source: str = SALE_SOURCE
+
+
+class ComparableMatch(NamedTuple):
+    id: uuid.UUID
+    sold_on: Optional[date]
+    price: float
+    adjusted_unit_price: float
+    distance_km: float
+    weight: float
+    source: str
+
+
+class CompsEstimate(NamedTuple):
+    unit_price: float
+    low_unit_price: float
+    high_unit_price: float
+    confidence: float
+    comparables: List[ComparableMatch]
+
+
+def project(latitude: float, longitude: float) -> Tuple[float, float]:
+    return (
+        (longitude - ORIGIN_LONGITUDE) * _KM_PER_DEGREE_LONGITUDE,
+        (latitude - ORIGIN_LATITUDE) * KM_PER_DEGREE,
+    )
+
+
+def comparable_features(
+    property_type: str,
+    latitude: float,
+    longitude: float,
+    size_sqm: Optional[float] = None,
+    land_size_acres: Optional[float] = None,
+    year_built: Optional[int] = None,
+) -> List[float]:
+    x, y = project(latitude, longitude)
+    if property_type == "land":
+        return [x, y, SIZE_WEIGHT * math.log(land_size_acres)]
+    if property_type == "house":
+        return [
+            x,
+            y,
+            SIZE_WEIGHT * math.log(size_sqm),
+            SIZE_WEIGHT * math.log(land_size_acres),
+            YEAR_WEIGHT * year_built,
+        ]
+    return [x, y, SIZE_WEIGHT * math.log(size_sqm), YEAR_WEIGHT * year_built]
+
+
+def _feature_matrix(
+    property_type: str,
+    records: List[ComparableRecord],
+    location_only: bool = False,
+) -> np.ndarray:
+    # Column-wise counterpart of comparable_features for a whole set.
+    def column(field: str) -> np.ndarray:
+        return np.array([getattr(record, field) for record in records], dtype=np.float64)
+
+    columns = [
+        (column("longitude") - ORIGIN_LONGITUDE) * _KM_PER_DEGREE_LONGITUDE,
+        (column("latitude") - ORIGIN_LATITUDE) * KM_PER_DEGREE,
+    ]
+    if not location_only:
+        if property_type != "land":
+            columns.append(SIZE_WEIGHT * np.log(column("size_sqm")))
+        if property_type != "apartment":
+            columns.append(SIZE_WEIGHT * np.log(column("land_size_acres")))
+        if property_type != "land":
+            columns.append(YEAR_WEIGHT * column("year_built"))
+    return np.column_stack(columns) if records else np.empty((0, len(columns)))
+
+
+def _usable(record: ComparableRecord) -> bool:
+    if record.price <= 0:
+        return False
+    if record.source == PROJECT_SOURCE:
+        return True
+    if record.property_type == "land":
+        return bool(record.land_size_acres and record.land_size_acres > 0)
+    if not record.size_sqm or record.size_sqm <= 0 or record.year_built is None:
+        return False
+    if record.property_type == "house":
+        return bool(record.land_size_acres and record.land_size_acres > 0)
+    return True
+
+
+def _unit_price(record: ComparableRecord) -> float:
+    # Land is priced per acre; buildings per sqm of floor area (houses
+    # include their plot, which is matched on as a feature instead).
+    # Projects are already priced per sqm.
+    if record.source == PROJECT_SOURCE:
+        return record.price
+    if record.property_type == "land":
+        return record.price / record.land_size_acres
+    return record.price / record.size_sqm
+
+
+def _weighted_quantiles(
+    values: np.ndarray,
+    weights: np.ndarray,
+    quantiles: Tuple[float, ...],
+) -> List[float]:
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    cumulative = np.cumsum(weights[order])
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1])
+    return ordered[np.minimum(positions, len(values) - 1)].tolist()
+
+
+class ComparableSet:
+    """Comparables of one property type behind a k-d tree over their features.
+
+    A ``location_only`` set matches on coordinates alone; apartment projects
+    have no single size or build year to match on.
+    """
+
+    def __init__(
+        self,
+        property_type: str,
+        records: List[ComparableRecord],
+        location_only: bool = False,
+    ) -> None:
+        self.property_type = property_type
+        self.records = records
+        self.location_only = location_only
+        self.unit_prices = np.array([_unit_price(record) for record in records], dtype=np.float64)
+        # Undated projects sort before every date, so as_of never rules them out.
+        self.sold_ordinals = np.array(
+            [0 if record.sold_on is None else record.sold_on.toordinal() for record in records],
+            dtype=np.int64,
+        )
+        self.features = _feature_matrix(property_type, records, location_only)
+        self.tree = KDTree(self.features)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def nearest(
+        self,
+        features: List[float],
+        k: int,
+        sold_by: Optional[date] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The ``k`` nearest comparables within ``MAX_DISTANCE``, sold on or before ``sold_by``."""
+        if self.location_only:
+            features = features[:2]
+        allowed = None if sold_by is None else self.sold_ordinals <= sold_by.toordinal()
+        return self.tree.query(np.asarray(features), k, MAX_DISTANCE, allowed)
+
+
+class ComparablesIndex:
+    """Immutable in-memory comparables, one k-d tree per property type."""
+
+    def __init__(self, records: Iterable[ComparableRecord], loaded_at: float) -> None:
+        by_type: Dict[str, List[ComparableRecord]] = {}
+        projects_by_type: Dict[str, List[ComparableRecord]] = {}
+        locations: Dict[uuid.UUID, List[Tuple[float, float]]] = {}
+        for record in records:
+            if not _usable(record):
+                continue
+            grouped = projects_by_type if record.source == PROJECT_SOURCE else by_type
+            grouped.setdefault(record.property_type, []).append(record)
+            if record.area_id is not None:
+                locations.setdefault(record.area_id, []).append(
+                    (record.latitude, record.longitude)
+                )
+        self.sets: Dict[str, ComparableSet] = {
+            property_type: ComparableSet(property_type, type_records)
+            for property_type, type_records in sorted(by_type.items())
+        }
+        self.projects: Dict[str, ComparableSet] = {
+            property_type: ComparableSet(property_type, type_records, location_only=True)
+            for property_type, type_records in sorted(projects_by_type.items())
+        }
+        # Where a request gives no coordinates, it is placed at the centre of
+        # its area's recorded sales and projects.
+        self.centroids: Dict[uuid.UUID, Tuple[float, float]] = {
+            area_id: tuple(np.mean(points, axis=0).tolist())
+            for area_id, points in locations.items()
+        }
+        self.loaded_at = loaded_at
+        digest = hashlib.sha256()
+        for comparable_set in chain(self.sets.values(), self.projects.values()):
+            digest.update(comparable_set.property_type.encode())
+            digest.update(str(comparable_set.location_only).encode())
+            digest.update(comparable_set.features.tobytes())
+            digest.update(comparable_set.unit_prices.tobytes())
+            digest.update(comparable_set.sold_ordinals.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self) -> int:
+        return sum(
+            len(comparable_set)
+            for comparable_set in chain(self.sets.values(), self.projects.values())
+        )
+
+    def location(
+        self,
+        area_id: uuid.UUID,
+        latitude: Optional[float],
+        longitude: Optional[float],
+    ) -> Optional[Tuple[float, float]]:
+        if latitude is not None and longitude is not None:
+            return latitude, longitude
+        return self.centroids.get(area_id)
+
+    def estimate(
+        self,
+        property_type: str,
+        features: List[float],
+        valuation_date: date,
+        prices: PriceHistory,
+        k: int = DEFAULT_NEIGHBOURS,
+        as_of: bool = False,
+    ) -> Optional[CompsEstimate]:
+        """Weighted-median unit price of the nearest comparables.
+
+        Each comparable is moved to ``valuation_date`` by its area's price
+        history and weighted by closeness and recency. Confidence falls with
+        the spread of their prices, their distance and a short count. Returns
+        None when fewer than ``MIN_COMPARABLES`` are close enough.
+        """
+        sold_by = valuation_date if as_of else None
+        records: List[ComparableRecord] = []
+        distance_parts = []
+        unit_price_parts = []
+        location_parts = []
+        for comparable_set in (self.sets.get(property_type), self.projects.get(property_type)):
+            if comparable_set is None:
+                continue
+            set_distances, positions = comparable_set.nearest(features, k, sold_by)
+            records.extend(comparable_set.records[position] for position in positions.tolist())
+            distance_parts.append(set_distances)
+            unit_price_parts.append(comparable_set.unit_prices[positions])
+            location_parts.append(comparable_set.features[positions, :2])
+        if len(records) < MIN_COMPARABLES:
+            return None
+
+        # Sales and projects compete on distance for the k places.
+        order = np.argsort(np.concatenate(distance_parts), kind="stable")[:k]
+        distances = np.concatenate(distance_parts)[order]
+        unit_prices = np.concatenate(unit_price_parts)[order]
+        locations = np.concatenate(location_parts)[order]
+        records = [records[position] for position in order.tolist()]
+
+        field = PRICE_INDEX_FIELDS[property_type]
+        adjusted = unit_prices * np.array(
+            [_price_index_ratio(prices, record, valuation_date, field) for record in records]
+        )
+        # A project's price is current, so it counts as sold on the valuation date.
+        ages = np.array(
+            [
+                0
+                if record.sold_on is None
+                else max(valuation_date.toordinal() - record.sold_on.toordinal(), 0)
+                for record in records
+            ]
+        ) / 365.25
+        weights = 0.5 ** (ages / RECENCY_HALF_LIFE_YEARS) / (1.0 + distances)
+        weights /= weights.sum()
+
+        low, unit_price, high = _weighted_quantiles(
+            adjusted, weights, (LOW_QUANTILE, 0.5, HIGH_QUANTILE)
+        )
+        mean = float(weights @ adjusted)
+        spread = math.sqrt(float(weights @ (adjusted - mean) ** 2)) / mean
+        closeness = 1.0 / (1.0 + float(weights @ distances) / 5.0)
+        coverage = math.sqrt(min(1.0, len(records) / k))
+        confidence = round(min(0.95, 0.95 * math.exp(-1.5 * spread) * closeness * coverage), 2)
+
+        offsets = locations - np.asarray(features[:2])
+        distances_km = np.hypot(offsets[:, 0], offsets[:, 1])
+        matches = [
+            ComparableMatch(
+                id=record.id,
+                sold_on=record.sold_on,
+                price=record.price,
+                adjusted_unit_price=unit,
+                distance_km=round(distance_km, 3),
+                weight=round(weight, 4),
+                source=record.source,
+            )
+            for record, unit, distance_km, weight in zip(
+                records, adjusted.tolist(), distances_km.tolist(), weights.tolist()
+            )
+        ]
+        return CompsEstimate(
+            unit_price=unit_price,
+            low_unit_price=low,
+            high_unit_price=high,
+            confidence=confidence,
+            comparables=matches,
+        )
+
+
+def _price_index_ratio(
+    prices: PriceHistory,
+    record: ComparableRecord,
+    valuation_date: date,
+    field: str,
+) -> float:
+    if record.area_id is None:
+        return 1.0
+    # Project prices move in step with their area's price, as in the area model.
+    then = prices.price_as_of(record.area_id, record.sold_on or date.today())
+    now = prices.price_as_of(record.area_id, valuation_date)
+    if then is None or now is None or not getattr(then, field):
+        return 1.0
+    return getattr(now, field) / getattr(then, field)
+
+
+def load_comparables(session: Session) -> ComparablesIndex:
+    records = [
+        ComparableRecord(
+            id=sale_id,
+            property_type=property_type,
+            area_id=area_id,
+            latitude=float(latitude),
+            longitude=float(longitude),
+            size_sqm=None if size_sqm is None else float(size_sqm),
+            land_size_acres=None if land_size_acres is None else float(land_size_acres),
+            year_built=year_built,
+            price=float(price),
+            sold_on=sold_on,
+        )
+        for (
+            sale_id,
+            property_type,
+            area_id,
+            latitude,
+            longitude,
+            size_sqm,
+            land_size_acres,
+            year_built,
+            price,
+            sold_on,
+        ) in session.query(
+            ComparableSale.id,
+            ComparableSale.property_type,
+            ComparableSale.area_id,
+            ComparableSale.latitude,
+            ComparableSale.longitude,
+            ComparableSale.size_sqm,
+            ComparableSale.land_size_acres,
+            ComparableSale.year_built,
+            ComparableSale.price,
+            ComparableSale.sold_on,
+        )
+    ]
+    records.extend(load_project_comparables(session))
+    return ComparablesIndex(records, loaded_at=time.time())
+
+
+def load_project_comparables(session: Session) -> List[ComparableRecord]:
+    # Projects name their area as free text, as in the reference snapshot.
+    area_ids = dict(session.query(Area.name_key, Area.id))
+    records = []
+    for project_id, area_name, price, latitude, longitude in session.query(
+        ApartmentProject.id,
+        ApartmentProject.area,
+        ApartmentProject.average_price_per_sqm,
+        ApartmentProject.latitude,
+        ApartmentProject.longitude,
+    ).filter(ApartmentProject.latitude.isnot(None), ApartmentProject.longitude.isnot(None)):
+        records.append(
+            ComparableRecord(
+                id=project_id,
+                property_type="apartment",
+                area_id=area_ids.get(normalize_area_name(area_name)),
+                latitude=float(latitude),
+                longitude=float(longitude),
+                size_sqm=None,
+                land_size_acres=None,
+                year_built=None,
+                price=float(price),
+                sold_on=None,
+                source=PROJECT_SOURCE,
+            )
+        )
+    return records
+
+
+class ComparablesCache:
+    """Process-wide comparables index.
+
+    Loaded at startup. After an invalidation the old index keeps serving
+    while a background thread builds the new one, so requests never wait on
+    a reload of hundreds of thousands of rows.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]) -> None:
+        self.session_factory = session_factory
+        self._index: Optional[ComparablesIndex] = None
+        self._stale = False
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    @property
+    def index(self) -> Optional[ComparablesIndex]:
+        return self._index
+
+    def load(self, session: Session) -> ComparablesIndex:
+        self._stale = False
+        started = time.perf_counter()
+        index = load_comparables(session)
+        self.loads += 1
+        self._index = index
+        logger.info("Loaded %s comparables in %.2fs", len(index), time.perf_counter() - started)
+        return index
+
+    def get(self) -> ComparablesIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load_with_new_session()
+                return self._index
+        if self._stale:
+            self._refresh_in_background()
+        return index
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _load_with_new_session(self) -> None:
+        session = self.session_factory()
+        try:
+            self.load(session)
+        finally:
+            session.close()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh() -> None:
+            try:
+                self._load_with_new_session()
+            except Exception:
+                logger.exception("Could not reload comparables")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="comparables-refresh", daemon=True).start()
+
+
+comparables_cache = ComparablesCache(SessionLocal)
+
+
+def _on_invalidation(message: str) -> None:
+    if message == COMPARABLES_KEY:
+        comparables_cache.invalidate()
+
+
+_subscribed = False
+
+
+def subscribe_to_comparable_invalidations() -> None:
+    global _subscribed
+    if not _subscribed:
+        cache_backend.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+        _subscribed = True
+
+
+def mark_comparables_changed(session: Session) -> None:
+    # For writes the ORM cannot see, such as Core bulk inserts.
+    session.info["comparables_changed"] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _track_comparable_changes(session: Session, flush_context, instances) -> None:
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(instance, (ComparableSale, ApartmentProject)) for instance in changed):
+        mark_comparables_changed(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_comparable_changes(session: Session) -> None:
+    if session.info.pop("comparables_changed", False):
+        comparables_cache.invalidate()
+        cache_backend.publish(INVALIDATION_CHANNEL, COMPARABLES_KEY)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_comparable_changes(session: Session) -> None:
+    session.info.pop("comparables_changed", None)
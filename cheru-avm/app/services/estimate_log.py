@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError, OperationalError, SQLAlchemyError
+
+from app.database import engine
+from app.models import EstimateLog
+from app.services.readiness import Readiness, readiness
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY_SECONDS = 0.5
+MAX_RETRY_DELAY_SECONDS = 30.0
+# Response fields that are the same on every row and not worth storing.
+RESPONSE_EXCLUDE = {"disclaimer"}
+BACKLOG_REASON = "estimate log backlog"
+# Once full, the worker reports ready again when the queue is down to this share.
+RESUME_FRACTION = 0.5
+
+
+class EstimateLogFull(RuntimeError):
+    """The audit log cannot take more entries; the estimates must not be served."""
+
+
+class _Entry(NamedTuple):
+    served_at: datetime
+    endpoint: str
+    # (request, response) pairs; a batch request queues its items in entries
+    # of at most batch_size.
+    items: Sequence[Tuple[BaseModel, BaseModel]]
+
+
+class EstimateLogWriter:
+    """Write-behind queue for the estimate audit log.
+
+    ``record`` appends to an in-memory queue and returns; a worker thread
+    writes queued rows in multi-row inserts once ``batch_size`` are
+    waiting or every ``flush_seconds``. Requests and responses are
+    serialized on the worker, not the request thread. The queue holds at
+    most ``max_queue`` rows. ``record`` never waits: when a request's
+    estimates do not fit it raises ``EstimateLogFull`` (served as 503) and
+    marks the instance not ready until the queue is half drained, so a
+    stalled database sheds traffic instead of serving unlogged estimates.
+    """
+
+    def __init__(
+        self,
+        bind: Engine,
+        batch_size: int,
+        flush_seconds: float,
+        max_queue: int,
+        enabled: bool = True,
+        status: Optional[Readiness] = None,
+    ) -> None:
+        self.bind = bind
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.enabled = enabled
+        self.status = status
+        self._queue: Deque[_Entry] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._size = 0
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.refused = 0
+        self.failed_writes = 0
+        self._backlogged = False
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run,
+                name="estimate-log-writer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def record(self, endpoint: str, request: BaseModel, response: BaseModel) -> None:
+        """Queue one served estimate; raises ``EstimateLogFull`` if there is no room."""
+        self.record_many(endpoint, [(request, response)])
+
+    def record_many(
+        self,
+        endpoint: str,
+        items: Sequence[Tuple[BaseModel, BaseModel]],
+    ) -> None:
+        """Queue a request's estimates together: all of them, or none and ``EstimateLogFull``."""
+        if not self.enabled or not items:
+            return
+        count = len(items)
+        served_at = datetime.now(timezone.utc)
+        with self._condition:
+            if self._size + count > self.max_queue:
+                self.refused += count
+                self._backlogged = True
+                if self.status is not None:
+                    self.status.mark_not_ready(BACKLOG_REASON)
+                logger.warning(
+                    "Estimate log queue full (%s queued); refused %s estimates",
+                    self._size,
+                    count,
+                )
+                raise EstimateLogFull("Estimate log is full; retry shortly")
+            for start in range(0, count, self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                self._queue.append(_Entry(served_at, endpoint, chunk))
+            self._size += count
+            self.enqueued += count
+            if self._size >= self.batch_size:
+                self._condition.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Write everything queued, then stop the worker."""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(
+                "Estimate log drain timed out with %s entries unwritten", len(self._queue)
+            )
+        else:
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._size < self.batch_size and not self._stopping:
+                    self._condition.wait(self.flush_seconds)
+                batch: List[_Entry] = []
+                taken = 0
+                while self._queue and taken < self.batch_size:
+                    entry = self._queue.popleft()
+                    batch.append(entry)
+                    taken += len(entry.items)
+                self._size -= taken
+                if self._backlogged and self._size <= self.max_queue * RESUME_FRACTION:
+                    self._backlogged = False
+                    if self.status is not None:
+                        self.status.clear(BACKLOG_REASON)
+                if not batch and self._stopping:
+                    return
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[_Entry]) -> None:
+        rows = []
+        for entry in batch:
+            for request, response in entry.items:
+                try:
+                    rows.append(_row(entry, request, response))
+                except Exception:
+                    self.dropped += 1
+                    logger.exception("Could not serialize an estimate log entry")
+        # Entries are at most batch_size each, so one pass can take just under two batches.
+        for start in range(0, len(rows), self.batch_size):
+            self._insert(rows[start:start + self.batch_size])
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        table = EstimateLog.__table__
+        delay = RETRY_DELAY_SECONDS
+        while True:
+            try:
+                with self.bind.begin() as connection:
+                    connection.execute(table.insert(), rows)
+            except (OperationalError, DisconnectionError):
+                # The database is unreachable: keep the batch and retry;
+                # meanwhile the queue fills and requests are refused
+                # rather than held in unbounded memory.
+                self.failed_writes += 1
+                logger.exception(
+                    "Could not write %s estimate log entries; retrying in %.1fs",
+                    len(rows),
+                    delay,
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+            except SQLAlchemyError:
+                # Retrying a batch the database rejects would block the log for good.
+                self.failed_writes += 1
+                self.dropped += len(rows)
+                logger.exception("Dropped %s estimate log entries the database rejected", len(rows))
+                return
+            else:
+                self.written += len(rows)
+                return
+
+
+def _row(entry: _Entry, request: BaseModel, response: BaseModel) -> Dict[str, Any]:
+    dumped = response.model_dump(mode="json", exclude=RESPONSE_EXCLUDE)
+    return {
+        "id": uuid.uuid4(),
+        "served_at": entry.served_at,
+        "endpoint": entry.endpoint,
+        "property_type": dumped["property_type"],
+        "area": dumped.get("area"),
+        "valuation_method": dumped.get("valuation_method", "area"),
+        "estimated_value": dumped.get("estimated_value"),
+        "request": request.model_dump(mode="json"),
+        "response": dumped,
+    }
+
+
+settings = get_settings()
+estimate_log = EstimateLogWriter(
+    engine,
+    batch_size=settings.estimate_log_batch_size,
+    flush_seconds=settings.estimate_log_flush_seconds,
+    max_queue=settings.estimate_log_max_queue,
+    enabled=settings.estimate_log_enabled,
+    status=readiness,
+)
@@ -0,0 +1,134 @@
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_LEAF_SIZE = 64
+
+
+class KDTree:
+    """Static k-d tree over an ``(n, d)`` array for k-nearest-neighbour queries.
+
+    Points are reordered so every node covers a contiguous slice, and each
+    node keeps its bounding box; queries visit nodes nearest-box-first and
+    stop once no box can hold anything closer than the current k-th point.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = DEFAULT_LEAF_SIZE) -> None:
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        if points.ndim != 2:
+            raise ValueError("points must be a 2-d array")
+        self.leaf_size = max(1, leaf_size)
+        self.size, self.dimensions = points.shape
+        order = np.arange(self.size)
+
+        starts: List[int] = []
+        ends: List[int] = []
+        children: List[List[int]] = []
+        if self.size:
+            pending = [(0, self.size, -1, 0)]
+            while pending:
+                start, end, parent, side = pending.pop()
+                node = len(starts)
+                starts.append(start)
+                ends.append(end)
+                children.append([-1, -1])
+                if parent >= 0:
+                    children[parent][side] = node
+                if end - start <= self.leaf_size:
+                    continue
+                block = points[order[start:end]]
+                axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+                middle = (end - start) // 2
+                part = np.argpartition(block[:, axis], middle)
+                order[start:end] = order[start:end][part]
+                pending.append((start + middle, end, node, 1))
+                pending.append((start, start + middle, node, 0))
+
+        self.indices = order
+        self.points = points[order]
+        # Python ints and tuples: cheaper per visit than numpy scalars and
+        # tiny arrays at the handful of dimensions the tree is used with.
+        self._starts = starts
+        self._ends = ends
+        self._children = [tuple(pair) for pair in children]
+        self._boxes = [
+            tuple(
+                zip(
+                    self.points[start:end].min(axis=0).tolist(),
+                    self.points[start:end].max(axis=0).tolist(),
+                )
+            )
+            for start, end in zip(starts, ends)
+        ]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _box_distance(self, node: int, point: List[float]) -> float:
+        total = 0.0
+        for value, (low, high) in zip(point, self._boxes[node]):
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return total
+
+    def query(
+        self,
+        point: np.ndarray,
+        k: int,
+        max_distance: float = np.inf,
+        allowed: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances and original row indices of the ``k`` nearest points, nearest first.
+
+        Only points within ``max_distance`` and, when given, with ``allowed``
+        set (a boolean per original row) are returned. Both are applied
+        during the search, so fewer than ``k`` results means no other point
+        qualifies.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        k = min(k, self.size)
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+
+        coordinates = point.tolist()
+        limit = max_distance**2
+        best_distances = np.full(k, np.inf)
+        best_positions = np.full(k, -1, dtype=np.intp)
+        bound = limit
+        frontier = [(0.0, 0)]
+        while frontier:
+            box_distance, node = heapq.heappop(frontier)
+            if box_distance > bound:
+                break
+            left, right = self._children[node]
+            if left < 0:
+                start, end = self._starts[node], self._ends[node]
+                delta = self.points[start:end] - point
+                distances = np.einsum("ij,ij->i", delta, delta)
+                distances[distances > limit] = np.inf
+                if allowed is not None:
+                    distances[~allowed[self.indices[start:end]]] = np.inf
+                if not (distances <= bound).any():
+                    continue
+                merged = np.concatenate((best_distances, distances))
+                positions = np.concatenate(
+                    (best_positions, np.arange(start, start + len(distances)))
+                )
+                keep = np.argpartition(merged, k - 1)[:k]
+                best_distances = merged[keep]
+                best_positions = positions[keep]
+                bound = min(limit, float(best_distances.max()))
+                continue
+            for child in (left, right):
+                child_distance = self._box_distance(child, coordinates)
+                if child_distance <= bound:
+                    heapq.heappush(frontier, (child_distance, child))
+
+        found = np.isfinite(best_distances)
+        best_distances = best_distances[found]
+        best_positions = best_positions[found]
+        ranked = np.argsort(best_distances, kind="stable")
+        return np.sqrt(best_distances[ranked]), self.indices[best_positions[ranked]]
@@ -0,0 +1,264 @@
+import hashlib
+import logging
+import uuid
+from collections import Counter
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    func,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.models import Amenity, ApartmentProject, Area, AreaPrice
+from app.services.price_history import PRICE_FIELDS
+from app.utils.names import normalize_amenity_name, normalize_area_name, normalize_project_name
+
+logger = logging.getLogger(__name__)
+
+# Older versions backdated an area's first recorded prices to this date.
+LEGACY_HISTORY_START = date(1970, 1, 1)
+
+# (model, normaliser, columns that must be unique together with name_key)
+NAME_KEY_TABLES: Tuple[Tuple[type, Callable[[str], str], Tuple[str, ...]], ...] = (
+    (Area, normalize_area_name, ()),
+    (Amenity, normalize_amenity_name, ("property_type",)),
+    (ApartmentProject, normalize_project_name, ("area",)),
+)
+# Columns added after their table was first created, so older databases lack them.
+ADDED_COLUMNS: Tuple[Tuple[type, Tuple[str, ...]], ...] = (
+    (Area, ("name_key",)),
+    (Amenity, ("name_key",)),
+    (ApartmentProject, ("name_key", "latitude", "longitude")),
+)
+
+
+# Fingerprint of the models the schema was last brought up to date with.
+# Kept out of Base.metadata so create_all never creates it before the DDL ran.
+schema_version = Table(
+    "avm_schema_version",
+    MetaData(),
+    Column("fingerprint", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def schema_fingerprint(metadata: MetaData) -> str:
+    """Hash of every table, column and index the models define."""
+    digest = hashlib.sha256()
+    for table in sorted(metadata.tables.values(), key=lambda table: table.name):
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            columns = ",".join(column.name for column in index.columns)
+            digest.update(f"|{index.name}:{columns}:{index.unique}".encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def schema_is_current(bind: Engine, fingerprint: str) -> bool:
+    try:
+        with bind.connect() as connection:
+            recorded = connection.execute(select(schema_version.c.fingerprint)).scalars().all()
+    except DBAPIError:
+        # No version table yet: the schema predates version tracking.
+        return False
+    return recorded == [fingerprint]
+
+
+def record_schema_version(bind: Engine, fingerprint: str) -> None:
+    with bind.begin() as connection:
+        schema_version.create(connection, checkfirst=True)
+        connection.execute(schema_version.delete())
+        connection.execute(
+            schema_version.insert().values(
+                fingerprint=fingerprint,
+                applied_at=datetime.now(timezone.utc),
+            )
+        )
+
+
+def _add_missing_columns(connection: Connection, model: type, names: Tuple[str, ...]) -> None:
+    table = model.__table__
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            logger.info("Adding %s.%s", table.name, name)
+            column_type = table.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+
+def _backfill_name_keys(
+    connection: Connection,
+    model: type,
+    normalize: Callable[[str], str],
+    scope: Tuple[str, ...],
+) -> int:
+    table = model.__table__
+    rows = connection.execute(
+        select(table.c.id, table.c.name, table.c.name_key, *(table.c[name] for name in scope))
+    ).all()
+
+    keys = Counter((*row[3:], normalize(row.name)) for row in rows)
+    duplicates = sorted(key for key, count in keys.items() if count > 1)
+    if duplicates:
+        raise RuntimeError(
+            f"{table.name} has names that collide once normalized: {duplicates}"
+        )
+
+    stale = [
+        {"row_id": row.id, "key": normalize(row.name)}
+        for row in rows
+        if row.name_key != normalize(row.name)
+    ]
+    if stale:
+        connection.execute(
+            table.update()
+            .where(table.c.id == bindparam("row_id"))
+            .values(name_key=bindparam("key")),
+            stale,
+        )
+    return len(stale)
+
+
+def ensure_name_keys(bind: Engine) -> None:
+    """Add, backfill and index ``name_key`` on areas, amenities and projects.
+
+    Idempotent; run at startup and by the seed script. Also adds any other
+    columns missing from older databases, and repairs keys for rows inserted
+    or renamed directly in SQL.
+    """
+    with bind.begin() as connection:
+        for model, names in ADDED_COLUMNS:
+            _add_missing_columns(connection, model, names)
+        for model, normalize, scope in NAME_KEY_TABLES:
+            table = model.__table__
+            updated = _backfill_name_keys(connection, model, normalize, scope)
+            if updated:
+                logger.info("Backfilled name_key for %s %s rows", updated, table.name)
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def _date_legacy_history(connection: Connection, today: date) -> None:
+    # Rows backdated to LEGACY_HISTORY_START move to the day they were
+    # recorded. Where a later import already dated prices before that day,
+    # the backdated row only ever covered dates nobody priced, so it goes.
+    prices = AreaPrice.__table__
+    legacy = connection.execute(
+        select(prices.c.id, prices.c.area_id, prices.c.created_at).where(
+            prices.c.effective_from == LEGACY_HISTORY_START
+        )
+    ).all()
+    if not legacy:
+        return
+    next_starts = dict(
+        connection.execute(
+            select(prices.c.area_id, func.min(prices.c.effective_from))
+            .where(prices.c.effective_from > LEGACY_HISTORY_START)
+            .group_by(prices.c.area_id)
+        ).all()
+    )
+    moves = []
+    deletes = []
+    for row in legacy:
+        recorded_on = row.created_at.date() if row.created_at is not None else today
+        next_start = next_starts.get(row.area_id)
+        if next_start is not None and next_start <= recorded_on:
+            deletes.append(row.id)
+        else:
+            moves.append({"row_id": row.id, "recorded_on": recorded_on})
+    if moves:
+        connection.execute(
+            prices.update()
+            .where(prices.c.id == bindparam("row_id"))
+            .values(effective_from=bindparam("recorded_on")),
+            moves,
+        )
+    if deletes:
+        connection.execute(prices.delete().where(prices.c.id.in_(deletes)))
+    logger.info(
+        "Dated %s backdated area price rows from when they were recorded, dropped %s",
+        len(moves),
+        len(deletes),
+    )
+
+
+def ensure_price_history(bind: Engine, today: Optional[date] = None) -> None:
+    """Keep ``area_prices`` in step with the current prices on ``areas``.
+
+    Areas without history, and areas whose current prices differ from the
+    history in effect today (e.g. edited directly in SQL), get a row
+    effective today: nothing says when those prices started to apply.
+    Idempotent.
+    """
+    today = today or date.today()
+    areas = Area.__table__
+    prices = AreaPrice.__table__
+    with bind.begin() as connection:
+        _date_legacy_history(connection, today)
+        in_effect = {}
+        for row in connection.execute(
+            select(
+                prices.c.area_id,
+                prices.c.effective_from,
+                *(prices.c[field] for field in PRICE_FIELDS),
+            )
+            .where(prices.c.effective_from <= today)
+            .order_by(prices.c.area_id, prices.c.effective_from)
+        ):
+            in_effect[row.area_id] = row
+        dated = set(connection.execute(select(prices.c.area_id).distinct()).scalars())
+
+        inserts = []
+        updates = []
+        for row in connection.execute(
+            select(areas.c.id, *(areas.c[field] for field in PRICE_FIELDS))
+        ):
+            values = {field: row._mapping[field] for field in PRICE_FIELDS}
+            if row.id not in dated:
+                inserts.append({"area_id": row.id, "effective_from": today, **values})
+                continue
+            current = in_effect.get(row.id)
+            if current is not None and all(
+                Decimal(str(current._mapping[field])) == Decimal(str(values[field]))
+                for field in PRICE_FIELDS
+            ):
+                continue
+            if current is not None and current.effective_from == today:
+                updates.append(
+                    {
+                        "row_area_id": row.id,
+                        **{f"new_{field}": values[field] for field in PRICE_FIELDS},
+                    }
+                )
+            else:
+                inserts.append({"area_id": row.id, "effective_from": today, **values})
+
+        if inserts:
+            connection.execute(
+                prices.insert(),
+                [{"id": uuid.uuid4(), **values} for values in inserts],
+            )
+        if updates:
+            connection.execute(
+                prices.update()
+                .where(prices.c.area_id == bindparam("row_area_id"))
+                .where(prices.c.effective_from == today)
+                .values({field: bindparam(f"new_{field}") for field in PRICE_FIELDS}),
+                updates,
+            )
+        if inserts or updates:
+            logger.info("Recorded %s area price history rows", len(inserts) + len(updates))
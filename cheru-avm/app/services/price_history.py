@@ -0,0 +1,62 @@
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+PRICE_FIELDS = ("land_price_per_acre", "apartment_price_per_sqm", "house_price_per_sqm")
+
+
+class AreaPriceRecord(NamedTuple):
+    area_id: uuid.UUID
+    effective_from: date
+    land_price_per_acre: float
+    apartment_price_per_sqm: float
+    house_price_per_sqm: float
+
+
+class PriceHistory:
+    """Interval index over area price history.
+
+    Each area's rows are sorted by ``effective_from``; a row holds from its
+    date until the next row's, so a point-in-time lookup is one bisect.
+    """
+
+    __slots__ = ("_starts", "_records")
+
+    def __init__(self, records: Iterable[AreaPriceRecord] = ()) -> None:
+        by_area: Dict[uuid.UUID, List[AreaPriceRecord]] = defaultdict(list)
+        for record in records:
+            by_area[record.area_id].append(record)
+        self._records: Dict[uuid.UUID, List[AreaPriceRecord]] = {}
+        self._starts: Dict[uuid.UUID, List[int]] = {}
+        for area_id, area_records in by_area.items():
+            area_records.sort(key=lambda record: record.effective_from)
+            self._records[area_id] = area_records
+            self._starts[area_id] = [record.effective_from.toordinal() for record in area_records]
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._records.values())
+
+    def records(self) -> List[AreaPriceRecord]:
+        return [
+            record
+            for area_id in sorted(self._records, key=str)
+            for record in self._records[area_id]
+        ]
+
+    def has_history(self, area_id: uuid.UUID) -> bool:
+        return area_id in self._records
+
+    def starts_on(self, area_id: uuid.UUID) -> Optional[date]:
+        records = self._records.get(area_id)
+        return records[0].effective_from if records else None
+
+    def price_as_of(self, area_id: uuid.UUID, day: date) -> Optional[AreaPriceRecord]:
+        starts = self._starts.get(area_id)
+        if starts is None:
+            return None
+        position = bisect_right(starts, day.toordinal()) - 1
+        if position < 0:
+            return None
+        return self._records[area_id][position]
@@ -0,0 +1,402 @@
+import csv
+import json
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models import Amenity, Area, AreaPrice
+from app.services.price_history import PRICE_FIELDS
+from app.services.reference_data import mark_reference_data_changed
+from app.utils.names import normalize_amenity_name, normalize_area_name
+
+AREA_PRICE_FIELDS = PRICE_FIELDS
+# Short column names used by the seed lists, accepted in files too.
+AREA_FIELD_ALIASES = {
+    "land": "land_price_per_acre",
+    "apartment": "apartment_price_per_sqm",
+    "house": "house_price_per_sqm",
+    "value": "value_percent",
+}
+AMENITY_PROPERTY_TYPES = ("apartment", "house")
+DEFAULT_BATCH_SIZE = 1000
+
+
+class PriceFileError(ValueError):
+    pass
+
+
+class UpsertCounts:
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    @property
+    def changed(self) -> int:
+        return self.inserted + self.updated
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"inserted": self.inserted, "updated": self.updated, "unchanged": self.unchanged}
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.areas = UpsertCounts()
+        self.amenities = UpsertCounts()
+        self.duplicates = 0
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "areas": self.areas.as_dict(),
+            "amenities": self.amenities.as_dict(),
+            "duplicates": self.duplicates,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+def _canonical_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {AREA_FIELD_ALIASES.get(key.strip(), key.strip()): value for key, value in record.items()}
+
+
+def _decimal(value: Any, field: str) -> Decimal:
+    try:
+        number = Decimal(str(value).strip().replace(",", ""))
+    except (InvalidOperation, AttributeError):
+        raise PriceFileError(f"{field}: not a number: {value!r}") from None
+    if not number.is_finite() or number < 0:
+        raise PriceFileError(f"{field}: must be a non-negative number: {value!r}")
+    return number
+
+
+def _name(record: Dict[str, Any]) -> str:
+    name = " ".join(str(record.get("name") or "").split())
+    if not name:
+        raise PriceFileError("name: required")
+    return name
+
+
+def parse_area(record: Dict[str, Any]) -> Dict[str, Any]:
+    record = _canonical_fields(record)
+    name = _name(record)
+    row = {"name": name, "name_key": normalize_area_name(name)}
+    for field in AREA_PRICE_FIELDS:
+        if record.get(field) in (None, ""):
+            raise PriceFileError(f"{field}: required")
+        row[field] = _decimal(record[field], field)
+    return row
+
+
+def parse_amenity(record: Dict[str, Any]) -> Dict[str, Any]:
+    record = _canonical_fields(record)
+    name = _name(record)
+    property_type = str(record.get("property_type") or "").strip().lower()
+    if property_type not in AMENITY_PROPERTY_TYPES:
+        raise PriceFileError(
+            f"property_type: must be one of {', '.join(AMENITY_PROPERTY_TYPES)}"
+        )
+    if record.get("value_percent") in (None, ""):
+        raise PriceFileError("value_percent: required")
+    return {
+        "name": name,
+        "name_key": normalize_amenity_name(name),
+        "property_type": property_type,
+        "value_percent": _decimal(record["value_percent"], "value_percent"),
+    }
+
+
+def _record_kind(record: Dict[str, Any]) -> str:
+    fields = set(_canonical_fields(record))
+    if "property_type" in fields or "value_percent" in fields:
+        return "amenities"
+    return "areas"
+
+
+def read_price_file(path: Path) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read area and amenity rows from a price file.
+
+    JSON files hold ``{"areas": [...], "amenities": [...]}`` (or a flat list);
+    CSV and NDJSON files may mix both kinds, told apart by their columns.
+    Every error is collected before raising, with its row number.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        data = json.loads(path.read_text())
+        if isinstance(data, dict):
+            records = [("areas", row) for row in data.get("areas", [])]
+            records += [("amenities", row) for row in data.get("amenities", [])]
+        else:
+            records = [(_record_kind(row), row) for row in data]
+    elif suffix in (".ndjson", ".jsonl"):
+        with path.open() as handle:
+            rows = [json.loads(line) for line in handle if line.strip()]
+        records = [(_record_kind(row), row) for row in rows]
+    elif suffix == ".csv":
+        with path.open(newline="") as handle:
+            records = [(_record_kind(row), row) for row in csv.DictReader(handle)]
+    else:
+        raise PriceFileError(f"{path}: unsupported file type {suffix or '(none)'}")
+
+    areas: List[Dict[str, Any]] = []
+    amenities: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    for number, (kind, record) in enumerate(records, start=1):
+        try:
+            if kind == "areas":
+                areas.append(parse_area(record))
+            else:
+                amenities.append(parse_amenity(record))
+        except PriceFileError as exc:
+            errors.append(f"{path.name} row {number}: {exc}")
+    if errors:
+        shown = "\n".join(errors[:20])
+        more = f"\n... and {len(errors) - 20} more" if len(errors) > 20 else ""
+        raise PriceFileError(f"{len(errors)} invalid row(s):\n{shown}{more}")
+    return areas, amenities
+
+
+def _batches(rows: Sequence[Dict[str, Any]], size: int) -> Iterator[Sequence[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _dedupe(rows: Iterable[Dict[str, Any]], key_fields: Tuple[str, ...]) -> Tuple[List, int]:
+    # The last row for a key wins, as if the rows were applied one by one.
+    unique: Dict[Tuple, Dict[str, Any]] = {}
+    total = 0
+    for row in rows:
+        total += 1
+        unique[tuple(row[field] for field in key_fields)] = row
+    return list(unique.values()), total - len(unique)
+
+
+def _insert(session: Session, model: type):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise PriceFileError(f"Bulk upsert is not supported on {dialect}")
+    return insert(model.__table__)
+
+
+def _upsert(
+    session: Session,
+    model: type,
+    rows: Sequence[Dict[str, Any]],
+    key_fields: Tuple[str, ...],
+    value_fields: Tuple[str, ...],
+    batch_size: int,
+    counts: UpsertCounts,
+) -> None:
+    table = model.__table__
+    key_columns = [table.c[field] for field in key_fields]
+    compared = ("name",) + value_fields
+    for batch in _batches(rows, batch_size):
+        keys = [tuple(row[field] for field in key_fields) for row in batch]
+        lookup = key_columns[0].in_([key[0] for key in keys])
+        if len(key_columns) > 1:
+            lookup = tuple_(*key_columns).in_(keys)
+        existing = {
+            tuple(found[: len(key_fields)]): found[len(key_fields) :]
+            for found in session.execute(
+                select(*key_columns, *(table.c[field] for field in compared)).where(lookup)
+            )
+        }
+
+        pending = []
+        for key, row in zip(keys, batch):
+            current = existing.get(key)
+            if current is None:
+                counts.inserted += 1
+            elif _same_values(current, row, compared):
+                counts.unchanged += 1
+                continue
+            else:
+                counts.updated += 1
+            pending.append(row)
+
+        if pending:
+            statement = _insert(session, model)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(key_fields),
+                set_={field: statement.excluded[field] for field in compared},
+            )
+            session.execute(statement, pending)
+
+
+def _upsert_areas(
+    session: Session,
+    rows: Sequence[Dict[str, Any]],
+    effective_from: date,
+    batch_size: int,
+    counts: UpsertCounts,
+) -> None:
+    # Prices are recorded in area_prices effective from ``effective_from``
+    # and compared with the prices in effect on that date. The current
+    # columns on areas only move when no later history row exists.
+    today = date.today()
+    areas = Area.__table__
+    prices = AreaPrice.__table__
+    for batch in _batches(rows, batch_size):
+        existing = {
+            found.name_key: found
+            for found in session.execute(
+                select(
+                    areas.c.id,
+                    areas.c.name_key,
+                    areas.c.name,
+                    *(areas.c[field] for field in PRICE_FIELDS),
+                ).where(areas.c.name_key.in_([row["name_key"] for row in batch]))
+            )
+        }
+        history: Dict[uuid.UUID, List[Any]] = {}
+        if existing:
+            for found in session.execute(
+                select(
+                    prices.c.area_id,
+                    prices.c.effective_from,
+                    *(prices.c[field] for field in PRICE_FIELDS),
+                )
+                .where(prices.c.area_id.in_([area.id for area in existing.values()]))
+                .order_by(prices.c.effective_from)
+            ):
+                history.setdefault(found.area_id, []).append(found)
+
+        new_areas = []
+        current_updates = []
+        renames = []
+        history_rows = []
+        for row in batch:
+            values = {field: row[field] for field in PRICE_FIELDS}
+            area = existing.get(row["name_key"])
+            if area is None:
+                counts.inserted += 1
+                area_id = uuid.uuid4()
+                new_areas.append({"id": area_id, **row})
+                history_rows.append(
+                    {"area_id": area_id, "effective_from": effective_from, **values}
+                )
+                continue
+
+            area_history = history.get(area.id, [])
+            if area_history:
+                earlier = [
+                    found for found in area_history if found.effective_from <= effective_from
+                ]
+                in_effect = earlier[-1]._mapping if earlier else None
+                later = len(earlier) < len(area_history)
+            else:
+                # The current prices are only known from today, so they are
+                # recorded from today; a backdated import has nothing to
+                # compare with and fills in the dates before.
+                current = {field: area._mapping[field] for field in PRICE_FIELDS}
+                history_rows.append({"area_id": area.id, "effective_from": today, **current})
+                later = effective_from < today
+                in_effect = None if later else current
+
+            same_prices = in_effect is not None and _same_values(
+                [in_effect[field] for field in PRICE_FIELDS], row, PRICE_FIELDS
+            )
+            if same_prices and area.name == row["name"]:
+                counts.unchanged += 1
+                continue
+            counts.updated += 1
+            if not same_prices:
+                history_rows.append(
+                    {"area_id": area.id, "effective_from": effective_from, **values}
+                )
+            if later:
+                if area.name != row["name"]:
+                    renames.append({"row_id": area.id, "new_name": row["name"]})
+            else:
+                current_updates.append(
+                    {
+                        "row_id": area.id,
+                        "new_name": row["name"],
+                        **{f"new_{field}": row[field] for field in PRICE_FIELDS},
+                    }
+                )
+
+        if new_areas:
+            session.execute(areas.insert(), new_areas)
+        if current_updates:
+            session.execute(
+                areas.update()
+                .where(areas.c.id == bindparam("row_id"))
+                .values(
+                    name=bindparam("new_name"),
+                    **{field: bindparam(f"new_{field}") for field in PRICE_FIELDS},
+                ),
+                current_updates,
+            )
+        if renames:
+            session.execute(
+                areas.update()
+                .where(areas.c.id == bindparam("row_id"))
+                .values(name=bindparam("new_name")),
+                renames,
+            )
+        if history_rows:
+            # An import effective today replaces the baseline recorded above.
+            unique = {(row["area_id"], row["effective_from"]): row for row in history_rows}
+            statement = _insert(session, AreaPrice)
+            statement = statement.on_conflict_do_update(
+                index_elements=["area_id", "effective_from"],
+                set_={field: statement.excluded[field] for field in PRICE_FIELDS},
+            )
+            session.execute(statement, [{"id": uuid.uuid4(), **row} for row in unique.values()])
+
+
+def _same_values(current: Sequence[Any], row: Dict[str, Any], fields: Sequence[str]) -> bool:
+    for value, field in zip(current, fields):
+        if field == "name":
+            if value != row[field]:
+                return False
+        elif value is None or Decimal(str(value)) != row[field]:
+            return False
+    return True
+
+
+def import_prices(
+    session: Session,
+    areas: Sequence[Dict[str, Any]],
+    amenities: Sequence[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    effective_from: Optional[date] = None,
+) -> ImportReport:
+    """Upsert parsed area and amenity rows in set-based batches.
+
+    Rows are matched on ``name_key`` (areas) and ``(property_type, name_key)``
+    (amenities). Area prices take effect from ``effective_from`` (default
+    today), which may be in the past to backfill history. The caller owns the
+    transaction: nothing is committed here, so a whole file applies or none
+    of it does.
+    """
+    effective_from = effective_from or date.today()
+    if effective_from > date.today():
+        raise PriceFileError("effective date cannot be in the future")
+    report = ImportReport()
+    areas, area_duplicates = _dedupe(areas, ("name_key",))
+    amenities, amenity_duplicates = _dedupe(amenities, ("property_type", "name_key"))
+    report.duplicates = area_duplicates + amenity_duplicates
+
+    _upsert_areas(session, areas, effective_from, batch_size, report.areas)
+    _upsert(
+        session,
+        Amenity,
+        amenities,
+        ("property_type", "name_key"),
+        ("value_percent",),
+        batch_size,
+        report.amenities,
+    )
+    if report.areas.changed or report.amenities.changed:
+        mark_reference_data_changed(session)
+    return report
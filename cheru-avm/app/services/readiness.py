@@ -0,0 +1,35 @@
+import threading
+from typing import Optional
+
+
+class Readiness:
+    """In-memory readiness flag, flipped once startup work has finished.
+
+    Checking it is a plain attribute read, so it is safe to consult on every
+    request and from the readiness probe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.ready = False
+        self.reason: Optional[str] = "starting"
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+            self.reason = None
+
+    def mark_not_ready(self, reason: str) -> None:
+        with self._lock:
+            self.ready = False
+            self.reason = reason
+
+    def clear(self, reason: str) -> None:
+        """Ready again, unless something else has marked it not ready since ``reason``."""
+        with self._lock:
+            if self.reason == reason:
+                self.ready = True
+                self.reason = None
+
+
+readiness = Readiness()
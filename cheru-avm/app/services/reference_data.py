@@ -0,0 +1,622 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import ReadSessionLocal, get_async_db, get_read_db, replica_router, run_read
+from app.models import Amenity, ApartmentProject, Area, AreaPrice
+from app.services.area_resolver import AreaMatch, AreaResolver
+from app.services.cache_backend import (
+    INVALIDATION_CHANNEL,
+    REFERENCE_SNAPSHOT_KEY,
+    CacheBackend,
+    cache_backend,
+)
+from app.services.price_history import PRICE_FIELDS, AreaPriceRecord, PriceHistory
+from app.services.readiness import readiness
+from app.services.valuation import active_coefficients
+from app.utils.config import get_settings
+from app.utils.names import (  # noqa: F401  (re-exported)
+    AMENITY_ALIASES,
+    normalize_amenity_name,
+    normalize_amenity_names,
+    normalize_area_name,
+    normalize_project_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AreaRecord(NamedTuple):
+    id: uuid.UUID
+    name: str
+    land_price_per_acre: float
+    apartment_price_per_sqm: float
+    house_price_per_sqm: float
+
+
+class AmenityRecord(NamedTuple):
+    id: uuid.UUID
+    name: str
+    property_type: str
+    value_percent: float
+
+
+class ProjectRecord(NamedTuple):
+    id: uuid.UUID
+    name: str
+    area_id: uuid.UUID
+    average_price_per_sqm: float
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class ReferenceSnapshot:
+    """Immutable, fully in-memory view of the areas and amenities tables.
+
+    ``prices`` holds the area price history; ``as_of`` derives the snapshot
+    in effect on a past date from it without touching the database.
+    ``projects`` holds named apartment developments, keyed by area id and
+    normalized project name.
+    """
+
+    __slots__ = (
+        "areas",
+        "amenities",
+        "projects",
+        "prices",
+        "version",
+        "fingerprint",
+        "loaded_at",
+        "effective_date",
+        "_area_resolver",
+        "_base",
+        "_as_of",
+        "_as_of_lock",
+    )
+
+    def __init__(
+        self,
+        areas: Iterable[AreaRecord],
+        amenities: Iterable[AmenityRecord],
+        version: int,
+        loaded_at: float,
+        prices: Iterable[AreaPriceRecord] = (),
+        projects: Iterable[ProjectRecord] = (),
+    ) -> None:
+        area_index = {normalize_area_name(area.name): area for area in areas}
+        # Amenities are kept per property type in name order so every caller
+        # (single, batch, bulk) sums amenity contributions in the same order.
+        amenity_index = {}
+        keyed = sorted(
+            ((amenity.property_type, normalize_amenity_name(amenity.name)), amenity)
+            for amenity in amenities
+        )
+        for key, amenity in keyed:
+            amenity_index[key] = amenity
+        self.areas: Mapping[str, AreaRecord] = MappingProxyType(area_index)
+        self.amenities: Mapping[Tuple[str, str], AmenityRecord] = MappingProxyType(
+            amenity_index
+        )
+        project_index = dict(
+            sorted(
+                ((project.area_id, normalize_project_name(project.name)), project)
+                for project in projects
+            )
+        )
+        self.projects: Mapping[Tuple[uuid.UUID, str], ProjectRecord] = MappingProxyType(
+            project_index
+        )
+        self.prices = prices if isinstance(prices, PriceHistory) else PriceHistory(prices)
+        self.version = version
+        self.fingerprint = _fingerprint(
+            area_index.values(),
+            amenity_index.values(),
+            self.prices.records(),
+            project_index.values(),
+        )
+        self.loaded_at = loaded_at
+        self.effective_date: Optional[date] = None
+        self._area_resolver: Optional[AreaResolver] = None
+        self._base: Optional[ReferenceSnapshot] = None
+        self._as_of: Dict[date, ReferenceSnapshot] = {}
+        self._as_of_lock = threading.Lock()
+
+    def __reduce__(self):
+        if self._base is not None:
+            return (_snapshot_as_of, (self._base, self.effective_date))
+        # Mapping proxies do not pickle; rebuild from the records instead.
+        return (
+            ReferenceSnapshot,
+            (
+                tuple(self.areas.values()),
+                tuple(self.amenities.values()),
+                self.version,
+                self.loaded_at,
+                tuple(self.prices.records()),
+                tuple(self.projects.values()),
+            ),
+        )
+
+    def area(self, name: str) -> Optional[AreaRecord]:
+        return self.areas.get(normalize_area_name(name))
+
+    def project(self, area: AreaRecord, name: Optional[str]) -> Optional[ProjectRecord]:
+        if not name:
+            return None
+        return self.projects.get((area.id, normalize_project_name(name)))
+
+    @property
+    def area_resolver(self) -> AreaResolver:
+        # Built on first use; a concurrent first use just builds it twice.
+        resolver = self._area_resolver
+        if resolver is None:
+            resolver = AreaResolver(self.areas.values())
+            self._area_resolver = resolver
+        return resolver
+
+    def resolve_area(self, name: str) -> AreaMatch:
+        area = self.area(name)
+        if area is not None:
+            return AreaMatch(area, "exact", [])
+        if self._base is not None:
+            # Resolve against every known area, then swap in this date's prices.
+            match = self._base.resolve_area(name)
+            if match.area is None:
+                return match
+            priced = self.area(match.area.name)
+            if priced is None:
+                detail = (
+                    f"No prices recorded for {match.area.name} as of {self.effective_date}; "
+                    f"its price history starts on {self.prices.starts_on(match.area.id)}"
+                )
+                return AreaMatch(None, "unpriced", [], detail)
+            return match._replace(area=priced)
+        return self.area_resolver.resolve(name)
+
+    def as_of(self, day: Optional[date]) -> "ReferenceSnapshot":
+        """The snapshot with each area priced as it was on ``day``.
+
+        Areas without any history keep their current prices; areas whose
+        history starts after ``day`` are left out. Derived snapshots share
+        this snapshot's version and are built once per date.
+        """
+        if day is None:
+            return self
+        if self._base is not None:
+            return self._base.as_of(day)
+        snapshot = self._as_of.get(day)
+        if snapshot is None:
+            with self._as_of_lock:
+                snapshot = self._as_of.get(day)
+                if snapshot is None:
+                    snapshot = self._derive(day)
+                    self._as_of[day] = snapshot
+        return snapshot
+
+    def _derive(self, day: date) -> "ReferenceSnapshot":
+        areas = []
+        today = date.today()
+        # Project prices only have a current value; move them in step with
+        # their area's apartment price.
+        project_ratios = {}
+        for area in self.areas.values():
+            if not self.prices.has_history(area.id):
+                areas.append(area)
+                project_ratios[area.id] = 1.0
+                continue
+            price = self.prices.price_as_of(area.id, day)
+            if price is not None:
+                current = self.prices.price_as_of(area.id, today)
+                areas.append(
+                    area._replace(
+                        **{
+                            field: _historical_price(
+                                getattr(area, field),
+                                getattr(price, field),
+                                None if current is None else getattr(current, field),
+                            )
+                            for field in PRICE_FIELDS
+                        }
+                    )
+                )
+                if area.apartment_price_per_sqm:
+                    project_ratios[area.id] = (
+                        price.apartment_price_per_sqm / area.apartment_price_per_sqm
+                    )
+        projects = [
+            project._replace(
+                average_price_per_sqm=project.average_price_per_sqm
+                * project_ratios[project.area_id]
+            )
+            for project in self.projects.values()
+            if project.area_id in project_ratios
+        ]
+        snapshot = ReferenceSnapshot(
+            areas,
+            self.amenities.values(),
+            version=self.version,
+            loaded_at=self.loaded_at,
+            prices=self.prices,
+            projects=projects,
+        )
+        snapshot.effective_date = day
+        snapshot._base = self
+        return snapshot
+
+    def amenity_catalogue(self, property_type: str) -> List[AmenityRecord]:
+        return [
+            amenity
+            for (amenity_type, _), amenity in self.amenities.items()
+            if amenity_type == property_type
+        ]
+
+    def resolve_amenities(
+        self,
+        names: Iterable[str],
+        property_type: str,
+    ) -> Tuple[List[AmenityRecord], List[str]]:
+        # Matches come back in catalogue order, whatever order they were requested in.
+        found = []
+        missing = []
+        for key in sorted(set(normalize_amenity_names(names))):
+            amenity = self.amenities.get((property_type, key))
+            if amenity is None:
+                missing.append(key)
+            else:
+                found.append(amenity)
+        return found, missing
+
+
+def _historical_price(served: float, then: float, now: Optional[float]) -> float:
+    # A price that differs from the history's current one was set by trained
+    # coefficients; it moves by the history's change since ``day`` instead of
+    # being replaced by the stored price, so as_of today values as without it.
+    if now is None or served == now or not now:
+        return then
+    return served * (then / now)
+
+
+def _snapshot_as_of(base: ReferenceSnapshot, day: date) -> ReferenceSnapshot:
+    return base.as_of(day)
+
+
+def _fingerprint(
+    areas: Iterable[AreaRecord],
+    amenities: Iterable[AmenityRecord],
+    prices: Iterable[AreaPriceRecord] = (),
+    projects: Iterable[ProjectRecord] = (),
+) -> str:
+    digest = hashlib.sha256()
+    for record in chain(areas, amenities, prices, projects):
+        digest.update(repr(tuple(record)).encode())
+    return digest.hexdigest()
+
+
+def load_snapshot(session: Session, version: int = 1) -> ReferenceSnapshot:
+    # Plain column tuples: no ORM identity map for thousands of rows.
+    areas = [
+        AreaRecord(
+            id=area_id,
+            name=name,
+            land_price_per_acre=float(land),
+            apartment_price_per_sqm=float(apartment),
+            house_price_per_sqm=float(house),
+        )
+        for area_id, name, land, apartment, house in session.query(
+            Area.id,
+            Area.name,
+            Area.land_price_per_acre,
+            Area.apartment_price_per_sqm,
+            Area.house_price_per_sqm,
+        )
+    ]
+    amenities = [
+        AmenityRecord(
+            id=amenity_id,
+            name=name,
+            property_type=property_type,
+            value_percent=float(value_percent),
+        )
+        for amenity_id, name, property_type, value_percent in session.query(
+            Amenity.id,
+            Amenity.name,
+            Amenity.property_type,
+            Amenity.value_percent,
+        )
+    ]
+    prices = [
+        AreaPriceRecord(
+            area_id=area_id,
+            effective_from=effective_from,
+            land_price_per_acre=float(land),
+            apartment_price_per_sqm=float(apartment),
+            house_price_per_sqm=float(house),
+        )
+        for area_id, effective_from, land, apartment, house in session.query(
+            AreaPrice.area_id,
+            AreaPrice.effective_from,
+            AreaPrice.land_price_per_acre,
+            AreaPrice.apartment_price_per_sqm,
+            AreaPrice.house_price_per_sqm,
+        )
+    ]
+    coefficients = active_coefficients()
+    if coefficients is not None:
+        # Trained prices and uplifts replace the stored values they cover.
+        areas = [
+            area._replace(**coefficients.area_prices.get(normalize_area_name(area.name), {}))
+            for area in areas
+        ]
+        amenities = [
+            amenity._replace(
+                value_percent=coefficients.amenity_percents.get(
+                    (amenity.property_type, normalize_amenity_name(amenity.name)),
+                    amenity.value_percent,
+                )
+            )
+            for amenity in amenities
+        ]
+    # Projects name their area as free text; attach them to the area record.
+    area_ids = {normalize_area_name(area.name): area.id for area in areas}
+    projects = []
+    for project_id, name, area_name, price, latitude, longitude in session.query(
+        ApartmentProject.id,
+        ApartmentProject.name,
+        ApartmentProject.area,
+        ApartmentProject.average_price_per_sqm,
+        ApartmentProject.latitude,
+        ApartmentProject.longitude,
+    ):
+        area_id = area_ids.get(normalize_area_name(area_name))
+        if area_id is None:
+            logger.warning("Skipping apartment project %r: unknown area %r", name, area_name)
+            continue
+        projects.append(
+            ProjectRecord(
+                id=project_id,
+                name=name,
+                area_id=area_id,
+                average_price_per_sqm=float(price),
+                latitude=latitude,
+                longitude=longitude,
+            )
+        )
+    return ReferenceSnapshot(
+        areas,
+        amenities,
+        version=version,
+        loaded_at=time.time(),
+        prices=prices,
+        projects=projects,
+    )
+
+
+def snapshot_to_json(snapshot: ReferenceSnapshot) -> str:
+    return json.dumps(
+        {
+            "areas": [
+                {**area._asdict(), "id": str(area.id)} for area in snapshot.areas.values()
+            ],
+            "amenities": [
+                {**amenity._asdict(), "id": str(amenity.id)}
+                for amenity in snapshot.amenities.values()
+            ],
+            "prices": [
+                {
+                    **price._asdict(),
+                    "area_id": str(price.area_id),
+                    "effective_from": price.effective_from.isoformat(),
+                }
+                for price in snapshot.prices.records()
+            ],
+            "projects": [
+                {**project._asdict(), "id": str(project.id), "area_id": str(project.area_id)}
+                for project in snapshot.projects.values()
+            ],
+        }
+    )
+
+
+def snapshot_from_json(payload: str, version: int) -> ReferenceSnapshot:
+    data = json.loads(payload)
+    areas = [AreaRecord(**{**area, "id": uuid.UUID(area["id"])}) for area in data["areas"]]
+    amenities = [
+        AmenityRecord(**{**amenity, "id": uuid.UUID(amenity["id"])})
+        for amenity in data["amenities"]
+    ]
+    prices = [
+        AreaPriceRecord(
+            **{
+                **price,
+                "area_id": uuid.UUID(price["area_id"]),
+                "effective_from": date.fromisoformat(price["effective_from"]),
+            }
+        )
+        for price in data.get("prices", [])
+    ]
+    projects = [
+        ProjectRecord(
+            **{
+                **project,
+                "id": uuid.UUID(project["id"]),
+                "area_id": uuid.UUID(project["area_id"]),
+            }
+        )
+        for project in data.get("projects", [])
+    ]
+    return ReferenceSnapshot(
+        areas,
+        amenities,
+        version=version,
+        loaded_at=time.time(),
+        prices=prices,
+        projects=projects,
+    )
+
+
+class ReferenceDataCache:
+    """Process-wide cache of reference data, refreshed on TTL expiry or on demand.
+
+    A refresh only bumps ``version`` when the table contents actually changed,
+    so downstream caches keyed on the version survive no-op reloads. The
+    load after an invalidation reads from the primary, since replicas may
+    not have the write that caused it yet.
+    """
+
+    def __init__(self, ttl_seconds: float, backend: CacheBackend) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._expires_at = 0.0
+        self._pin_primary = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    @property
+    def snapshot(self) -> Optional[ReferenceSnapshot]:
+        return self._snapshot
+
+    def fresh_snapshot(self) -> Optional[ReferenceSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return snapshot
+        return None
+
+    def get(self, session: Session) -> ReferenceSnapshot:
+        snapshot = self.fresh_snapshot()
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._snapshot
+            return self._load(session)
+
+    def reload(self, session: Session) -> ReferenceSnapshot:
+        with self._lock:
+            self.backend.delete(REFERENCE_SNAPSHOT_KEY)
+            return self._load(session)
+
+    def invalidate(self) -> None:
+        self._pin_primary = True
+        self._expires_at = 0.0
+
+    def _load(self, session: Session) -> ReferenceSnapshot:
+        self.loads += 1
+        previous = self._snapshot
+        version = previous.version if previous is not None else 0
+        pin_primary = self._pin_primary
+        if pin_primary:
+            session.info["pin_primary"] = True
+        # With a shared backend only one worker reads the tables on a cold
+        # key; the others pick up the snapshot it published.
+        payload = self.backend.get_or_compute(
+            REFERENCE_SNAPSHOT_KEY,
+            lambda: snapshot_to_json(run_read(session, load_snapshot)),
+            self.ttl_seconds,
+        )
+        snapshot = snapshot_from_json(payload, version=version + 1)
+        if previous is not None and previous.fingerprint == snapshot.fingerprint:
+            snapshot = previous
+        elif previous is not None:
+            logger.info("Reference data changed; now at version %s", snapshot.version)
+        # Build the area indexes here rather than on the first request that needs them.
+        _ = snapshot.area_resolver
+        self._snapshot = snapshot
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        if pin_primary:
+            self._pin_primary = False
+        return snapshot
+
+
+reference_cache = ReferenceDataCache(
+    ttl_seconds=get_settings().reference_cache_ttl_seconds,
+    backend=cache_backend,
+)
+
+
+def invalidate_reference_data() -> None:
+    cache_backend.delete(REFERENCE_SNAPSHOT_KEY)
+    reference_cache.invalidate()
+    cache_backend.publish(INVALIDATION_CHANNEL, REFERENCE_SNAPSHOT_KEY)
+
+
+def _on_invalidation(message: str) -> None:
+    if message == REFERENCE_SNAPSHOT_KEY:
+        reference_cache.invalidate()
+
+
+_subscribed = False
+
+
+def subscribe_to_invalidations() -> None:
+    global _subscribed
+    if not _subscribed:
+        cache_backend.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+        _subscribed = True
+
+
+def mark_reference_data_changed(session: Session) -> None:
+    # For writes the ORM cannot see, such as Core bulk upserts.
+    session.info["reference_data_changed"] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _track_reference_changes(session: Session, flush_context, instances) -> None:
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(instance, (Area, Amenity, AreaPrice, ApartmentProject)) for instance in changed):
+        mark_reference_data_changed(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_reference_changes(session: Session) -> None:
+    if session.info.pop("reference_data_changed", False):
+        invalidate_reference_data()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reference_changes(session: Session) -> None:
+    session.info.pop("reference_data_changed", None)
+
+
+def _require_ready() -> None:
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail="Service is not ready")
+
+
+def get_reference_data(db: Session = Depends(get_read_db)) -> ReferenceSnapshot:
+    _require_ready()
+    return reference_cache.get(db)
+
+
+async def get_reference_data_async(
+    db: AsyncSession = Depends(get_async_db),
+) -> ReferenceSnapshot:
+    _require_ready()
+    snapshot = reference_cache.fresh_snapshot()
+    if snapshot is not None:
+        return snapshot
+    if replica_router.replicas:
+        # Replicas are only configured for the sync driver.
+        return await run_in_threadpool(_load_from_replica)
+    return await db.run_sync(reference_cache.get)
+
+
+def _load_from_replica() -> ReferenceSnapshot:
+    with ReadSessionLocal() as session:
+        return reference_cache.get(session)
@@ -0,0 +1,284 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.estimate import (
+    ApartmentEstimateRequest,
+    EstimateRequest,
+    EstimateResponse,
+    HouseEstimateRequest,
+    LandEstimateRequest,
+)
+from app.services.cache_backend import CacheBackend, cache_backend
+from app.services.reference_data import (
+    ReferenceSnapshot,
+    normalize_amenity_names,
+    normalize_area_name,
+    normalize_project_name,
+)
+from app.utils.admission import AdmissionController, AdmissionShed, admission_controller
+from app.utils.config import get_settings
+from app.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+# Sizes are rounded before keying so float noise from the UI (120.0000001)
+# still hits; the steps are far below anything that moves an estimate.
+SQM_PRECISION = 2
+ACRE_PRECISION = 4
+
+
+def estimate_cache_key(payload: EstimateRequest, current_year: int) -> Tuple[Hashable, ...]:
+    key = _payload_key(payload, current_year)
+    if payload.as_of is not None:
+        key += (payload.as_of,)
+    if payload.valuation_method == "comps":
+        key += ("comps", payload.latitude, payload.longitude)
+    return key
+
+
+def _payload_key(payload: EstimateRequest, current_year: int) -> Tuple[Hashable, ...]:
+    area = normalize_area_name(payload.area)
+    if isinstance(payload, LandEstimateRequest):
+        return (
+            "land",
+            area,
+            round(payload.land_size_acres, ACRE_PRECISION),
+            payload.plot_shape,
+        )
+    amenities = tuple(sorted(set(normalize_amenity_names(payload.amenities))))
+    if isinstance(payload, ApartmentEstimateRequest):
+        return (
+            "apartment",
+            area,
+            normalize_project_name(payload.apartment_name) if payload.apartment_name else None,
+            round(payload.size_sqm, SQM_PRECISION),
+            payload.year_built,
+            amenities,
+            current_year,
+        )
+    if isinstance(payload, HouseEstimateRequest):
+        return (
+            "house",
+            area,
+            round(payload.house_size_sqm, SQM_PRECISION),
+            round(payload.land_size_acres, ACRE_PRECISION),
+            payload.year_built,
+            payload.plot_shape,
+            amenities,
+            current_year,
+        )
+    raise ValueError(f"Unsupported property type: {payload.property_type}")
+
+
+def shared_cache_key(key: Tuple[Hashable, ...], reference: ReferenceSnapshot) -> str:
+    # Workers number reference versions independently, so shared keys use the
+    # content fingerprint, which is identical everywhere for the same data.
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return f"estimate:{reference.fingerprint[:16]}:{digest}"
+
+
+class EstimateResultCache:
+    """Bounded LRU of estimate responses with a per-entry TTL.
+
+    Entries belong to one reference-data version; the first lookup under a
+    new version drops everything cached against the old one. When a shared
+    backend is configured it sits behind the LRU as a second tier, so one
+    worker's computation serves every other worker. Concurrent misses on
+    the same key share one build, even with the cache disabled. With an
+    admission controller only that build takes a slot, so hits are served
+    however loaded the valuation path is.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        shared: Optional[CacheBackend] = None,
+        admission: Optional[AdmissionController] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_entries > 0
+        self.shared = shared
+        self.admission = admission
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(
+        self,
+        key: Tuple[Hashable, ...],
+        reference: ReferenceSnapshot,
+        build: Callable[[], EstimateResponse],
+    ) -> EstimateResponse:
+        flight_key = (reference.version, key)
+        if not self.enabled:
+            return self._flights.do(flight_key, lambda: self._admitted(build))
+        estimate = self.get(key, reference.version)
+        if estimate is not None:
+            return estimate
+        return self._flights.do(
+            flight_key, lambda: self._admitted(lambda: self._build(key, reference, build))
+        )
+
+    async def get_or_build_async(
+        self,
+        key: Tuple[Hashable, ...],
+        reference: ReferenceSnapshot,
+        build: Callable[[], EstimateResponse],
+    ) -> EstimateResponse:
+        """``get_or_build`` for the event loop: concurrent misses await one build."""
+        flight_key = (reference.version, key)
+        if not self.enabled:
+
+            async def run() -> EstimateResponse:
+                return build()
+
+            return await self._async_flights.do(flight_key, lambda: self._admitted_async(run))
+        estimate = self.get(key, reference.version)
+        if estimate is not None:
+            return estimate
+        return await self._async_flights.do(
+            flight_key,
+            lambda: self._admitted_async(lambda: self._build_async(key, reference, build)),
+        )
+
+    def _admitted(self, build: Callable[[], EstimateResponse]) -> EstimateResponse:
+        # Runs on a request's worker thread; the controller lives on the event loop.
+        if self.admission is None:
+            return build()
+        reason = from_thread.run(self.admission.acquire)
+        if reason is not None:
+            raise AdmissionShed(reason)
+        try:
+            return build()
+        finally:
+            from_thread.run_sync(self.admission.release)
+
+    async def _admitted_async(
+        self,
+        build: Callable[[], Awaitable[EstimateResponse]],
+    ) -> EstimateResponse:
+        if self.admission is None:
+            return await build()
+        reason = await self.admission.acquire()
+        if reason is not None:
+            raise AdmissionShed(reason)
+        try:
+            return await build()
+        finally:
+            self.admission.release()
+
+    async def _build_async(
+        self,
+        key: Tuple[Hashable, ...],
+        reference: ReferenceSnapshot,
+        build: Callable[[], EstimateResponse],
+    ) -> EstimateResponse:
+        if self.shared is not None:
+            # The shared tier does network I/O and may wait out another
+            # worker's build, so it runs off the event loop.
+            return await run_in_threadpool(self._build, key, reference, build)
+        return self._build(key, reference, build)
+
+    def _build(
+        self,
+        key: Tuple[Hashable, ...],
+        reference: ReferenceSnapshot,
+        build: Callable[[], EstimateResponse],
+    ) -> EstimateResponse:
+        if self.shared is not None:
+            payload = self.shared.get_or_compute(
+                shared_cache_key(key, reference),
+                lambda: build().model_dump_json(),
+                self.ttl_seconds,
+            )
+            estimate = EstimateResponse.model_validate_json(payload)
+        else:
+            estimate = build()
+        self.put(key, reference.version, estimate)
+        return estimate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            shared = None
+            if self.shared is not None:
+                shared = {
+                    "backend": type(self.shared).__name__,
+                    "computes": self.shared.computes,
+                    "coalesced": self.shared.coalesced,
+                }
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "reference_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "coalesced": self._flights.coalesced + self._async_flights.coalesced,
+                "in_flight": self._flights.in_flight + self._async_flights.in_flight,
+                "shared": shared,
+            }
+
+
+_settings = get_settings()
+result_cache = EstimateResultCache(
+    max_entries=_settings.estimate_cache_max_entries,
+    ttl_seconds=_settings.estimate_cache_ttl_seconds,
+    enabled=_settings.estimate_cache_enabled,
+    shared=cache_backend if cache_backend.shared else None,
+    admission=admission_controller if _settings.admission_enabled else None,
+)
@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.schemas.estimate import EstimateRequest
+from app.services.reference_data import (
+    AmenityRecord,
+    AreaRecord,
+    ProjectRecord,
+    normalize_area_name,
+)
+from app.services.valuation import confidence_score
+from app.services.vectorized import (
+    SHAPE_CODE_INDEX,
+    ValuationTables,
+    value_apartment,
+    value_house,
+    value_land,
+)
+
+# The request field each property type's size axis varies.
+SIZE_FIELDS = {
+    "apartment": "size_sqm",
+    "house": "house_size_sqm",
+    "land": "land_size_acres",
+}
+
+
+def amenity_combinations(toggles: Sequence[AmenityRecord]) -> List[List[AmenityRecord]]:
+    # Combination i switches on toggle j when bit j of i is set, so the
+    # first combination is the base property alone.
+    return [
+        [amenity for bit, amenity in enumerate(toggles) if combination >> bit & 1]
+        for combination in range(1 << len(toggles))
+    ]
+
+
+def value_grid(
+    tables: ValuationTables,
+    request: EstimateRequest,
+    area: AreaRecord,
+    project: Optional[ProjectRecord],
+    base_amenities: List[AmenityRecord],
+    toggles: List[AmenityRecord],
+    sizes: List[float],
+    years_built: List[Optional[int]],
+    current_year: int,
+) -> List[Dict[str, Any]]:
+    """Value every (amenity combination, year built, size) cell in one array pass.
+
+    Cells are ordered by combination, then year, then size. Area and amenity
+    lookups happen once; each combination's amenities become one bitmask, so
+    a cell costs a few array operations and matches ``POST /estimate``.
+    """
+    property_type = request.property_type
+    combinations = amenity_combinations(toggles)
+    cells_per_combination = len(years_built) * len(sizes)
+    count = len(combinations) * cells_per_combination
+    area_index = np.full(
+        count, tables.area_index[normalize_area_name(area.name)], dtype=np.intp
+    )
+    size_column = np.tile(np.asarray(sizes, dtype=np.float64), len(years_built) * len(combinations))
+
+    if property_type == "land":
+        shape_codes = np.full(count, SHAPE_CODE_INDEX[request.plot_shape], dtype=np.int8)
+        valued = value_land(tables, area_index, size_column, shape_codes)
+    else:
+        masks = np.array(
+            [
+                tables.encode_amenities(base_amenities + combination, property_type)
+                for combination in combinations
+            ],
+            dtype=np.uint64,
+        )
+        mask_column = np.repeat(masks, cells_per_combination)
+        year_column = np.tile(
+            np.repeat(np.asarray(years_built, dtype=np.int64), len(sizes)), len(combinations)
+        )
+        if property_type == "apartment":
+            project_price_per_sqm = None
+            if project is not None:
+                project_price_per_sqm = np.full(count, project.average_price_per_sqm)
+            valued = value_apartment(
+                tables,
+                area_index,
+                size_column,
+                year_column,
+                mask_column,
+                current_year,
+                project_price_per_sqm,
+            )
+        else:
+            valued = value_house(
+                tables,
+                area_index,
+                size_column,
+                np.full(count, request.land_size_acres, dtype=np.float64),
+                year_column,
+                np.full(count, SHAPE_CODE_INDEX[request.plot_shape], dtype=np.int8),
+                mask_column,
+                current_year,
+            )
+
+    estimated = valued["estimated_value"]
+    low = (estimated * 0.90).tolist()
+    high = (estimated * 1.10).tolist()
+    estimated = estimated.tolist()
+    cells = []
+    position = 0
+    for combination in combinations:
+        names = [amenity.name for amenity in combination]
+        confidence = confidence_score(
+            property_type,
+            len(base_amenities) + len(combination),
+            project is not None,
+        )
+        for year_built in years_built:
+            for size in sizes:
+                cells.append(
+                    {
+                        "size": size,
+                        "year_built": year_built,
+                        "amenities": names,
+                        "estimated_value": estimated[position],
+                        "low_estimate": low[position],
+                        "high_estimate": high[position],
+                        "confidence_score": confidence,
+                    }
+                )
+                position += 1
+    return cells
@@ -0,0 +1,88 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app import IMPORT_STARTED
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Wall-clock time of each startup phase, measured from the first app import.
+
+    ``serving_after`` is when the server could accept connections and
+    ``ready_after`` when it first reported ready; both are measured from
+    ``IMPORT_STARTED``.
+    """
+
+    def __init__(self, started: float, budget_seconds: Optional[float] = None) -> None:
+        self.started = started
+        self.budget_seconds = budget_seconds
+        self.phases: Dict[str, float] = {}
+        self.skipped: List[str] = []
+        self.serving_after: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self.failed: Optional[str] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds, 4)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def skip(self, name: str) -> None:
+        self.skipped.append(name)
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 4)
+
+    def serving(self) -> None:
+        self.serving_after = self._elapsed()
+
+    def ready(self) -> None:
+        self.ready_after = self._elapsed()
+        phases = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.phases.items())
+        if self.over_budget:
+            logger.warning(
+                "Ready after %.3fs, over the %.1fs startup budget (%s)",
+                self.ready_after,
+                self.budget_seconds,
+                phases,
+            )
+        else:
+            logger.info("Ready after %.3fs (%s)", self.ready_after, phases)
+
+    def fail(self, reason: str) -> None:
+        self.failed = reason
+
+    @property
+    def over_budget(self) -> bool:
+        return (
+            self.budget_seconds is not None
+            and self.ready_after is not None
+            and self.ready_after > self.budget_seconds
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": dict(self.phases),
+            "skipped": list(self.skipped),
+            "serving_after_seconds": self.serving_after,
+            "ready_after_seconds": self.ready_after,
+            "budget_seconds": self.budget_seconds,
+            "over_budget": self.over_budget,
+            "failed": self.failed,
+        }
+
+
+startup_report = StartupReport(
+    IMPORT_STARTED,
+    budget_seconds=get_settings().startup_budget_seconds,
+)
@@ -0,0 +1,669 @@
+import csv
+import hashlib
+import json
+import logging
+import math
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from app.services.bulk import CSV_LIST_SEPARATOR, chunked
+from app.services.reference_data import (
+    ReferenceSnapshot,
+    normalize_amenity_name,
+    normalize_area_name,
+)
+from app.services.valuation import (
+    AREA_PRICE_FIELDS,
+    COEFFICIENTS_FORMAT,
+    DEPRECIATION_MAX_AGE,
+    SHAPE_MULTIPLIERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Hedonic models fitted per property type by least squares on log prices:
+#   land:       log(price / acres / shape)  = area
+#   apartment:  log(price / size_sqm)       = area + amenities + age band
+#   house:      log(price) = age band + log(exp(area + amenities) * size_sqm + land)
+# with the house plot valued at the fitted land prices, as the served
+# formula does. Amenity coefficients become uplifts exp(b) - 1; age bands
+# become depreciation factors relative to new buildings.
+DEPRECIATION_BAND_YEARS = 5
+DEPRECIATION_BANDS = DEPRECIATION_MAX_AGE // DEPRECIATION_BAND_YEARS + 1
+HOUSE_ITERATIONS = 20
+HOUSE_TOLERANCE = 1e-7
+DEFAULT_MIN_ROWS = 30
+# Rows per block when accumulating the normal equations.
+BLOCK_ROWS = 65_536
+
+COLUMNS = {
+    "land": ("area", "price", "land_size_acres", "shape"),
+    "apartment": ("area", "price", "size_sqm", "age", "amenities"),
+    "house": ("area", "price", "house_size_sqm", "land_size_acres", "shape", "age", "amenities"),
+}
+SHAPE_NAMES = {shape.lower(): multiplier for shape, multiplier in SHAPE_MULTIPLIERS.items()}
+PROPERTY_TYPES = tuple(COLUMNS)
+FIELDS = (
+    "property_type",
+    "area",
+    "price",
+    "size_sqm",
+    "house_size_sqm",
+    "land_size_acres",
+    "plot_shape",
+    "year_built",
+    "amenities",
+    "sold_on",
+)
+# Checks each row must pass, per property type, after the common ones.
+REQUIRED = {
+    "land": ("land_size_acres", "plot_shape"),
+    "apartment": ("year_built", "amenities", "size_sqm"),
+    "house": ("year_built", "amenities", "house_size_sqm", "land_size_acres", "plot_shape"),
+}
+
+
+class TrainingContext(NamedTuple):
+    """What a parser needs to turn transactions into model columns."""
+
+    # Position in ``reference.areas`` by normalized area name.
+    area_index: Dict[str, int]
+    amenity_bits: Dict[str, Dict[str, int]]
+    since: Optional[date]
+    default_year: int
+
+
+def training_context(
+    reference: ReferenceSnapshot,
+    since: Optional[date] = None,
+    default_year: Optional[int] = None,
+) -> TrainingContext:
+    return TrainingContext(
+        area_index={key: index for index, key in enumerate(reference.areas)},
+        amenity_bits={
+            property_type: {
+                normalize_amenity_name(amenity.name): bit
+                for bit, amenity in enumerate(reference.amenity_catalogue(property_type))
+            }
+            for property_type in ("apartment", "house")
+        },
+        since=since,
+        default_year=default_year or datetime.now().year,
+    )
+
+
+class ParsedChunk(NamedTuple):
+    rows: int
+    columns: Dict[str, Dict[str, np.ndarray]]
+    skipped: Counter
+
+
+def transaction_chunks(
+    handle: IO[str],
+    fmt: str,
+    chunk_size: int,
+) -> Iterator[Tuple[Optional[Tuple[str, ...]], List[Any]]]:
+    """Yield ``(header, rows)`` chunks of a transactions file.
+
+    CSV rows stay lists of cells under the file's header; NDJSON lines are
+    yielded undecoded with no header, so decoding happens in the workers.
+    """
+    if fmt == "csv":
+        reader = csv.reader(handle)
+        header = tuple(name.strip() for name in next(reader, ()))
+        for rows in chunked(reader, chunk_size):
+            yield header, rows
+    elif fmt == "ndjson":
+        lines = (line for line in handle if line.strip())
+        for rows in chunked(lines, chunk_size):
+            yield None, rows
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _field_columns(
+    header: Optional[Tuple[str, ...]],
+    rows: List[Any],
+    skipped: Counter,
+) -> Dict[str, Sequence[Any]]:
+    if header is not None:
+        width = len(header)
+        complete = [row for row in rows if len(row) == width]
+        if len(complete) < len(rows):
+            skipped["malformed row"] += len(rows) - len(complete)
+        by_name = dict(zip(header, zip(*complete))) if complete else {}
+        blank = ("",) * len(complete)
+        return {field: by_name.get(field, blank) for field in FIELDS}
+
+    records = []
+    for line in rows:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            records.append(record)
+        else:
+            skipped["invalid json"] += 1
+    columns = {field: [record.get(field) for record in records] for field in FIELDS}
+    # Lists are not hashable; amenity lists are looked up as tuples.
+    columns["amenities"] = [
+        tuple(value) if isinstance(value, list) else value for value in columns["amenities"]
+    ]
+    return columns
+
+
+def _mapped(values: Sequence[Any], convert: Callable[[Any], Any], dtype) -> np.ndarray:
+    # Transactions repeat a small set of areas, dates, shapes and amenity
+    # lists; each distinct value is converted once.
+    lookup = {value: convert(value) for value in set(values)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=dtype, count=len(values))
+
+
+def _floats(values: Sequence[Any]) -> np.ndarray:
+    cells = [value if value not in ("", None) else "nan" for value in values]
+    try:
+        return np.array(cells, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter(map(_float_or_nan, cells), dtype=np.float64, count=len(cells))
+
+
+def _float_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _amenity_mask(bits: Dict[str, int], value: Any) -> int:
+    """Bitmask of the named amenities; -1 when one is not in the catalogue."""
+    if isinstance(value, str):
+        value = CSV_LIST_SEPARATOR.split(value)
+    mask = 0
+    for name in value or ():
+        name = str(name).strip()
+        if not name:
+            continue
+        bit = bits.get(normalize_amenity_name(name))
+        if bit is None:
+            return -1
+        mask |= 1 << bit
+    return mask
+
+
+def _sale_year(value: Any, context: TrainingContext) -> int:
+    """Year of the sale; -1 when unparseable, 0 when before ``since``."""
+    if value in ("", None):
+        return context.default_year
+    try:
+        sold_on = date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return -1
+    if context.since and sold_on < context.since:
+        return 0
+    return sold_on.year
+
+
+def parse_chunk(
+    header: Optional[Tuple[str, ...]],
+    rows: List[Any],
+    context: TrainingContext,
+) -> ParsedChunk:
+    """Turn one chunk of transactions into model columns, column by column."""
+    skipped: Counter = Counter()
+    fields = _field_columns(header, rows, skipped)
+    count = len(fields["property_type"])
+    rejected = np.zeros(count, dtype=bool)
+
+    def reject(reason: str, bad: np.ndarray) -> None:
+        # Each row is counted under the first check it fails.
+        new = int(np.count_nonzero(bad & ~rejected))
+        if new:
+            skipped[reason] += new
+        rejected[:] |= bad
+
+    type_code = _mapped(
+        fields["property_type"],
+        lambda value: PROPERTY_TYPES.index(value) if value in COLUMNS else -1,
+        np.int8,
+    )
+    reject("unknown property_type", type_code < 0)
+    sale_year = _mapped(fields["sold_on"], lambda value: _sale_year(value, context), np.int32)
+    reject("invalid sold_on", sale_year < 0)
+    reject("before --since", sale_year == 0)
+    area = _mapped(
+        fields["area"],
+        lambda value: context.area_index.get(normalize_area_name(str(value or "")), -1),
+        np.int32,
+    )
+    reject("unknown area", area < 0)
+    price = _floats(fields["price"])
+    reject("invalid price", ~(np.isfinite(price) & (price > 0)))
+
+    values: Dict[str, np.ndarray] = {}
+    problems: Dict[str, np.ndarray] = {}
+    for field in ("size_sqm", "house_size_sqm", "land_size_acres"):
+        values[field] = _floats(fields[field])
+        problems[field] = ~(np.isfinite(values[field]) & (values[field] > 0))
+    shape = _mapped(
+        fields["plot_shape"],
+        lambda value: SHAPE_NAMES.get(str(value or "normal").strip().lower(), math.nan),
+        np.float64,
+    )
+    values["shape"] = shape
+    problems["plot_shape"] = np.isnan(shape)
+    year_built = _floats(fields["year_built"])
+    problems["year_built"] = ~np.isfinite(year_built) | (year_built != np.round(year_built))
+    with np.errstate(invalid="ignore"):
+        age = np.clip(sale_year - np.nan_to_num(year_built), 0, np.iinfo(np.int16).max)
+    values["age"] = age.astype(np.int16)
+    masks = np.zeros(count, dtype=np.uint64)
+    problems["amenities"] = np.zeros(count, dtype=bool)
+    for property_type, bits in context.amenity_bits.items():
+        rows_of_type = np.flatnonzero(type_code == PROPERTY_TYPES.index(property_type))
+        if not len(rows_of_type):
+            continue
+        amenities = [fields["amenities"][row] for row in rows_of_type]
+        type_masks = _mapped(amenities, lambda value: _amenity_mask(bits, value), np.int64)
+        problems["amenities"][rows_of_type] = type_masks < 0
+        masks[rows_of_type] = type_masks.view(np.uint64)
+    values["amenities"] = masks
+    values["area"] = area
+    values["price"] = price
+
+    columns = {}
+    for code, property_type in enumerate(PROPERTY_TYPES):
+        of_type = type_code == code
+        for field in REQUIRED[property_type]:
+            reason = "unknown amenity" if field == "amenities" else f"invalid {field}"
+            reject(reason, of_type & problems[field])
+        selected = of_type & ~rejected
+        if selected.any():
+            columns[property_type] = {
+                name: values[name][selected] for name in COLUMNS[property_type]
+            }
+    return ParsedChunk(len(rows), columns, skipped)
+
+
+_worker_context: Optional[TrainingContext] = None
+
+
+def _init_worker(context: TrainingContext) -> None:
+    global _worker_context
+    _worker_context = context
+
+
+def _parse_chunk_in_worker(chunk: Tuple[Optional[Tuple[str, ...]], List[Any]]) -> ParsedChunk:
+    return parse_chunk(*chunk, _worker_context)
+
+
+def parse_chunks(
+    chunks: Iterable[Tuple[Optional[Tuple[str, ...]], List[Any]]],
+    context: TrainingContext,
+    workers: int = 1,
+) -> Iterator[ParsedChunk]:
+    if workers <= 1:
+        for header, rows in chunks:
+            yield parse_chunk(header, rows, context)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(context,),
+    ) as executor:
+        # At most 2 * workers chunks in flight, so memory stays bounded.
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_parse_chunk_in_worker, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class TrainingStats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.used: Counter = Counter()
+        self.skipped: Counter = Counter()
+        self.started_at = time.perf_counter()
+        self.parse_seconds = 0.0
+        self.fit_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "used": dict(self.used),
+            "skipped": dict(self.skipped),
+            "parse_seconds": round(self.parse_seconds, 3),
+            "fit_seconds": round(self.fit_seconds, 3),
+        }
+
+
+def collect_columns(
+    chunks: Iterable[Tuple[Optional[Tuple[str, ...]], List[Any]]],
+    context: TrainingContext,
+    stats: TrainingStats,
+    workers: int = 1,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Stream transaction chunks into one compact array per model column."""
+    parts: Dict[str, List[Dict[str, np.ndarray]]] = {property_type: [] for property_type in COLUMNS}
+    for parsed in parse_chunks(chunks, context, workers):
+        stats.rows += parsed.rows
+        stats.skipped.update(parsed.skipped)
+        for property_type, columns in parsed.columns.items():
+            parts[property_type].append(columns)
+    stats.parse_seconds = time.perf_counter() - stats.started_at
+    merged = {}
+    for property_type, chunks in parts.items():
+        if chunks:
+            merged[property_type] = {
+                name: np.concatenate([chunk[name] for chunk in chunks])
+                for name in COLUMNS[property_type]
+            }
+            stats.used[property_type] = len(merged[property_type]["price"])
+    return merged
+
+
+class HedonicFit(NamedTuple):
+    # Per area: fitted price (NaN where the area had no rows) and row count.
+    area_prices: np.ndarray
+    area_rows: np.ndarray
+    # Per catalogue amenity bit: uplift (NaN when never seen) and row count.
+    amenity_percents: np.ndarray
+    amenity_rows: np.ndarray
+    # Depreciation factor by age, 0..DEPRECIATION_MAX_AGE; None when unfitted.
+    depreciation: Optional[np.ndarray]
+
+
+def _age_bands(age: np.ndarray) -> np.ndarray:
+    return np.minimum(age // DEPRECIATION_BAND_YEARS, DEPRECIATION_BANDS - 1).astype(np.intp)
+
+
+def _features(masks: np.ndarray, bands: np.ndarray, amenity_count: int) -> np.ndarray:
+    # Amenity indicator columns, then one column per age band after the first.
+    features = np.zeros((len(masks), amenity_count + DEPRECIATION_BANDS - 1))
+    if amenity_count:
+        shifts = np.arange(amenity_count, dtype=np.uint64)
+        features[:, :amenity_count] = (masks[:, None] >> shifts) & np.uint64(1)
+    rows = np.flatnonzero(bands)
+    features[rows, amenity_count + bands[rows] - 1] = 1.0
+    return features
+
+
+def _least_squares(
+    area: np.ndarray,
+    masks: np.ndarray,
+    bands: np.ndarray,
+    y: np.ndarray,
+    area_count: int,
+    amenity_count: int,
+    share: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Least squares of ``y`` on area dummies, amenity bits and age bands.
+
+    ``share`` scales the area and amenity columns per row (the Jacobian of
+    the house model). The normal equations are accumulated blockwise: the
+    area block is diagonal, the area-by-feature block comes from bincounts,
+    and only the small feature block needs a matrix product, so memory stays
+    flat in the number of rows and areas. Columns without rows come back NaN.
+    """
+    feature_count = amenity_count + DEPRECIATION_BANDS - 1
+    weight = np.ones(len(y)) if share is None else share
+    area_gram = np.bincount(area, weights=weight * weight, minlength=area_count)
+    area_y = np.bincount(area, weights=weight * y, minlength=area_count)
+    area_features = np.zeros((area_count, feature_count))
+    feature_gram = np.zeros((feature_count, feature_count))
+    feature_y = np.zeros(feature_count)
+    for start in range(0, len(y), BLOCK_ROWS):
+        block = slice(start, start + BLOCK_ROWS)
+        features = _features(masks[block], bands[block], amenity_count)
+        if share is not None:
+            features[:, :amenity_count] *= share[block, None]
+        feature_gram += features.T @ features
+        feature_y += features.T @ y[block]
+        for column in range(feature_count):
+            area_features[:, column] += np.bincount(
+                area[block], weights=weight[block] * features[:, column], minlength=area_count
+            )
+
+    gram = np.block(
+        [
+            [np.diag(area_gram), area_features],
+            [area_features.T, feature_gram],
+        ]
+    )
+    rhs = np.concatenate([area_y, feature_y])
+    present = np.diag(gram) > 0
+    solution = np.full(len(rhs), np.nan)
+    solution[present] = np.linalg.lstsq(
+        gram[np.ix_(present, present)], rhs[present], rcond=None
+    )[0]
+    return solution
+
+
+def _hedonic_fit(
+    solution: np.ndarray,
+    area: np.ndarray,
+    masks: np.ndarray,
+    bands: np.ndarray,
+    area_count: int,
+    amenity_count: int,
+    min_rows: int,
+) -> HedonicFit:
+    amenity_rows = np.array(
+        [np.count_nonzero(masks & np.uint64(1 << bit)) for bit in range(amenity_count)],
+        dtype=np.int64,
+    )
+    band_rows = np.bincount(bands, minlength=DEPRECIATION_BANDS)
+    band_coefficients = solution[area_count + amenity_count:]
+    band_factors = np.ones(DEPRECIATION_BANDS)
+    for band in range(1, DEPRECIATION_BANDS):
+        if band_rows[band] >= min_rows:
+            band_factors[band] = math.exp(band_coefficients[band - 1])
+        else:
+            # Too few sales at this age: carry the younger band's factor.
+            band_factors[band] = band_factors[band - 1]
+    # Buildings never gain value with age, and new ones are the baseline.
+    band_factors = np.minimum.accumulate(np.minimum(band_factors, 1.0))
+    depreciation = None
+    if len(area) >= min_rows:
+        depreciation = band_factors[_age_bands(np.arange(DEPRECIATION_MAX_AGE + 1))]
+    return HedonicFit(
+        area_prices=np.exp(solution[:area_count]),
+        area_rows=np.bincount(area, minlength=area_count),
+        amenity_percents=np.expm1(solution[area_count:area_count + amenity_count]),
+        amenity_rows=amenity_rows,
+        depreciation=depreciation,
+    )
+
+
+def fit_apartment(
+    columns: Dict[str, np.ndarray],
+    area_count: int,
+    amenity_count: int,
+    min_rows: int,
+) -> HedonicFit:
+    bands = _age_bands(columns["age"])
+    y = np.log(columns["price"] / columns["size_sqm"])
+    solution = _least_squares(
+        columns["area"], columns["amenities"], bands, y, area_count, amenity_count
+    )
+    return _hedonic_fit(
+        solution, columns["area"], columns["amenities"], bands, area_count, amenity_count, min_rows
+    )
+
+
+def fit_land(columns: Dict[str, np.ndarray], area_count: int) -> HedonicFit:
+    area = columns["area"]
+    y = np.log(columns["price"] / columns["land_size_acres"] / columns["shape"])
+    area_rows = np.bincount(area, minlength=area_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.bincount(area, weights=y, minlength=area_count) / area_rows
+    return HedonicFit(np.exp(means), area_rows, np.empty(0), np.empty(0, np.int64), None)
+
+
+def fit_house(
+    columns: Dict[str, np.ndarray],
+    land_price_per_acre: np.ndarray,
+    area_count: int,
+    amenity_count: int,
+    min_rows: int,
+) -> HedonicFit:
+    """Gauss-Newton fit of ``log(price) = band + log(building + land)``.
+
+    ``building`` is ``exp(area + amenities) * house_size_sqm`` and ``land`` the
+    plot valued at ``land_price_per_acre``, the served house formula in log
+    form. It starts from a linear fit with the land value subtracted.
+    """
+    area = columns["area"]
+    masks = columns["amenities"]
+    bands = _age_bands(columns["age"])
+    size = columns["house_size_sqm"]
+    land_value = columns["land_size_acres"] * land_price_per_acre[area] * columns["shape"]
+    log_price = np.log(columns["price"])
+
+    building = np.maximum(columns["price"] - land_value, 0.1 * columns["price"])
+    theta = _least_squares(area, masks, bands, np.log(building / size), area_count, amenity_count)
+    present = ~np.isnan(theta)
+    theta = np.nan_to_num(theta)
+    shifts = np.arange(amenity_count, dtype=np.uint64)
+    for _ in range(HOUSE_ITERATIONS):
+        amenity_sum = np.zeros(len(area))
+        for start in range(0, len(area), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            bits = (masks[block, None] >> shifts) & np.uint64(1)
+            amenity_sum[block] = bits @ theta[area_count:area_count + amenity_count]
+        band_terms = np.concatenate([[0.0], theta[area_count + amenity_count:]])
+        building = np.exp(theta[area] + amenity_sum) * size
+        total = building + land_value
+        residual = log_price - band_terms[bands] - np.log(total)
+        step = np.nan_to_num(
+            _least_squares(
+                area, masks, bands, residual, area_count, amenity_count, share=building / total
+            )
+        )
+        theta += step
+        if np.max(np.abs(step)) < HOUSE_TOLERANCE:
+            break
+    theta[~present] = np.nan
+    return _hedonic_fit(theta, area, masks, bands, area_count, amenity_count, min_rows)
+
+
+def train(
+    columns: Dict[str, Dict[str, np.ndarray]],
+    reference: ReferenceSnapshot,
+    stats: TrainingStats,
+    min_rows: int = DEFAULT_MIN_ROWS,
+) -> Dict[str, HedonicFit]:
+    started = time.perf_counter()
+    areas = list(reference.areas.values())
+    area_count = len(areas)
+    fits: Dict[str, HedonicFit] = {}
+    if "land" in columns:
+        fits["land"] = fit_land(columns["land"], area_count)
+    if "apartment" in columns:
+        fits["apartment"] = fit_apartment(
+            columns["apartment"],
+            area_count,
+            len(reference.amenity_catalogue("apartment")),
+            min_rows,
+        )
+    if "house" in columns:
+        # Areas without enough land sales value house plots at the stored price.
+        land_price = np.array([area.land_price_per_acre for area in areas], dtype=np.float64)
+        land_fit = fits.get("land")
+        if land_fit is not None:
+            fitted = land_fit.area_rows >= min_rows
+            land_price[fitted] = land_fit.area_prices[fitted]
+        fits["house"] = fit_house(
+            columns["house"],
+            land_price,
+            area_count,
+            len(reference.amenity_catalogue("house")),
+            min_rows,
+        )
+    stats.fit_seconds = time.perf_counter() - started
+    return fits
+
+
+def build_artifact(
+    fits: Dict[str, HedonicFit],
+    reference: ReferenceSnapshot,
+    stats: TrainingStats,
+    source: str,
+    min_rows: int = DEFAULT_MIN_ROWS,
+) -> Dict[str, Any]:
+    """Coefficients fitted on at least ``min_rows`` sales, in the serving format.
+
+    The version is the training time plus a hash of the coefficients, so
+    retraining on the same data yields the same hash.
+    """
+    areas: Dict[str, Dict[str, Any]] = {}
+    for index, area in enumerate(reference.areas.values()):
+        entry: Dict[str, Any] = {}
+        rows = {}
+        for property_type, fit in fits.items():
+            count = int(fit.area_rows[index])
+            if count:
+                rows[property_type] = count
+            if count >= min_rows:
+                entry[AREA_PRICE_FIELDS[property_type]] = round(float(fit.area_prices[index]), 2)
+        if entry:
+            areas[area.name] = {**entry, "rows": rows}
+
+    amenities: Dict[str, Dict[str, float]] = {}
+    depreciation: Dict[str, List[float]] = {}
+    for property_type in ("apartment", "house"):
+        fit = fits.get(property_type)
+        if fit is None:
+            continue
+        catalogue = reference.amenity_catalogue(property_type)
+        fitted = {
+            amenity.name: round(float(fit.amenity_percents[bit]), 6)
+            for bit, amenity in enumerate(catalogue)
+            if fit.amenity_rows[bit] >= min_rows
+        }
+        if fitted:
+            amenities[property_type] = fitted
+        if fit.depreciation is not None:
+            depreciation[property_type] = [round(float(factor), 6) for factor in fit.depreciation]
+
+    coefficients = {"areas": areas, "amenities": amenities, "depreciation": depreciation}
+    digest = hashlib.sha256(json.dumps(coefficients, sort_keys=True).encode()).hexdigest()
+    trained_at = datetime.now(timezone.utc)
+    return {
+        "format": COEFFICIENTS_FORMAT,
+        "version": f"{trained_at:%Y%m%dT%H%M%SZ}-{digest[:12]}",
+        "trained_at": trained_at.isoformat(),
+        "source": source,
+        "min_rows": min_rows,
+        "stats": stats.as_dict(),
+        **coefficients,
+    }
+
+
+def write_artifact(artifact: Dict[str, Any], directory: Path) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"coefficients-{artifact['version']}.json"
+    path.write_text(json.dumps(artifact, indent=2), encoding="utf-8")
+    return path
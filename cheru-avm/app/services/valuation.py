@@ -1,7 +1,10 @@
+import json
 from datetime import datetime
-from typing import Iterable
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Tuple, Union
 
-from app.models import Amenity, Area
+from app.models import Amenity, ApartmentProject, Area
+from app.utils.names import normalize_amenity_name, normalize_area_name
 
 SHAPE_MULTIPLIERS = {
     "normal": 1.00,
@@ -9,10 +12,122 @@ SHAPE_MULTIPLIERS = {
     "irregular": 0.95,
 }
 
+CLASSIC_PROPERTY_YEAR = 1985
+YEAR_CLASSIC_MESSAGE = (
+    "This property is too classic for automated estimation. "
+    "Please contact our team for a professional valuation."
+)
 
-def _depreciation_factor(year_built: int) -> float:
-    current_year = datetime.now().year
+PROJECT_CONFIDENCE_BONUS = 0.04
+
+# Depreciation curves cover ages 0..DEPRECIATION_MAX_AGE; older buildings
+# share the last factor.
+DEPRECIATION_MAX_AGE = 30
+COEFFICIENTS_FORMAT = 1
+AREA_PRICE_FIELDS = {
+    "land": "land_price_per_acre",
+    "apartment": "apartment_price_per_sqm",
+    "house": "house_price_per_sqm",
+}
+
+
+class ValuationCoefficients(NamedTuple):
+    """A trained coefficient artifact, keyed for lookups by normalized name.
+
+    ``area_prices`` maps an area to the price fields that were fitted for
+    it; ``amenity_percents`` maps ``(property_type, amenity)`` to its
+    uplift; ``depreciation`` maps a property type to its factor by age.
+    Anything the artifact leaves out keeps the database value.
+    """
+
+    version: str
+    area_prices: Mapping[str, Mapping[str, float]]
+    amenity_percents: Mapping[Tuple[str, str], float]
+    depreciation: Mapping[str, Tuple[float, ...]]
+
+
+def parse_coefficients(data: dict) -> ValuationCoefficients:
+    if data.get("format") != COEFFICIENTS_FORMAT:
+        raise ValueError(f"Unsupported coefficients format: {data.get('format')!r}")
+    area_prices: Dict[str, Dict[str, float]] = {}
+    for name, fitted in data.get("areas", {}).items():
+        prices = {
+            field: float(fitted[field])
+            for field in AREA_PRICE_FIELDS.values()
+            if fitted.get(field) is not None
+        }
+        if prices:
+            area_prices[normalize_area_name(name)] = prices
+    amenity_percents = {
+        (property_type, normalize_amenity_name(name)): float(percent)
+        for property_type, percents in data.get("amenities", {}).items()
+        for name, percent in percents.items()
+    }
+    depreciation = {}
+    for property_type, curve in data.get("depreciation", {}).items():
+        if len(curve) != DEPRECIATION_MAX_AGE + 1:
+            raise ValueError(
+                f"{property_type} depreciation curve needs {DEPRECIATION_MAX_AGE + 1} factors"
+            )
+        depreciation[property_type] = tuple(float(factor) for factor in curve)
+    return ValuationCoefficients(data["version"], area_prices, amenity_percents, depreciation)
+
+
+def load_coefficients(path: Union[str, Path]) -> ValuationCoefficients:
+    with open(path, encoding="utf-8") as handle:
+        return parse_coefficients(json.load(handle))
+
+
+_coefficients: Optional[ValuationCoefficients] = None
+
+
+def use_coefficients(coefficients: Optional[ValuationCoefficients]) -> None:
+    """Serve from ``coefficients`` (None restores the built-in depreciation)."""
+    global _coefficients
+    _coefficients = coefficients
+
+
+def active_coefficients() -> Optional[ValuationCoefficients]:
+    return _coefficients
+
+
+def year_built_error(year_built: int, current_year: int) -> Optional[str]:
+    if year_built > current_year:
+        return f"year_built must be between 1970 and {current_year}"
+    if year_built < CLASSIC_PROPERTY_YEAR:
+        return YEAR_CLASSIC_MESSAGE
+    return None
+
+
+def confidence_score(
+    property_type: str,
+    amenity_count: int,
+    project_priced: bool = False,
+) -> float:
+    base_scores = {
+        "land": 0.78,
+        "house": 0.82,
+        "apartment": 0.85,
+    }
+    base = base_scores.get(property_type, 0.75)
+    # A development's own price per sqm is a closer comparable than the area average.
+    if project_priced:
+        base += PROJECT_CONFIDENCE_BONUS
+    adjusted = base + min(amenity_count, 5) * 0.02
+    return round(min(adjusted, 0.95), 2)
+
+
+def _depreciation_factor(
+    year_built: int,
+    current_year: Optional[int] = None,
+    property_type: Optional[str] = None,
+) -> float:
+    if current_year is None:
+        current_year = datetime.now().year
     age = current_year - year_built
+    curve = _coefficients.depreciation.get(property_type) if _coefficients else None
+    if curve is not None:
+        return curve[min(max(age, 0), DEPRECIATION_MAX_AGE)]
     if age < 10:
         return 1.0
     if age < 20:
@@ -46,12 +161,17 @@ def estimate_apartment(
     size_sqm: float,
     year_built: int,
     amenities: Iterable[Amenity],
+    current_year: Optional[int] = None,
+    project: Optional[ApartmentProject] = None,
 ) -> dict:
-    base_psm = float(area.apartment_price_per_sqm)
+    if project is not None:
+        base_psm = float(project.average_price_per_sqm)
+    else:
+        base_psm = float(area.apartment_price_per_sqm)
     apartment_base_value = base_psm * float(size_sqm)
     amenity_value = _amenity_value(apartment_base_value, amenities)
     total_before_depreciation = apartment_base_value + amenity_value
-    depreciation_factor = _depreciation_factor(year_built)
+    depreciation_factor = _depreciation_factor(year_built, current_year, "apartment")
     estimated_value = total_before_depreciation * depreciation_factor
 
     return {
@@ -74,6 +194,7 @@ def estimate_house(
     year_built: int,
     plot_shape: str,
     amenities: Iterable[Amenity],
+    current_year: Optional[int] = None,
 ) -> dict:
     land_result = estimate_land(area, land_size_acres, plot_shape)
     house_base_value = float(area.house_price_per_sqm) * float(house_size_sqm)
@@ -81,7 +202,7 @@ def estimate_house(
     total_before_depreciation = (
         house_base_value + land_result["estimated_value"] + amenity_value
     )
-    depreciation_factor = _depreciation_factor(year_built)
+    depreciation_factor = _depreciation_factor(year_built, current_year, "house")
     estimated_value = total_before_depreciation * depreciation_factor
 
     return {
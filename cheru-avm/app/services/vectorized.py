@@ -0,0 +1,266 @@
+import threading
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from app.services.reference_data import AmenityRecord, ReferenceSnapshot
+from app.services.valuation import (
+    DEPRECIATION_MAX_AGE,
+    SHAPE_MULTIPLIERS,
+    _depreciation_factor,
+    active_coefficients,
+)
+
+# Columnar counterparts of estimate_land / estimate_apartment / estimate_house.
+# Every operation mirrors the scalar functions step for step (same operands,
+# same order of additions), so results are bit-for-bit identical to them.
+
+SHAPE_CODES = tuple(SHAPE_MULTIPLIERS)
+SHAPE_CODE_INDEX = {shape: code for code, shape in enumerate(SHAPE_CODES)}
+_SHAPE_MULTIPLIER_VALUES = np.array(
+    [SHAPE_MULTIPLIERS[shape] for shape in SHAPE_CODES], dtype=np.float64
+)
+
+AMENITY_PROPERTY_TYPES = ("apartment", "house")
+MAX_AMENITIES_PER_TYPE = 64
+
+
+class ValuationTables:
+    """Reference data laid out as arrays, indexed by area index and amenity bit."""
+
+    def __init__(self, reference: ReferenceSnapshot) -> None:
+        areas = list(reference.areas.values())
+        self.reference = reference
+        self.version = reference.version
+        self._as_of: Dict[date, "ValuationTables"] = {}
+        self._as_of_lock = threading.Lock()
+        self.area_names = tuple(area.name for area in areas)
+        self.area_index: Mapping[str, int] = {
+            key: index for index, key in enumerate(reference.areas)
+        }
+        self.land_price_per_acre = np.array(
+            [area.land_price_per_acre for area in areas], dtype=np.float64
+        )
+        self.apartment_price_per_sqm = np.array(
+            [area.apartment_price_per_sqm for area in areas], dtype=np.float64
+        )
+        self.house_price_per_sqm = np.array(
+            [area.house_price_per_sqm for area in areas], dtype=np.float64
+        )
+
+        self.amenity_bits: Dict[str, Dict[uuid.UUID, int]] = {}
+        self.amenity_percents: Dict[str, List[float]] = {}
+        for property_type in AMENITY_PROPERTY_TYPES:
+            catalogue = reference.amenity_catalogue(property_type)
+            if len(catalogue) > MAX_AMENITIES_PER_TYPE:
+                raise ValueError(
+                    f"At most {MAX_AMENITIES_PER_TYPE} {property_type} amenities "
+                    "fit in an amenity bitmask"
+                )
+            self.amenity_bits[property_type] = {
+                amenity.id: bit for bit, amenity in enumerate(catalogue)
+            }
+            self.amenity_percents[property_type] = [
+                amenity.value_percent for amenity in catalogue
+            ]
+
+    def as_of(self, day: Optional[date]) -> "ValuationTables":
+        # One set of tables per date, so valuing as of a date is the same
+        # array arithmetic as valuing at current prices.
+        if day is None or day == self.reference.effective_date:
+            return self
+        tables = self._as_of.get(day)
+        if tables is None:
+            with self._as_of_lock:
+                tables = self._as_of.get(day)
+                if tables is None:
+                    tables = ValuationTables(self.reference.as_of(day))
+                    self._as_of[day] = tables
+        return tables
+
+    def encode_amenities(
+        self,
+        amenities: Iterable[AmenityRecord],
+        property_type: str,
+    ) -> int:
+        bits = self.amenity_bits[property_type]
+        mask = 0
+        for amenity in amenities:
+            mask |= 1 << bits[amenity.id]
+        return mask
+
+
+_current_tables: Optional[ValuationTables] = None
+
+
+def valuation_tables(reference: ReferenceSnapshot) -> ValuationTables:
+    # Tables for the current snapshot are shared between requests and
+    # rebuilt when a reload swaps the snapshot.
+    global _current_tables
+    tables = _current_tables
+    if tables is None or tables.reference is not reference:
+        tables = ValuationTables(reference)
+        _current_tables = tables
+    return tables
+
+
+def encode_shapes(plot_shapes: Iterable[str]) -> np.ndarray:
+    return np.fromiter(
+        (SHAPE_CODE_INDEX[shape] for shape in plot_shapes), dtype=np.int8
+    )
+
+
+# _depreciation_factor tabulated by age, per property type and coefficient
+# artifact; every age from DEPRECIATION_MAX_AGE up shares the last entry.
+_depreciation_tables: Dict[tuple, np.ndarray] = {}
+
+
+def _depreciation_by_age(property_type: str) -> np.ndarray:
+    coefficients = active_coefficients()
+    key = (coefficients.version if coefficients else None, property_type)
+    table = _depreciation_tables.get(key)
+    if table is None:
+        table = np.array(
+            [
+                _depreciation_factor(0, age, property_type)
+                for age in range(DEPRECIATION_MAX_AGE + 1)
+            ],
+            dtype=np.float64,
+        )
+        _depreciation_tables[key] = table
+    return table
+
+
+def depreciation_factors(
+    year_built: np.ndarray,
+    current_year: int,
+    property_type: str,
+) -> np.ndarray:
+    table = _depreciation_by_age(property_type)
+    age = current_year - np.asarray(year_built, dtype=np.int64)
+    return table[np.clip(age, 0, len(table) - 1)]
+
+
+def amenity_values(
+    base_value: np.ndarray,
+    amenity_masks: np.ndarray,
+    percents: List[float],
+) -> np.ndarray:
+    masks = np.asarray(amenity_masks, dtype=np.uint64).view(np.int64)
+    total = np.zeros_like(base_value)
+    contribution = np.empty_like(base_value)
+    bit_values = np.empty_like(masks)
+    # Bits are visited in catalogue order, the same order the scalar path sums in.
+    # An unset bit contributes exactly 0.0, which leaves the running sum unchanged.
+    # Summing percents first (a per-mask table or a matrix product) would round
+    # differently; exact alternatives measured no faster than these passes.
+    for bit, percent in enumerate(percents):
+        np.right_shift(masks, bit, out=bit_values)
+        np.bitwise_and(bit_values, 1, out=bit_values)
+        np.multiply(bit_values, percent, out=contribution)
+        contribution *= base_value
+        total += contribution
+    return total
+
+
+def _amenity_percent(amenity_value: np.ndarray, base_value: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(base_value)
+    np.divide(amenity_value, base_value, out=out, where=base_value != 0)
+    return out
+
+
+def value_land(
+    tables: ValuationTables,
+    area_index: np.ndarray,
+    land_size_acres: np.ndarray,
+    shape_codes: np.ndarray,
+) -> dict:
+    base_value = np.asarray(land_size_acres, dtype=np.float64) * tables.land_price_per_acre[
+        area_index
+    ]
+    shape_multiplier = _SHAPE_MULTIPLIER_VALUES[shape_codes]
+    final_value = base_value * shape_multiplier
+    return {
+        "estimated_value": final_value,
+        "breakdown": {
+            "land_base_value": base_value,
+            "land_shape_multiplier": shape_multiplier,
+            "land_final_value": final_value,
+        },
+    }
+
+
+def value_apartment(
+    tables: ValuationTables,
+    area_index: np.ndarray,
+    size_sqm: np.ndarray,
+    year_built: np.ndarray,
+    amenity_masks: np.ndarray,
+    current_year: int,
+    project_price_per_sqm: Optional[np.ndarray] = None,
+) -> dict:
+    size_sqm = np.asarray(size_sqm, dtype=np.float64)
+    base_psm = tables.apartment_price_per_sqm[area_index]
+    if project_price_per_sqm is not None:
+        # NaN marks rows without a known project; they keep the area price.
+        base_psm = np.where(np.isnan(project_price_per_sqm), base_psm, project_price_per_sqm)
+    apartment_base_value = base_psm * size_sqm
+    amenity_value = amenity_values(
+        apartment_base_value, amenity_masks, tables.amenity_percents["apartment"]
+    )
+    total_before_depreciation = apartment_base_value + amenity_value
+    depreciation_factor = depreciation_factors(year_built, current_year, "apartment")
+    estimated_value = total_before_depreciation * depreciation_factor
+
+    return {
+        "estimated_value": estimated_value,
+        "breakdown": {
+            "base_price_per_sqm": base_psm,
+            "building_value_before_amenities": apartment_base_value,
+            "building_value_after_amenities": total_before_depreciation,
+            "amenity_percent": _amenity_percent(amenity_value, apartment_base_value),
+            "depreciation_percent": 1 - depreciation_factor,
+            "final_price_per_sqm": estimated_value / size_sqm,
+        },
+    }
+
+
+def value_house(
+    tables: ValuationTables,
+    area_index: np.ndarray,
+    house_size_sqm: np.ndarray,
+    land_size_acres: np.ndarray,
+    year_built: np.ndarray,
+    shape_codes: np.ndarray,
+    amenity_masks: np.ndarray,
+    current_year: int,
+) -> dict:
+    house_size_sqm = np.asarray(house_size_sqm, dtype=np.float64)
+    land_result = value_land(tables, area_index, land_size_acres, shape_codes)
+    base_psm = tables.house_price_per_sqm[area_index]
+    house_base_value = base_psm * house_size_sqm
+    amenity_value = amenity_values(
+        house_base_value, amenity_masks, tables.amenity_percents["house"]
+    )
+    total_before_depreciation = (
+        house_base_value + land_result["estimated_value"] + amenity_value
+    )
+    depreciation_factor = depreciation_factors(year_built, current_year, "house")
+    estimated_value = total_before_depreciation * depreciation_factor
+
+    return {
+        "estimated_value": estimated_value,
+        "breakdown": {
+            "base_price_per_sqm": base_psm,
+            "depreciation_percent": 1 - depreciation_factor,
+            "amenity_percent": _amenity_percent(amenity_value, house_base_value),
+            "final_price_per_sqm": estimated_value / house_size_sqm,
+            "land_base_value": land_result["breakdown"]["land_base_value"],
+            "land_shape_multiplier": land_result["breakdown"]["land_shape_multiplier"],
+            "land_final_value": land_result["breakdown"]["land_final_value"],
+            "building_value_before_amenities": house_base_value,
+            "building_value_after_amenities": house_base_value + amenity_value,
+        },
+    }
@@ -0,0 +1,145 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.utils.config import get_settings
+
+# Status and message for each reason a request is shed.
+SHED_RESPONSES = {
+    "queue_full": (429, "Too many concurrent estimate requests; retry shortly"),
+    "timeout": (503, "Estimate service is overloaded; retry shortly"),
+}
+RETRY_AFTER_SECONDS = "1"
+
+
+class AdmissionShed(RuntimeError):
+    """A request shed from inside a handler; answered like a middleware shed."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(SHED_RESPONSES[reason][1])
+        self.reason = reason
+
+
+def shed_response(reason: str) -> JSONResponse:
+    status, message = SHED_RESPONSES[reason]
+    return JSONResponse(
+        status_code=status,
+        content={"detail": message},
+        headers={"Retry-After": RETRY_AFTER_SECONDS},
+    )
+
+
+class AdmissionController:
+    """Caps concurrent requests, with a short bounded wait for a slot.
+
+    Requests beyond ``max_concurrent`` queue for at most ``queue_timeout``
+    seconds. When ``max_queue`` are already waiting a request is shed at
+    once, so overload shows up as fast 429/503 responses rather than as
+    connection-pool timeouts. Slots pass straight from a finishing request
+    to the next waiter in arrival order. Only touched from the event loop,
+    so the counters need no lock.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {reason: 0 for reason in SHED_RESPONSES}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns the reason the request was shed, or None."""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self.shed["queue_full"] += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.shed["timeout"] += 1
+            return "timeout"
+        except BaseException:
+            # Cancelled (e.g. client gone); hand on a slot it was just given.
+            self._discard(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware running requests under ``path_prefixes`` through admission control."""
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        path_prefixes: Tuple[str, ...],
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self.controller.acquire()
+        if reason is not None:
+            await shed_response(reason)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+_settings = get_settings()
+admission_controller = AdmissionController(
+    max_concurrent=_settings.admission_max_concurrent
+    or _settings.db_pool_size + _settings.db_max_overflow,
+    max_queue=_settings.admission_max_queue,
+    queue_timeout=_settings.admission_queue_timeout_ms / 1000,
+)
@@ -1,7 +1,7 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Literal, Optional
 
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,8 +10,98 @@ class Settings(BaseSettings):
         default="sqlite:///./cheru_avm.db",
         alias="DATABASE_URL",
     )
+    db_pool_size: int = Field(default=5, ge=1, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, ge=0, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, gt=0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=-1, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: Literal["always", "idle", "never"] = Field(
+        default="always",
+        alias="DB_POOL_PRE_PING",
+    )
+    db_pool_pre_ping_idle_seconds: float = Field(
+        default=30.0,
+        alias="DB_POOL_PRE_PING_IDLE_SECONDS",
+    )
+    # Comma-separated read replica URLs; estimate-path reads are spread across them.
+    database_replica_urls: str = Field(default="", alias="DATABASE_REPLICA_URLS")
+    replica_retry_seconds: float = Field(default=30.0, gt=0, alias="REPLICA_RETRY_SECONDS")
+    database_async: bool = Field(default=False, alias="DATABASE_ASYNC")
+    async_database_url: Optional[str] = Field(default=None, alias="ASYNC_DATABASE_URL")
     allowed_origins: List[str] = Field(default_factory=lambda: ["*"])
-
+    # Shared secret for the /internal endpoints; unset means they are not served.
+    internal_api_token: Optional[str] = Field(default=None, alias="INTERNAL_API_TOKEN")
+    reference_cache_ttl_seconds: float = Field(
+        default=300.0,
+        alias="REFERENCE_CACHE_TTL_SECONDS",
+    )
+    estimate_cache_enabled: bool = Field(default=True, alias="ESTIMATE_CACHE_ENABLED")
+    estimate_cache_max_entries: int = Field(
+        default=10_000,
+        ge=0,
+        alias="ESTIMATE_CACHE_MAX_ENTRIES",
+    )
+    estimate_cache_ttl_seconds: float = Field(
+        default=600.0,
+        alias="ESTIMATE_CACHE_TTL_SECONDS",
+    )
+    cache_backend: Literal["local", "redis"] = Field(default="local", alias="CACHE_BACKEND")
+    redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    cache_key_prefix: str = Field(default="cheru-avm", alias="CACHE_KEY_PREFIX")
+    cache_lock_timeout_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        alias="CACHE_LOCK_TIMEOUT_SECONDS",
+    )
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    metrics_slow_request_ms: float = Field(
+        default=500.0,
+        ge=0,
+        alias="METRICS_SLOW_REQUEST_MS",
+    )
+    estimate_batch_max_items: int = Field(
+        default=50_000,
+        alias="ESTIMATE_BATCH_MAX_ITEMS",
+    )
+    scenario_max_cells: int = Field(default=5_000, ge=1, alias="SCENARIO_MAX_CELLS")
+    admission_enabled: bool = Field(default=True, alias="ADMISSION_ENABLED")
+    # Concurrent estimate requests; unset means DB_POOL_SIZE + DB_MAX_OVERFLOW,
+    # so admitted requests never queue on the connection pool.
+    admission_max_concurrent: Optional[int] = Field(
+        default=None,
+        ge=1,
+        alias="ADMISSION_MAX_CONCURRENT",
+    )
+    admission_max_queue: int = Field(default=100, ge=0, alias="ADMISSION_MAX_QUEUE")
+    admission_queue_timeout_ms: float = Field(
+        default=250.0,
+        ge=0,
+        alias="ADMISSION_QUEUE_TIMEOUT_MS",
+    )
+    estimate_log_enabled: bool = Field(default=True, alias="ESTIMATE_LOG_ENABLED")
+    estimate_log_batch_size: int = Field(default=500, ge=1, alias="ESTIMATE_LOG_BATCH_SIZE")
+    estimate_log_flush_seconds: float = Field(
+        default=1.0,
+        gt=0,
+        alias="ESTIMATE_LOG_FLUSH_SECONDS",
+    )
+    # Must hold at least one full batch request, which is logged all or nothing.
+    estimate_log_max_queue: int = Field(default=200_000, ge=1, alias="ESTIMATE_LOG_MAX_QUEUE")
+    estimate_log_drain_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        alias="ESTIMATE_LOG_DRAIN_SECONDS",
+    )
+    comps_neighbours: int = Field(default=10, ge=3, le=100, alias="COMPS_NEIGHBOURS")
+    # Trained coefficient artifact (scripts/train_coefficients.py) to value with.
+    coefficients_path: Optional[str] = Field(default=None, alias="COEFFICIENTS_PATH")
+    # "production" skips DDL when the schema fingerprint matches and warms
+    # caches in the background while /health/ready reports not ready.
+    startup_mode: Literal["full", "production"] = Field(default="full", alias="STARTUP_MODE")
+    startup_budget_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        alias="STARTUP_BUDGET_SECONDS",
+    )
 
     @field_validator("database_url", mode="before")
     @classmethod
@@ -27,6 +117,19 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in value.split(",") if origin.strip()]
         return value
 
+    @model_validator(mode="after")
+    def validate_estimate_log_queue(self) -> "Settings":
+        if self.estimate_log_enabled and self.estimate_log_max_queue < self.estimate_batch_max_items:
+            raise ValueError(
+                "ESTIMATE_LOG_MAX_QUEUE must be at least ESTIMATE_BATCH_MAX_ITEMS, "
+                "or a full batch could never be logged"
+            )
+        return self
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
     class Config:
         env_file = ".env"
         populate_by_name = True
@@ -0,0 +1,338 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            labels = _format_labels(dict(zip(self.labelnames, labelvalues)))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum.
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(
+                (labels, (list(counts), total[0]))
+                for labels, (counts, total) in self._series.items()
+            )
+        for labelvalues, (counts, total) in series:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Gauges:
+    """Gauges or counters whose values are read from elsewhere at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+        kind: str = "gauge",
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = list(self.collect())
+        except Exception:
+            logger.exception("Could not collect %s", self.name)
+            return []
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "avm_http_request_duration_seconds",
+        "HTTP request latency.",
+        ("method", "route", "property_type", "status"),
+    )
+)
+REQUEST_DB_QUERIES = registry.register(
+    Histogram(
+        "avm_http_request_db_queries",
+        "Database queries issued while serving one request.",
+        ("method", "route"),
+        buckets=QUERY_BUCKETS,
+    )
+)
+STAGE_SECONDS = registry.register(
+    Histogram(
+        "avm_estimate_stage_duration_seconds",
+        "Time spent in each stage of an estimate request.",
+        ("stage", "property_type"),
+        buckets=STAGE_BUCKETS,
+    )
+)
+DB_QUERIES = registry.register(
+    Counter("avm_db_queries_total", "Database queries issued, including those outside requests.")
+)
+
+
+class RequestMetrics:
+    """Timings for the request being served, reached through ``current_request``."""
+
+    __slots__ = (
+        "started",
+        "handler_started",
+        "handler_finished",
+        "response_started",
+        "property_type",
+        "db_queries",
+        "stages",
+    )
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.response_started: Optional[float] = None
+        self.property_type = "none"
+        self.db_queries = 0
+        self.stages: Dict[str, float] = {}
+
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "avm_request_metrics",
+    default=None,
+)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+class span:
+    """Adds the time spent in the block to ``stage`` for the current request.
+
+    Repeated stages within one request (e.g. a batch) are summed.
+    """
+
+    __slots__ = ("stage", "request", "started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> "span":
+        self.request = _current_request.get()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        request = self.request
+        if request is not None:
+            elapsed = time.perf_counter() - self.started
+            request.stages[self.stage] = request.stages.get(self.stage, 0.0) + elapsed
+
+
+class handler_span:
+    """Marks the endpoint body so the middleware can split off parse and serialize time."""
+
+    __slots__ = ("request", "property_type")
+
+    def __init__(self, property_type: Optional[str] = None) -> None:
+        self.property_type = property_type
+
+    def __enter__(self) -> "handler_span":
+        self.request = _current_request.get()
+        if self.request is not None:
+            self.request.handler_started = time.perf_counter()
+            if self.property_type is not None:
+                self.request.property_type = self.property_type
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.request is not None:
+            self.request.handler_finished = time.perf_counter()
+
+
+def install_query_counter(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        DB_QUERIES.inc()
+        request = _current_request.get()
+        if request is not None:
+            request.db_queries += 1
+
+
+def _route_label(scope) -> str:
+    # Label by the matched route so unknown paths and path parameters cannot
+    # grow the label set without bound.
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    if scope.get("path_params"):
+        return getattr(route, "path_format", route.path)
+    return scope["path"]
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, stage timings and DB queries per request."""
+
+    def __init__(self, app, slow_request_ms: float = 0.0) -> None:
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics(time.perf_counter())
+        token = _current_request.set(request)
+        status = 500
+
+        async def send_with_metrics(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                request.response_started = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_request.reset(token)
+            self._record(scope, request, status)
+
+    def _record(self, scope, request: RequestMetrics, status: int) -> None:
+        elapsed = time.perf_counter() - request.started
+        route_path = _route_label(scope)
+        method = scope.get("method", "")
+        REQUEST_SECONDS.observe(elapsed, method, route_path, request.property_type, str(status))
+        REQUEST_DB_QUERIES.observe(request.db_queries, method, route_path)
+
+        stages = request.stages
+        if request.handler_started is not None:
+            # Body read, validation and dependencies run before the endpoint;
+            # response-model validation and JSON rendering run after it.
+            stages["parse"] = request.handler_started - request.started
+            if request.handler_finished is not None and request.response_started is not None:
+                stages["serialize"] = request.response_started - request.handler_finished
+        for stage, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, stage, request.property_type)
+
+        if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+            breakdown = " ".join(
+                f"{stage}={seconds * 1000:.2f}ms" for stage, seconds in stages.items()
+            )
+            logger.warning(
+                "Slow request %s %s status=%s took %.1fms db_queries=%s %s",
+                method,
+                route_path,
+                status,
+                elapsed * 1000,
+                request.db_queries,
+                breakdown,
+            )
@@ -0,0 +1,57 @@
+from typing import Iterable, List
+
+AMENITY_ALIASES = {
+    "solar panels": "solar",
+    "backup generator": "backup_generator",
+    "parking": "parking",
+    "lift": "lift",
+    "balcony": "balcony",
+    "security": "security",
+    "garage": "garage",
+    "garden": "garden",
+    "pool": "pool",
+    "gym": "gym",
+}
+
+
+def normalize_area_name(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def normalize_amenity_name(name: str) -> str:
+    cleaned = " ".join(name.replace("_", " ").split()).lower()
+    return AMENITY_ALIASES.get(cleaned, cleaned.replace(" ", "_"))
+
+
+def normalize_amenity_names(names: Iterable[str]) -> List[str]:
+    return [normalize_amenity_name(name) for name in names]
+
+
+# Alternative spellings and informal names, keyed by clean_area_query() output.
+AREA_ALIASES = {
+    "upperhill": "Upper Hill",
+    "upper hill area": "Upper Hill",
+    "kitusuru": "Kitisuru",
+    "highridge": "Parklands",
+    "kabete": "Lower Kabete",
+    "riverside drive": "Riverside",
+    "spring valley estate": "Spring Valley",
+    "nairobi west estate": "Nairobi West",
+    "runda estate": "Runda",
+    "kile": "Kileleshwa",
+    "lavi": "Lavington",
+}
+
+
+def clean_area_query(text: str) -> str:
+    # Looser than normalize_area_name: apostrophes dropped and other
+    # punctuation treated as spaces, so "Lang'ata" and "Westlands, Nairobi"
+    # tokenize as expected.
+    text = text.lower().replace("'", "").replace("’", "")
+    return " ".join("".join(ch if ch.isalnum() else " " for ch in text).split())
+
+
+def normalize_project_name(name: str) -> str:
+    # Project names come with stray punctuation ("Adlife Plaza.", "Le'Mac"),
+    # so they get the same loose cleaning as area queries.
+    return clean_area_query(name)
@@ -0,0 +1,58 @@
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """Round-robin choice among read replicas, skipping ones that recently failed.
+
+    A replica marked down is skipped for ``retry_seconds`` and then tried
+    again; with no replica configured or available, reads go to the primary.
+    """
+
+    def __init__(self, primary: Engine, replicas: Sequence[Engine], retry_seconds: float) -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_seconds = retry_seconds
+        self._down_until: Dict[Engine, float] = {}
+        self._turn = itertools.count()
+        self.failovers = 0
+
+    def choose(self) -> Engine:
+        count = len(self.replicas)
+        if count:
+            now = time.monotonic()
+            start = next(self._turn)
+            for offset in range(count):
+                replica = self.replicas[(start + offset) % count]
+                if self._down_until.get(replica, 0.0) <= now:
+                    return replica
+        return self.primary
+
+    def mark_down(self, replica: Engine) -> None:
+        if replica not in self.replicas:
+            return
+        self._down_until[replica] = time.monotonic() + self.retry_seconds
+        self.failovers += 1
+        logger.warning(
+            "Read replica %s failed; skipping it for %.0fs",
+            replica.url.render_as_string(hide_password=True),
+            self.retry_seconds,
+        )
+
+    def healthy(self, replica: Engine) -> bool:
+        return self._down_until.get(replica, 0.0) <= time.monotonic()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "url": replica.url.render_as_string(hide_password=True),
+                "healthy": self.healthy(replica),
+            }
+            for replica in self.replicas
+        ]
@@ -3,6 +3,7 @@ create extension if not exists "pgcrypto";
 create table if not exists areas (
     id uuid primary key default gen_random_uuid(),
     name text unique not null,
+    name_key text,
     land_price_per_acre numeric not null,
     apartment_price_per_sqm numeric not null,
     house_price_per_sqm numeric not null,
@@ -12,13 +13,74 @@ create table if not exists areas (
 create table if not exists amenities (
     id uuid primary key default gen_random_uuid(),
     name text not null,
+    name_key text,
     property_type text not null,
     value_percent numeric not null
 );
 
+-- Normalized lookup keys; the app backfills them on startup.
+alter table areas add column if not exists name_key text;
+alter table amenities add column if not exists name_key text;
+create unique index if not exists ix_areas_name_key on areas (name_key);
+create unique index if not exists ix_amenities_property_type_name_key
+    on amenities (property_type, name_key);
+
+-- Area prices over time; each row holds until the area's next row.
+create table if not exists area_prices (
+    id uuid primary key default gen_random_uuid(),
+    area_id uuid not null references areas (id) on delete cascade,
+    effective_from date not null,
+    land_price_per_acre numeric not null,
+    apartment_price_per_sqm numeric not null,
+    house_price_per_sqm numeric not null,
+    created_at timestamptz default now(),
+    constraint uq_area_prices_area_effective unique (area_id, effective_from)
+);
+
+-- Recorded transactions used as comparables.
+create table if not exists comparable_sales (
+    id uuid primary key default gen_random_uuid(),
+    property_type text not null,
+    area_id uuid references areas (id) on delete set null,
+    latitude double precision not null,
+    longitude double precision not null,
+    size_sqm double precision,
+    land_size_acres double precision,
+    year_built integer,
+    price numeric not null,
+    sold_on date not null,
+    source text not null default 'transaction',
+    created_at timestamptz default now()
+);
+create index if not exists ix_comparable_sales_property_type
+    on comparable_sales (property_type);
+
 create table if not exists apartment_projects (
     id uuid primary key default gen_random_uuid(),
     name text not null,
+    name_key text,
     area text not null,
-    average_price_per_sqm numeric not null
+    average_price_per_sqm numeric not null,
+    latitude double precision,
+    longitude double precision
+);
+
+alter table apartment_projects add column if not exists name_key text;
+alter table apartment_projects add column if not exists latitude double precision;
+alter table apartment_projects add column if not exists longitude double precision;
+create unique index if not exists ix_apartment_projects_area_name_key
+    on apartment_projects (area, name_key);
+
+create table if not exists estimate_logs (
+    id uuid primary key default gen_random_uuid(),
+    served_at timestamptz not null,
+    endpoint text not null,
+    property_type text not null,
+    area text,
+    valuation_method text not null,
+    estimated_value double precision,
+    request jsonb not null,
+    response jsonb not null
 );
+create index if not exists ix_estimate_logs_served_at
+    on estimate_logs (served_at);
@@ -0,0 +1,153 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import SessionLocal
+from app.services.backtest import BacktestReport, Engine, backtest_chunks
+from app.services.bulk import chunked, detect_format, read_records
+from app.services.reference_data import load_snapshot
+from app.services.valuation import load_coefficients, use_coefficients
+from app.utils.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+
+# Pass as an artifact path to value with the database prices and fixed brackets.
+DATABASE_ENGINE = "none"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure valuation accuracy and speed against actual sale prices.",
+    )
+    parser.add_argument("input", type=Path, help="CSV or NDJSON file of sold properties")
+    parser.add_argument("--report", type=Path, help="Also write the full report as JSON")
+    parser.add_argument("--input-format", choices=["csv", "ndjson"])
+    parser.add_argument("--price-field", default="price", help="Column holding the sale price")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; 0 uses every CPU core (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--coefficients",
+        default=get_settings().coefficients_path,
+        help="Artifact for the baseline engine (default: COEFFICIENTS_PATH); "
+        f"'{DATABASE_ENGINE}' values with the database prices",
+    )
+    parser.add_argument(
+        "--compare",
+        help="Artifact for a candidate engine valued side by side with the baseline; "
+        f"'{DATABASE_ENGINE}' compares against the database prices",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=30,
+        help="Hide areas with fewer valued rows from the printed table (default: 30)",
+    )
+    return parser.parse_args()
+
+
+def load_engine(session, name: str, path: Optional[str]) -> Engine:
+    coefficients = None
+    if path and path != DATABASE_ENGINE:
+        coefficients = load_coefficients(path)
+    # load_snapshot applies the active artifact's prices and uplifts.
+    use_coefficients(coefficients)
+    try:
+        return Engine(name, load_snapshot(session), coefficients)
+    finally:
+        use_coefficients(None)
+
+
+def _cell(metrics: Dict[str, Any]) -> str:
+    if metrics["mape"] is None:
+        return f"{'-':>8} {'-':>14} {'-':>7}"
+    return (
+        f"{metrics['mape']:>7.2f}% {metrics['median_absolute_error']:>14,.0f} "
+        f"{metrics['hit_rate']:>6.1f}%"
+    )
+
+
+def print_report(report: Dict[str, Any], engines: List[Engine], min_rows: int) -> None:
+    header = f"{'type':<10} {'area':<24} {'rows':>9}"
+    for engine in engines:
+        header += f" | {engine.name + ' MAPE':>8} {'median abs err':>14} {'in band':>7}"
+    print(header)
+
+    def line(property_type: str, area: str, entry: Dict[str, Any]) -> None:
+        text = f"{property_type:<10} {area[:24]:<24} {entry['rows']:>9,}"
+        for engine in engines:
+            text += f" | {_cell(entry[engine.name])}"
+        print(text)
+
+    for property_type, entry in report["property_types"].items():
+        for area in report["areas"]:
+            if area["property_type"] == property_type and area["rows"] >= min_rows:
+                line(property_type, area["area"], area)
+        line(property_type, "(all areas)", entry)
+    line("all", "", report["overall"])
+
+    print()
+    for engine in report["engines"]:
+        print(
+            f"{engine['name']} ({engine['version']}): {engine['valuation_seconds']:.2f}s "
+            f"valuing, {engine['rows_per_second'] or 0:,.0f} rows/sec"
+        )
+    if report["reject_reasons"]:
+        print(f"\nSkipped {report['rejected']:,} rows:")
+        for reason, count in list(report["reject_reasons"].items())[:10]:
+            print(f"{count:>9,}  {reason}")
+
+
+def main() -> None:
+    args = parse_args()
+    input_format = detect_format(args.input, args.input_format)
+    workers = args.workers or os.cpu_count() or 1
+
+    session = SessionLocal()
+    try:
+        engines = [load_engine(session, "baseline", args.coefficients)]
+        if args.compare:
+            engines.append(load_engine(session, "candidate", args.compare))
+    finally:
+        session.close()
+
+    report = BacktestReport(engines)
+    with args.input.open(newline="", encoding="utf-8") as source:
+        for result in backtest_chunks(
+            chunked(read_records(source, input_format), args.chunk_size),
+            engines,
+            current_year=datetime.now().year,
+            price_field=args.price_field,
+            workers=workers,
+        ):
+            report.add(result)
+    results = report.as_dict()
+
+    print_report(results, engines, args.min_rows)
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+    logging.info(
+        "Backtested %s of %s rows in %.1fs, %.0f rows/sec on %s worker(s)",
+        results["valued"],
+        results["rows"],
+        results["elapsed_seconds"],
+        results["rows_per_second"],
+        workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+
+from app.routes.estimate import _build_estimate
+from app.schemas.estimate import parse_estimate_request
+from app.services.bootstrap import DEFAULT_AMENITIES, DEFAULT_AREAS
+from app.services.bulk import process_chunk
+from app.services.price_history import AreaPriceRecord
+from app.services.reference_data import (
+    AmenityRecord,
+    AreaRecord,
+    ReferenceSnapshot,
+    normalize_amenity_names,
+)
+from app.services.valuation import estimate_apartment, estimate_house, estimate_land
+from app.services.vectorized import (
+    SHAPE_CODES,
+    ValuationTables,
+    value_apartment,
+    value_house,
+    value_land,
+)
+
+CURRENT_YEAR = 2025
+SEED = 20240601
+# Quarterly price history per area, and the date bulk.pipeline_as_of values at.
+HISTORY_QUARTERS = 24
+AS_OF = date(CURRENT_YEAR, 3, 31)
+SCALAR_MAX_ROWS = 100_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the valuation core, the estimate API and the bulk path.",
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=["micro", "e2e", "bulk"],
+        help="Run only these suites (repeatable; default: all)",
+    )
+    parser.add_argument("--bulk-sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--requests", type=int, default=3_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--database-url",
+        action="append",
+        default=[],
+        metavar="NAME=URL",
+        help="Extra end-to-end target, e.g. postgres=postgresql+psycopg2://localhost/avm",
+    )
+    return parser.parse_args()
+
+
+def synthetic_reference() -> ReferenceSnapshot:
+    # Built from the bootstrap constants with fixed ids so runs are comparable
+    # without a database.
+    areas = [
+        AreaRecord(
+            id=uuid.uuid5(uuid.NAMESPACE_DNS, area["name"]),
+            name=area["name"],
+            land_price_per_acre=float(area["land"]),
+            apartment_price_per_sqm=float(area["apartment"]),
+            house_price_per_sqm=float(area["house"]),
+        )
+        for area in DEFAULT_AREAS
+    ]
+    amenities = [
+        AmenityRecord(
+            id=uuid.uuid5(uuid.NAMESPACE_DNS, f"{amenity['property_type']}:{amenity['name']}"),
+            name=amenity["name"],
+            property_type=amenity["property_type"],
+            value_percent=float(amenity["value"]),
+        )
+        for amenity in DEFAULT_AMENITIES
+    ]
+    prices = [
+        AreaPriceRecord(
+            area_id=area.id,
+            effective_from=date(CURRENT_YEAR - 6 + quarter // 4, 1 + 3 * (quarter % 4), 1),
+            land_price_per_acre=area.land_price_per_acre * (0.8 + quarter / 100),
+            apartment_price_per_sqm=area.apartment_price_per_sqm * (0.8 + quarter / 100),
+            house_price_per_sqm=area.house_price_per_sqm * (0.8 + quarter / 100),
+        )
+        for area in areas
+        for quarter in range(HISTORY_QUARTERS)
+    ]
+    return ReferenceSnapshot(areas, amenities, version=1, loaded_at=0.0, prices=prices)
+
+
+def time_call(func: Callable[[], Any], min_seconds: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_seconds / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"us_per_op": round(best * 1e6, 3), "ops_per_sec": round(1 / best, 1)}
+
+
+def run_micro(reference: ReferenceSnapshot) -> Dict[str, Dict[str, float]]:
+    karen = reference.area("Karen")
+    apartment_amenities, _ = reference.resolve_amenities(["Lift", "Pool", "Gym"], "apartment")
+    house_amenities, _ = reference.resolve_amenities(["Pool", "Garage", "Solar Panels"], "house")
+    amenity_input = ["Lift", "Pool", "Backup Generator", "parking", "Balcony"]
+    request = parse_estimate_request(
+        {
+            "property_type": "apartment",
+            "area": "Kilimani",
+            "size_sqm": 120,
+            "year_built": 2016,
+            "amenities": ["Lift", "Pool", "Backup Generator"],
+        }
+    )
+    return {
+        "micro.estimate_land": time_call(lambda: estimate_land(karen, 1.2, "corner")),
+        "micro.estimate_apartment": time_call(
+            lambda: estimate_apartment(karen, 120.0, 2016, apartment_amenities, CURRENT_YEAR)
+        ),
+        "micro.estimate_house": time_call(
+            lambda: estimate_house(karen, 350.0, 0.5, 2012, "normal", house_amenities, CURRENT_YEAR)
+        ),
+        "micro.normalize_amenities": time_call(lambda: normalize_amenity_names(amenity_input)),
+        "micro.resolve_amenities": time_call(
+            lambda: reference.resolve_amenities(amenity_input, "apartment")
+        ),
+        "micro.build_estimate": time_call(
+            lambda: _build_estimate(request, reference, CURRENT_YEAR)
+        ),
+    }
+
+
+def synthetic_records(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    areas = [area["name"] for area in DEFAULT_AREAS]
+    apartment_amenities = [a["name"] for a in DEFAULT_AMENITIES if a["property_type"] == "apartment"]
+    house_amenities = [a["name"] for a in DEFAULT_AMENITIES if a["property_type"] == "house"]
+    records = []
+    for _ in range(count):
+        property_type = rng.choice(("land", "apartment", "house"))
+        record: Dict[str, Any] = {"property_type": property_type, "area": rng.choice(areas)}
+        if property_type == "land":
+            record.update(
+                land_size_acres=round(rng.uniform(0.05, 5), 3),
+                plot_shape=rng.choice(("normal", "corner", "irregular")),
+            )
+        elif property_type == "apartment":
+            record.update(
+                size_sqm=round(rng.uniform(30, 400), 1),
+                year_built=rng.randint(1985, CURRENT_YEAR),
+                amenities=rng.sample(apartment_amenities, rng.randint(0, 4)),
+            )
+        else:
+            record.update(
+                house_size_sqm=round(rng.uniform(100, 900), 1),
+                land_size_acres=round(rng.uniform(0.1, 3), 2),
+                year_built=rng.randint(1985, CURRENT_YEAR),
+                plot_shape=rng.choice(("normal", "corner", "irregular")),
+                amenities=rng.sample(house_amenities, rng.randint(0, 4)),
+            )
+        records.append(record)
+    return records
+
+
+def engine_inputs(tables: ValuationTables, rows: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(SEED)
+    return {
+        "area_index": rng.integers(0, len(tables.area_names), rows),
+        "sizes": rng.uniform(30, 900, rows),
+        "acres": rng.uniform(0.05, 5, rows),
+        "years": rng.integers(1985, CURRENT_YEAR + 1, rows),
+        "shapes": rng.integers(0, 3, rows).astype(np.int8),
+        "apartment_masks": rng.integers(
+            0, 1 << len(tables.amenity_percents["apartment"]), rows
+        ).astype(np.uint64),
+        "house_masks": rng.integers(
+            0, 1 << len(tables.amenity_percents["house"]), rows
+        ).astype(np.uint64),
+    }
+
+
+def run_engine(reference: ReferenceSnapshot, rows: int) -> Dict[str, float]:
+    tables = ValuationTables(reference)
+    inputs = engine_inputs(tables, rows)
+    area_index, sizes, acres, years, shapes = (
+        inputs[name] for name in ("area_index", "sizes", "acres", "years", "shapes")
+    )
+    started = time.perf_counter()
+    value_land(tables, area_index, acres, shapes)
+    value_apartment(tables, area_index, sizes, years, inputs["apartment_masks"], CURRENT_YEAR)
+    value_house(
+        tables, area_index, sizes, acres, years, shapes, inputs["house_masks"], CURRENT_YEAR
+    )
+    elapsed = time.perf_counter() - started
+    valued = rows * 3
+    return {"rows": valued, "seconds": round(elapsed, 4), "rows_per_sec": round(valued / elapsed, 1)}
+
+
+def run_scalar(reference: ReferenceSnapshot, rows: int) -> Dict[str, float]:
+    # The same inputs as run_engine, valued one row at a time, for the speedup.
+    tables = ValuationTables(reference)
+    inputs = engine_inputs(tables, rows)
+    areas = list(reference.areas.values())
+    shapes = [SHAPE_CODES[code] for code in inputs["shapes"]]
+    catalogues = {
+        property_type: reference.amenity_catalogue(property_type)
+        for property_type in ("apartment", "house")
+    }
+
+    def amenities(property_type: str, mask: int) -> List[AmenityRecord]:
+        catalogue = catalogues[property_type]
+        return [amenity for bit, amenity in enumerate(catalogue) if mask >> bit & 1]
+
+    columns = list(
+        zip(
+            (areas[index] for index in inputs["area_index"].tolist()),
+            inputs["sizes"].tolist(),
+            inputs["acres"].tolist(),
+            inputs["years"].tolist(),
+            shapes,
+            (amenities("apartment", mask) for mask in inputs["apartment_masks"].tolist()),
+            (amenities("house", mask) for mask in inputs["house_masks"].tolist()),
+        )
+    )
+    started = time.perf_counter()
+    for area, size, acres, year, shape, apartment_amenities, house_amenities in columns:
+        estimate_land(area, acres, shape)
+        estimate_apartment(area, size, year, apartment_amenities, CURRENT_YEAR)
+        estimate_house(area, size, acres, year, shape, house_amenities, CURRENT_YEAR)
+    elapsed = time.perf_counter() - started
+    valued = rows * 3
+    return {"rows": valued, "seconds": round(elapsed, 4), "rows_per_sec": round(valued / elapsed, 1)}
+
+
+def run_pipeline(
+    reference: ReferenceSnapshot,
+    rows: int,
+    chunk_size: int = 10_000,
+    as_of: Optional[date] = None,
+    per_row: bool = False,
+) -> Dict[str, float]:
+    # Validation + resolution + vectorized valuation, as bulk_estimate.py runs it.
+    # as_of applies to the whole run like --as-of, or with per_row to each record.
+    current_year = CURRENT_YEAR
+    extra = {}
+    if as_of is not None and per_row:
+        extra = {"as_of": as_of.isoformat()}
+    elif as_of is not None:
+        reference = reference.as_of(as_of)
+        current_year = as_of.year
+    tables = ValuationTables(reference)
+    processed = 0
+    elapsed = 0.0
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        chunk = [
+            (start + offset + 1, json.dumps({**record, **extra}))
+            for offset, record in enumerate(synthetic_records(count, seed=SEED + start))
+        ]
+        started = time.perf_counter()
+        results, rejects = process_chunk(chunk, reference, tables, current_year)
+        elapsed += time.perf_counter() - started
+        processed += len(results) + len(rejects)
+    return {"rows": processed, "seconds": round(elapsed, 4), "rows_per_sec": round(processed / elapsed, 1)}
+
+
+def run_bulk(reference: ReferenceSnapshot, sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for rows in sizes:
+        results[f"bulk.engine.{rows}"] = run_engine(reference, rows)
+        # The scalar loop is slow; a sample is enough for its rate.
+        results[f"bulk.scalar.{rows}"] = run_scalar(reference, min(rows, SCALAR_MAX_ROWS))
+        results[f"bulk.pipeline.{rows}"] = run_pipeline(reference, rows)
+        results[f"bulk.pipeline_as_of.{rows}"] = run_pipeline(reference, rows, as_of=AS_OF)
+        results[f"bulk.pipeline_row_as_of.{rows}"] = run_pipeline(
+            reference, rows, as_of=AS_OF, per_row=True
+        )
+    return results
+
+
+def run_load_test(name: str, database_url: str, args: argparse.Namespace, extra_env: Dict[str, str]):
+    env = {**os.environ, "DATABASE_URL": database_url, **extra_env}
+    command = [
+        sys.executable,
+        str(ROOT_DIR / "scripts" / "load_test.py"),
+        "--requests",
+        str(args.requests),
+        "--concurrency",
+        str(args.concurrency),
+    ]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout)
+    return {
+        key: result[key]
+        for key in ("requests", "concurrency", "failures", "requests_per_sec", "p50_ms", "p95_ms", "p99_ms")
+    }
+
+
+def run_e2e(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        targets = {"sqlite": f"sqlite:///{workdir}/benchmark.db"}
+        for target in args.database_url:
+            name, _, url = target.partition("=")
+            targets[name] = url
+        for name, url in targets.items():
+            results[f"e2e.{name}.uncached"] = run_load_test(
+                name, url, args, {"ESTIMATE_CACHE_ENABLED": "false"}
+            )
+            results[f"e2e.{name}.cached"] = run_load_test(name, url, args, {})
+    return results
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    suites = args.suite or ["micro", "e2e", "bulk"]
+    reference = synthetic_reference()
+    results: Dict[str, Dict[str, float]] = {}
+    if "micro" in suites:
+        results.update(run_micro(reference))
+    if "bulk" in suites:
+        results.update(run_bulk(reference, args.bulk_sizes))
+    if "e2e" in suites:
+        results.update(run_e2e(args))
+
+    report = json.dumps({"meta": metadata(), "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import SessionLocal
+from app.services.bulk import (
+    REJECT_FIELDS,
+    RESULT_FIELDS,
+    RecordWriter,
+    detect_format,
+    read_records,
+    run_bulk,
+)
+from app.services.reference_data import load_snapshot
+from app.services.valuation import load_coefficients, use_coefficients
+from app.utils.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Stream a CSV/NDJSON file of properties through the valuation engine.",
+    )
+    parser.add_argument("input", type=Path, help="CSV or NDJSON file of estimate requests")
+    parser.add_argument("output", type=Path, help="Where to write valued rows")
+    parser.add_argument(
+        "--rejects",
+        type=Path,
+        help="Where to write rejected rows (default: <output>.rejects.<ext>)",
+    )
+    parser.add_argument("--input-format", choices=["csv", "ndjson"])
+    parser.add_argument("--output-format", choices=["csv", "ndjson"])
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; 0 uses every CPU core (default: 1, in-process)",
+    )
+    parser.add_argument("--id-field", default="id", help="Input column copied to the output")
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        help="Value at the area prices in effect on this date, YYYY-MM-DD; "
+        "rows with their own as_of column keep it",
+    )
+    parser.add_argument(
+        "--coefficients",
+        default=get_settings().coefficients_path,
+        help="Trained coefficient artifact to value with (default: COEFFICIENTS_PATH)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.as_of is not None and args.as_of > date.today():
+        sys.exit("--as-of cannot be in the future")
+    input_format = detect_format(args.input, args.input_format)
+    output_format = detect_format(args.output, args.output_format)
+    workers = args.workers or os.cpu_count() or 1
+    rejects_path = args.rejects or args.output.with_suffix(f".rejects{args.output.suffix}")
+
+    if args.coefficients:
+        use_coefficients(load_coefficients(args.coefficients))
+    session = SessionLocal()
+    try:
+        reference = load_snapshot(session)
+    finally:
+        session.close()
+    current_year = datetime.now().year
+    if args.as_of is not None:
+        reference = reference.as_of(args.as_of)
+        current_year = args.as_of.year
+
+    with args.input.open(newline="", encoding="utf-8") as source, args.output.open(
+        "w", newline="", encoding="utf-8"
+    ) as output, rejects_path.open("w", newline="", encoding="utf-8") as rejects:
+        stats = run_bulk(
+            read_records(source, input_format),
+            reference,
+            RecordWriter(output, output_format, RESULT_FIELDS),
+            RecordWriter(rejects, output_format, REJECT_FIELDS),
+            current_year=current_year,
+            chunk_size=args.chunk_size,
+            id_field=args.id_field,
+            workers=workers,
+        )
+
+    logging.info(
+        "Valued %s of %s rows (%s rejected to %s) in %.1fs, %.0f rows/sec on %s worker(s)",
+        stats.valued,
+        stats.rows,
+        stats.rejected,
+        rejects_path,
+        stats.elapsed,
+        stats.rows_per_second,
+        workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "us_per_op")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Diff two benchmark.py reports and flag regressions.",
+    )
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change that counts as a regression (default: 10)",
+    )
+    return parser.parse_args()
+
+
+def direction(metric: str) -> Optional[int]:
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def main() -> None:
+    args = parse_args()
+    baseline = json.loads(args.baseline.read_text())["results"]
+    candidate = json.loads(args.candidate.read_text())["results"]
+    regressions = 0
+
+    print(f"{'benchmark':<40} {'metric':<16} {'baseline':>14} {'candidate':>14} {'change':>9}")
+    for name in sorted(set(baseline) | set(candidate)):
+        if name not in baseline or name not in candidate:
+            print(f"{name:<40} {'(only in one report)':<16}")
+            continue
+        for metric, old in baseline[name].items():
+            sign = direction(metric)
+            new = candidate[name].get(metric)
+            if sign is None or new is None or not old:
+                continue
+            change = (new - old) / old * 100
+            regressed = sign * change < -args.threshold
+            regressions += regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<40} {metric:<16} {old:>14,.2f} {new:>14,.2f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"\n{regressions} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
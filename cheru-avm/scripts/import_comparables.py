@@ -0,0 +1,68 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import Base, SessionLocal, engine
+from app.services.bulk import detect_format, read_records
+from app.services.comparable_import import ComparableFileError, import_comparables
+from app.services.migrations import ensure_name_keys
+from app.services.price_import import DEFAULT_BATCH_SIZE
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load recorded sales into comparable_sales for comps valuation.",
+    )
+    parser.add_argument("input", type=Path, help="CSV or NDJSON file of sales")
+    parser.add_argument("--input-format", choices=["csv", "ndjson"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate and report, then roll back",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    input_format = detect_format(args.input, args.input_format)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_name_keys(engine)
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        with args.input.open(newline="", encoding="utf-8") as source:
+            try:
+                report = import_comparables(
+                    session,
+                    read_records(source, input_format),
+                    batch_size=args.batch_size,
+                )
+            except ComparableFileError as exc:
+                session.rollback()
+                logging.error("%s: %s", args.input.name, exc)
+                sys.exit(1)
+        if args.dry_run:
+            session.rollback()
+        else:
+            session.commit()
+        report.elapsed = time.perf_counter() - started
+    finally:
+        session.close()
+
+    print(json.dumps({**report.as_dict(), "dry_run": args.dry_run}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
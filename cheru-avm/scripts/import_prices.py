@@ -0,0 +1,92 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import Base, SessionLocal, engine
+from app.services.migrations import ensure_name_keys, ensure_price_history
+from app.services.price_import import (
+    DEFAULT_BATCH_SIZE,
+    PriceFileError,
+    import_prices,
+    read_price_file,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Upsert area prices and amenity adjustments from CSV/JSON/NDJSON files.",
+    )
+    parser.add_argument("files", type=Path, nargs="+")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--effective-date",
+        type=date.fromisoformat,
+        help="Date the area prices take effect, YYYY-MM-DD (default: today)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would change, then roll back",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    areas, amenities = [], []
+    try:
+        for path in args.files:
+            file_areas, file_amenities = read_price_file(path)
+            areas.extend(file_areas)
+            amenities.extend(file_amenities)
+    except PriceFileError as exc:
+        logging.error("%s", exc)
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_name_keys(engine)
+    ensure_price_history(engine)
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        try:
+            report = import_prices(
+                session,
+                areas,
+                amenities,
+                batch_size=args.batch_size,
+                effective_from=args.effective_date,
+            )
+        except PriceFileError as exc:
+            logging.error("%s", exc)
+            sys.exit(1)
+        if args.dry_run:
+            session.rollback()
+        else:
+            session.commit()
+        report.elapsed = time.perf_counter() - started
+    finally:
+        session.close()
+
+    logging.info(
+        "%s %s area and %s amenity rows in %.2fs",
+        "Checked" if args.dry_run else "Imported",
+        len(areas),
+        len(amenities),
+        report.elapsed,
+    )
+    print(json.dumps({**report.as_dict(), "dry_run": args.dry_run}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+PAYLOADS = [
+    {
+        "property_type": "apartment",
+        "area": "Kilimani",
+        "size_sqm": 120,
+        "year_built": 2016,
+        "amenities": ["Lift", "Pool", "Backup Generator"],
+    },
+    {
+        "property_type": "house",
+        "area": "Karen",
+        "house_size_sqm": 350,
+        "land_size_acres": 0.5,
+        "year_built": 2012,
+        "plot_shape": "normal",
+        "amenities": ["Pool", "Garage", "Solar Panels"],
+    },
+    {
+        "property_type": "land",
+        "area": "Karen",
+        "land_size_acres": 1.2,
+        "plot_shape": "corner",
+    },
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="In-process load test of POST /api/estimate (requires httpx).",
+    )
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--async-db",
+        action="store_true",
+        help="Run with DATABASE_ASYNC=true (async engine and async route)",
+    )
+    return parser.parse_args()
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(total: int, concurrency: int) -> dict:
+    import anyio.to_thread
+    import httpx
+
+    from app.main import app, startup
+
+    startup()
+    # httpx logs every request at INFO, which would dominate the measurement.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    latencies = []
+    failures = 0
+    in_flight = 0
+    peak_in_flight = 0
+    peak_threads = 0
+    queue = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(PAYLOADS[index % len(PAYLOADS)])
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal failures, in_flight, peak_in_flight, peak_threads
+        while not queue.empty():
+            payload = queue.get_nowait()
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            started = time.perf_counter()
+            response = await client.post("/api/estimate", json=payload)
+            latencies.append(time.perf_counter() - started)
+            in_flight -= 1
+            peak_threads = max(peak_threads, limiter.borrowed_tokens)
+            if response.status_code != 200:
+                failures += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "async" if os.environ.get("DATABASE_ASYNC") == "true" else "sync",
+        "requests": total,
+        "concurrency": concurrency,
+        "failures": failures,
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_in_flight": peak_in_flight,
+        "thread_limit": int(limiter.total_tokens),
+        "peak_threads_borrowed": peak_threads,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.async_db:
+        os.environ["DATABASE_ASYNC"] = "true"
+    print(json.dumps(asyncio.run(run(args.requests, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,10 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from sqlalchemy.orm import Session
-
+import app.services.reference_data  # noqa: F401  (publishes cache invalidation on commit)
 from app.database import Base, SessionLocal, engine
-from app.models import Amenity, Area
+from app.services.migrations import ensure_name_keys, ensure_price_history
+from app.services.price_import import import_prices, parse_amenity, parse_area
 
 logging.basicConfig(level=logging.INFO)
 
@@ -53,53 +53,19 @@ AMENITIES = [
 ]
 
 
-
-def upsert_areas(session: Session) -> None:
-    for area in AREAS:
-        existing = session.query(Area).filter(Area.name == area["name"]).one_or_none()
-        if existing:
-            existing.land_price_per_acre = area["land"]
-            existing.apartment_price_per_sqm = area["apartment"]
-            existing.house_price_per_sqm = area["house"]
-        else:
-            session.add(
-                Area(
-                    name=area["name"],
-                    land_price_per_acre=area["land"],
-                    apartment_price_per_sqm=area["apartment"],
-                    house_price_per_sqm=area["house"],
-                )
-            )
-
-
-def upsert_amenities(session: Session) -> None:
-    for amenity in AMENITIES:
-        existing = (
-            session.query(Amenity)
-            .filter(Amenity.name == amenity["name"])
-            .filter(Amenity.property_type == amenity["property_type"])
-            .one_or_none()
-        )
-        if existing:
-            existing.value_percent = amenity["value"]
-        else:
-            session.add(
-                Amenity(
-                    name=amenity["name"],
-                    property_type=amenity["property_type"],
-                    value_percent=amenity["value"],
-                )
-            )
-
-
 def main() -> None:
     Base.metadata.create_all(bind=engine)
+    ensure_name_keys(engine)
+    ensure_price_history(engine)
     session = SessionLocal()
     try:
-        upsert_areas(session)
-        upsert_amenities(session)
+        report = import_prices(
+            session,
+            [parse_area(area) for area in AREAS],
+            [parse_amenity(amenity) for amenity in AMENITIES],
+        )
         session.commit()
-        logging.info("Seeded areas and amenities successfully.")
+        logging.info("Seeded areas and amenities successfully: %s", report.as_dict())
     finally:
         session.close()
 
@@ -0,0 +1,100 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import SessionLocal
+from app.services.bulk import detect_format
+from app.services.reference_data import load_snapshot
+from app.services.training import (
+    DEFAULT_MIN_ROWS,
+    TrainingStats,
+    build_artifact,
+    collect_columns,
+    transaction_chunks,
+    train,
+    training_context,
+    write_artifact,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fit area prices, amenity uplifts and depreciation curves from sales.",
+    )
+    parser.add_argument("input", type=Path, help="CSV or NDJSON file of transactions")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("coefficients"),
+        help="Directory the versioned artifact is written to (default: ./coefficients)",
+    )
+    parser.add_argument("--input-format", choices=["csv", "ndjson"])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes parsing the file; 0 uses every CPU core (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=DEFAULT_MIN_ROWS,
+        help="Sales needed before a coefficient replaces the stored value",
+    )
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="Only use sales on or after this date, YYYY-MM-DD",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    input_format = detect_format(args.input, args.input_format)
+    workers = args.workers or os.cpu_count() or 1
+
+    session = SessionLocal()
+    try:
+        reference = load_snapshot(session)
+    finally:
+        session.close()
+
+    stats = TrainingStats()
+    with args.input.open(newline="", encoding="utf-8") as source:
+        columns = collect_columns(
+            transaction_chunks(source, input_format, args.chunk_size),
+            training_context(reference, since=args.since),
+            stats,
+            workers=workers,
+        )
+    if not columns:
+        sys.exit("No usable transactions")
+    fits = train(columns, reference, stats, min_rows=args.min_rows)
+    artifact = build_artifact(fits, reference, stats, args.input.name, min_rows=args.min_rows)
+    path = write_artifact(artifact, args.output_dir)
+
+    logging.info(
+        "Fitted %s on %s of %s rows (parse %.1fs, fit %.2fs); skipped %s",
+        ", ".join(f"{count} {kind}" for kind, count in stats.used.items()),
+        sum(stats.used.values()),
+        stats.rows,
+        stats.parse_seconds,
+        stats.fit_seconds,
+        dict(stats.skipped) or "none",
+    )
+    logging.info("Wrote %s (version %s)", path, artifact["version"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# Settings are read at import time; keep tests off the local development database.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from anyio import to_thread
+
+from app.schemas.estimate import EstimateBreakdown, EstimateResponse
+from app.services.reference_data import ReferenceSnapshot
+from app.services.result_cache import EstimateResultCache
+from app.utils.admission import AdmissionController, AdmissionShed
+
+REFERENCE = ReferenceSnapshot([], [], version=1, loaded_at=0.0)
+
+
+def _estimate() -> EstimateResponse:
+    return EstimateResponse(
+        property_type="land",
+        area="Karen",
+        estimated_value=1.0,
+        value=1.0,
+        low_estimate=1.0,
+        high_estimate=1.0,
+        breakdown=EstimateBreakdown(),
+        confidence_score=0.5,
+        disclaimer="",
+    )
+
+
+def test_cache_hits_are_served_while_admission_is_saturated():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    cache = EstimateResultCache(max_entries=10, ttl_seconds=60, admission=controller)
+    builds = []
+
+    def build() -> EstimateResponse:
+        builds.append(None)
+        return _estimate()
+
+    async def main():
+        cached = await cache.get_or_build_async(("hit",), REFERENCE, build)
+        assert controller.in_flight == 0
+
+        # Another request holds the only slot and nobody may queue.
+        assert await controller.acquire() is None
+        assert await cache.get_or_build_async(("hit",), REFERENCE, build) is cached
+        assert await to_thread.run_sync(cache.get_or_build, ("hit",), REFERENCE, build) is cached
+        with pytest.raises(AdmissionShed) as shed:
+            await cache.get_or_build_async(("miss",), REFERENCE, build)
+        assert shed.value.reason == "queue_full"
+        with pytest.raises(AdmissionShed):
+            await to_thread.run_sync(cache.get_or_build, ("miss",), REFERENCE, build)
+
+        controller.release()
+        await to_thread.run_sync(cache.get_or_build, ("miss",), REFERENCE, build)
+
+    asyncio.run(main())
+    assert len(builds) == 2
+    assert (controller.in_flight, controller.admitted, controller.shed["queue_full"]) == (0, 3, 2)
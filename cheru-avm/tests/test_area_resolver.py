@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+from app.services.area_resolver import AreaResolver, AreaSuggestion, unknown_area_message
+from app.services.reference_data import AreaRecord
+
+NAMES = (
+    "Karen",
+    "Kilimani",
+    "Kileleshwa",
+    "Upper Hill",
+    "Spring Valley",
+    "Nairobi West",
+    "Westlands",
+    "Lavington",
+    "Lang'ata",
+    "Parklands",
+)
+
+
+@pytest.fixture(scope="module")
+def resolver() -> AreaResolver:
+    return AreaResolver(AreaRecord(uuid.uuid4(), name, 1e7, 1e5, 1e5) for name in NAMES)
+
+
+@pytest.mark.parametrize(
+    "query, name, method",
+    [
+        ("  KAREN ", "Karen", "exact"),
+        ("Langata", "Lang'ata", "exact"),
+        ("upperhill", "Upper Hill", "alias"),
+        ("Highridge", "Parklands", "alias"),
+        ("Kileleshwa Estate", "Kileleshwa", "token"),
+        ("Nairobi West, Nairobi", "Nairobi West", "token"),
+        ("house in upper hill area nairobi", "Upper Hill", "token"),
+        ("Kilimanni", "Kilimani", "fuzzy"),
+        ("Lavigton", "Lavington", "fuzzy"),
+        ("Westalnds", "Westlands", "fuzzy"),
+        ("Spring Vally Estate", "Spring Valley", "fuzzy"),
+    ],
+)
+def test_resolves(resolver, query, name, method):
+    match = resolver.resolve(query)
+    assert (match.area.name, match.method, match.suggestions) == (name, method, [])
+
+
+def test_miss_returns_ranked_suggestions(resolver):
+    match = resolver.resolve("Kilelshwani")
+    assert (match.area, match.method) == (None, None)
+    names = [suggestion.name for suggestion in match.suggestions]
+    assert names[0] == "Kileleshwa"
+    assert "Kilimani" in names
+    scores = [suggestion.score for suggestion in match.suggestions]
+    assert scores == sorted(scores, reverse=True)
+    assert unknown_area_message(match).startswith("Unknown area. Did you mean: Kileleshwa")
+
+
+def test_ambiguous_phrase_is_not_guessed(resolver):
+    # Two different areas named in one query: neither wins.
+    match = resolver.resolve("Karen or Kilimani")
+    assert match.area is None
+    assert {"Karen", "Kilimani"} <= {suggestion.name for suggestion in match.suggestions}
+
+
+def test_nothing_alike_has_no_suggestions(resolver):
+    match = resolver.resolve("zzqx")
+    assert (match.area, match.suggestions) == (None, [])
+    assert unknown_area_message(match) == "Unknown area"
+
+
+def test_suggest_orders_prefix_word_then_fuzzy(resolver):
+    assert resolver.suggest("ki") == [
+        AreaSuggestion("Kileleshwa", "prefix", 1.0),
+        AreaSuggestion("Kilimani", "prefix", 1.0),
+    ]
+    assert resolver.suggest("west") == [
+        AreaSuggestion("Westlands", "prefix", 1.0),
+        AreaSuggestion("Nairobi West", "word", 0.9),
+    ]
+    fuzzy = resolver.suggest("lavingtn")
+    assert fuzzy[0].name == "Lavington" and fuzzy[0].match == "fuzzy"
+    assert resolver.suggest("k", limit=1) == [AreaSuggestion("Karen", "prefix", 1.0)]
+    assert resolver.suggest("", limit=5) == []
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.services.backtest import BacktestReport, Engine, backtest_chunks
+from app.services.bulk import chunked
+from app.services.reference_data import AreaRecord, ReferenceSnapshot
+
+CURRENT_YEAR = 2025
+KAREN = uuid.uuid4()
+# One-acre normal plots, so each engine estimates exactly its price per acre.
+SALE = {"property_type": "land", "area": "Karen", "land_size_acres": 1, "plot_shape": "normal"}
+PRICES = (1_000_000, 1_250_000, 800_000, 2_000_000)
+
+
+def _engine(name: str, land_price_per_acre: float) -> Engine:
+    area = AreaRecord(KAREN, "Karen", land_price_per_acre, 1.5e5, 1.2e5)
+    return Engine(name, ReferenceSnapshot([area], [], version=1, loaded_at=0.0))
+
+
+def _rows():
+    rows = [{**SALE, "price": price} for price in PRICES]
+    rows.insert(2, {**SALE, "price": "n/a"})
+    return list(enumerate(rows, start=1))
+
+
+def test_metrics_for_two_engines_side_by_side():
+    engines = [_engine("baseline", 1_000_000), _engine("candidate", 1_200_000)]
+    report = BacktestReport(engines)
+    for result in backtest_chunks(chunked(_rows(), 2), engines, CURRENT_YEAR):
+        report.add(result)
+    results = report.as_dict()
+
+    assert (results["rows"], results["valued"], results["rejected"]) == (5, 4, 1)
+    assert results["reject_reasons"] == {"Missing or invalid price": 1}
+    # Baseline estimates 1.0M: absolute errors 0, 250k, 200k, 1M, percent
+    # errors 0, 20, 25, 50; only the 1.0M sale is within 10%.
+    # Candidate estimates 1.2M: absolute errors 200k, 50k, 400k, 800k,
+    # percent errors 20, 4, 50, 40; only the 1.25M sale is within 10%.
+    expected = {
+        "baseline": {"mape": 23.75, "median_absolute_error": 225_000, "hit_rate": 25.0},
+        "candidate": {"mape": 28.5, "median_absolute_error": 300_000, "hit_rate": 25.0},
+    }
+    for name, metrics in expected.items():
+        assert results["overall"][name] == pytest.approx(metrics)
+        assert results["property_types"]["land"][name] == pytest.approx(metrics)
+    [area] = results["areas"]
+    assert (area["property_type"], area["area"], area["rows"]) == ("land", "Karen", 4)
+    assert area["candidate"] == pytest.approx(expected["candidate"])
+    assert [engine["name"] for engine in results["engines"]] == ["baseline", "candidate"]
+
+
+def test_band_edges_count_as_hits():
+    engines = [_engine("baseline", 1_000_000)]
+    rows = [(1, {**SALE, "price": 900_000}), (2, {**SALE, "price": 1_100_000})]
+    report = BacktestReport(engines)
+    for result in backtest_chunks([rows], engines, CURRENT_YEAR):
+        report.add(result)
+    assert report.as_dict()["overall"]["baseline"]["hit_rate"] == 100.0
@@ -0,0 +1,85 @@
+import io
+import json
+import uuid
+
+import pytest
+
+from app.services.bulk import REJECT_FIELDS, RESULT_FIELDS, RecordWriter, read_records, run_bulk
+from app.services.reference_data import AmenityRecord, AreaRecord, ReferenceSnapshot
+
+CURRENT_YEAR = 2025
+LAND = {"property_type": "land", "area": "Karen", "land_size_acres": 0.5, "plot_shape": "corner"}
+APARTMENT = {
+    "property_type": "apartment",
+    "area": "Kilimani",
+    "size_sqm": 120,
+    "year_built": 2012,
+    "amenities": ["Lift", "Pool"],
+}
+HOUSE = {
+    "property_type": "house",
+    "area": "Karen",
+    "house_size_sqm": 300,
+    "land_size_acres": 0.75,
+    "year_built": 2001,
+    "plot_shape": "normal",
+    "amenities": ["Garden"],
+}
+BAD_ROWS = [
+    "{not json",
+    json.dumps({**LAND, "area": "Atlantis"}),
+    json.dumps({**APARTMENT, "size_sqm": -5}),
+    json.dumps({**HOUSE, "year_built": CURRENT_YEAR + 10}),
+    json.dumps(["not", "an", "object"]),
+]
+
+
+def _reference() -> ReferenceSnapshot:
+    areas = [
+        AreaRecord(uuid.uuid4(), "Karen", 5e7, 1.5e5, 1.2e5),
+        AreaRecord(uuid.uuid4(), "Kilimani", 9e7, 2.2e5, 1.8e5),
+    ]
+    amenities = [
+        AmenityRecord(uuid.uuid4(), "Lift", "apartment", 0.03),
+        AmenityRecord(uuid.uuid4(), "Pool", "apartment", 0.05),
+        AmenityRecord(uuid.uuid4(), "Garden", "house", 0.04),
+    ]
+    return ReferenceSnapshot(areas, amenities, version=1, loaded_at=0.0)
+
+
+def _lines() -> str:
+    lines = []
+    for index in range(40):
+        record = (LAND, APARTMENT, HOUSE)[index % 3]
+        record = {**record, "id": f"p{index}", "land_size_acres": 0.1 + index / 100}
+        if record["property_type"] == "apartment":
+            del record["land_size_acres"]
+        lines.append(json.dumps(record))
+        if index % 8 == 3:
+            lines.append(BAD_ROWS[index // 8])
+    return "\n".join(lines) + "\n"
+
+
+def _run(fmt: str, workers: int):
+    results, rejects = io.StringIO(), io.StringIO()
+    stats = run_bulk(
+        read_records(io.StringIO(_lines()), "ndjson"),
+        _reference(),
+        RecordWriter(results, fmt, RESULT_FIELDS),
+        RecordWriter(rejects, fmt, REJECT_FIELDS),
+        CURRENT_YEAR,
+        chunk_size=7,
+        workers=workers,
+    )
+    return stats, results.getvalue(), rejects.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_worker_pool_output_matches_in_process(fmt):
+    stats, results, rejects = _run(fmt, workers=1)
+    assert (stats.rows, stats.valued, stats.rejected) == (45, 40, 5)
+
+    pooled_stats, pooled_results, pooled_rejects = _run(fmt, workers=2)
+    assert (pooled_stats.rows, pooled_stats.valued, pooled_stats.rejected) == (45, 40, 5)
+    assert pooled_results == results
+    assert pooled_rejects == rejects
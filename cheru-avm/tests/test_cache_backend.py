@@ -0,0 +1,95 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from app.services.cache_backend import (
+    INVALIDATION_CHANNEL,
+    REFERENCE_SNAPSHOT_KEY,
+    CacheBackend,
+    LocalCacheBackend,
+    RedisCacheBackend,
+)
+from app.services.reference_data import ReferenceDataCache, ReferenceSnapshot
+
+WAIT_SECONDS = 5.0
+
+
+@pytest.fixture
+def workers():
+    # Two workers sharing one Redis server, each with its own client.
+    server = fakeredis.FakeServer()
+    backends = [
+        RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="test", lock_timeout=2.0)
+        for _ in range(2)
+    ]
+    yield backends
+    for backend in backends:
+        backend.close()
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend("test", 1.0)
+    LocalCacheBackend("test", 1.0)
+
+
+def test_publish_invalidates_other_workers(workers):
+    publisher, subscriber = workers
+    cache = ReferenceDataCache(ttl_seconds=60, backend=subscriber)
+    cache._snapshot = ReferenceSnapshot([], [], version=1, loaded_at=0.0)
+    cache._expires_at = time.monotonic() + 60
+    received = threading.Event()
+
+    def on_invalidation(message: str) -> None:
+        if message == REFERENCE_SNAPSHOT_KEY:
+            cache.invalidate()
+            received.set()
+
+    subscriber.subscribe(INVALIDATION_CHANNEL, on_invalidation)
+    assert cache.fresh_snapshot() is not None
+    # The listener thread subscribes asynchronously; publish until it hears.
+    deadline = time.monotonic() + WAIT_SECONDS
+    while not received.wait(0.05) and time.monotonic() < deadline:
+        publisher.publish(INVALIDATION_CHANNEL, REFERENCE_SNAPSHOT_KEY)
+
+    assert received.is_set()
+    assert cache.fresh_snapshot() is None
+
+
+def test_lock_holder_computes_and_followers_wait(workers):
+    leader, follower = workers
+    computing = threading.Event()
+    finish = threading.Event()
+
+    def slow_compute() -> str:
+        computing.set()
+        finish.wait(WAIT_SECONDS)
+        return "leader"
+
+    results = {}
+    thread = threading.Thread(
+        target=lambda: results.setdefault("leader", leader.get_or_compute("key", slow_compute, 60))
+    )
+    thread.start()
+    assert computing.wait(WAIT_SECONDS)
+    # The leader holds the SET NX lock; release it shortly after the follower starts waiting.
+    threading.Timer(0.1, finish.set).start()
+
+    value = follower.get_or_compute("key", lambda: "follower", 60)
+    thread.join(WAIT_SECONDS)
+
+    assert value == results["leader"] == "leader"
+    assert (leader.computes, follower.computes, follower.coalesced) == (1, 0, 1)
+    assert leader.client.get("test:lock:key") is None
+
+
+def test_follower_computes_when_the_lock_holder_never_finishes(workers):
+    stalled, follower = workers
+    follower.lock_timeout = 0.05
+    assert stalled._acquire("key") is not None
+
+    assert follower.get_or_compute("key", lambda: "follower", 60) == "follower"
+    assert follower.computes == 1
+    assert stalled.get("key") == "follower"
@@ -0,0 +1,69 @@
+import random
+import uuid
+from datetime import date
+
+import numpy as np
+
+from app.services.comparables import (
+    MAX_DISTANCE,
+    ComparableRecord,
+    ComparableSet,
+    comparable_features,
+)
+from app.services.kdtree import KDTree
+
+TARGET = (-1.2864, 36.8172)
+
+
+def _brute_force(points, point, k, max_distance, allowed):
+    distances = np.sqrt(((points - point) ** 2).sum(axis=1))
+    keep = np.flatnonzero((distances <= max_distance) & allowed)
+    ranked = keep[np.argsort(distances[keep], kind="stable")][:k]
+    return distances[ranked], ranked
+
+
+def test_query_applies_distance_and_mask_inside_the_search():
+    rng = np.random.default_rng(5)
+    points = rng.normal(size=(5_000, 3)) * 4
+    tree = KDTree(points, leaf_size=16)
+    for _ in range(50):
+        point = rng.normal(size=3) * 4
+        allowed = rng.random(len(points)) < rng.choice([0.01, 0.2, 1.0])
+        for k in (1, 10, 200):
+            distances, positions = tree.query(point, k, 3.0, allowed)
+            expected_distances, expected_positions = _brute_force(points, point, k, 3.0, allowed)
+            np.testing.assert_allclose(distances, expected_distances)
+            np.testing.assert_array_equal(np.sort(positions), np.sort(expected_positions))
+
+
+def _sale(rng: random.Random, offset_km: float, sold_on: date) -> ComparableRecord:
+    bearing = rng.uniform(0, 2 * np.pi)
+    return ComparableRecord(
+        id=uuid.uuid4(),
+        property_type="apartment",
+        area_id=None,
+        latitude=TARGET[0] + offset_km * np.sin(bearing) / 111.32,
+        longitude=TARGET[1] + offset_km * np.cos(bearing) / 111.32,
+        size_sqm=100.0,
+        land_size_acres=None,
+        year_built=2015,
+        price=15_000_000.0,
+        sold_on=sold_on,
+    )
+
+
+def test_as_of_finds_older_sales_behind_a_cluster_of_recent_ones():
+    # 500 recent sales right at the target hide the 10 older ones a few
+    # km out; a fixed over-fetch of the nearest neighbours would miss them.
+    rng = random.Random(3)
+    recent = [_sale(rng, rng.uniform(0, 0.5), date(2024, 6, 1)) for _ in range(500)]
+    older = [_sale(rng, rng.uniform(2, 4), date(2019, 3, 1)) for _ in range(10)]
+    comparables = ComparableSet("apartment", recent + older)
+    features = comparable_features("apartment", *TARGET, size_sqm=100.0, year_built=2015)
+
+    distances, positions = comparables.nearest(features, 10, sold_by=date(2020, 1, 1))
+
+    assert sorted(positions.tolist()) == list(range(500, 510))
+    assert (np.diff(distances) >= 0).all()
+    assert (distances <= MAX_DISTANCE).all()
+    assert len(comparables.nearest(features, 10, sold_by=date(2018, 1, 1))[0]) == 0
@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base
+from app.models import EstimateLog
+from app.schemas.estimate import EstimateBreakdown, EstimateResponse, LandEstimateRequest
+from app.services import estimate_log as estimate_log_module
+from app.services.estimate_log import BACKLOG_REASON, EstimateLogFull, EstimateLogWriter
+from app.services.readiness import Readiness
+from app.utils.config import Settings
+
+REQUEST = LandEstimateRequest(area="Karen", land_size_acres=0.5, plot_shape="normal")
+RESPONSE = EstimateResponse(
+    property_type="land",
+    area="Karen",
+    estimated_value=1.0,
+    value=1.0,
+    low_estimate=1.0,
+    high_estimate=1.0,
+    breakdown=EstimateBreakdown(),
+    confidence_score=0.5,
+    disclaimer="",
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+    Base.metadata.create_all(bind=engine, tables=[EstimateLog.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def status():
+    status = Readiness()
+    status.mark_ready()
+    return status
+
+
+def _writer(bind, status=None, **options) -> EstimateLogWriter:
+    settings = {"batch_size": 4, "flush_seconds": 60.0, "max_queue": 10}
+    settings.update(options)
+    return EstimateLogWriter(bind, status=status, **settings)
+
+
+def _logged(engine) -> int:
+    with engine.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(EstimateLog.__table__))
+
+
+def test_batches_are_split_into_queue_sized_entries(engine):
+    writer = _writer(engine)
+    writer.record_many("batch", [(REQUEST, RESPONSE)] * 10)
+    assert [len(entry.items) for entry in writer._queue] == [4, 4, 2]
+    assert writer.depth == 10
+
+
+def test_full_queue_refuses_the_request_and_flips_readiness(engine, status):
+    writer = _writer(engine, status)
+    writer.record_many("batch", [(REQUEST, RESPONSE)] * 9)
+
+    with pytest.raises(EstimateLogFull):
+        writer.record_many("batch", [(REQUEST, RESPONSE)] * 2)
+    # Nothing of the refused request is queued; it is not served either.
+    assert (writer.depth, writer.refused, writer.dropped) == (9, 2, 0)
+    assert (status.ready, status.reason) == (False, BACKLOG_REASON)
+    writer.record("estimate", REQUEST, RESPONSE)
+
+    writer.start()
+    writer.drain(timeout=10)
+    assert _logged(engine) == 10
+    assert status.ready
+
+
+def test_drain_writes_everything_queued_on_shutdown(engine):
+    writer = _writer(engine, max_queue=100)
+    writer.start()
+    for _ in range(7):
+        writer.record("estimate", REQUEST, RESPONSE)
+    # flush_seconds is a minute: only the drain can have written the tail.
+    writer.drain(timeout=10)
+    assert writer._thread is None
+    assert (_logged(engine), writer.written, writer.depth) == (7, 7, 0)
+
+
+class _FlakyBind:
+    def __init__(self, engine, failures: int) -> None:
+        self.engine = engine
+        self.failures = failures
+
+    def begin(self):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("INSERT", {}, Exception("database is unavailable"))
+        return self.engine.begin()
+
+
+def test_unreachable_database_is_retried(engine, monkeypatch):
+    monkeypatch.setattr(estimate_log_module, "RETRY_DELAY_SECONDS", 0.001)
+    writer = _writer(_FlakyBind(engine, failures=3))
+    writer.start()
+    writer.record_many("batch", [(REQUEST, RESPONSE)] * 5)
+    writer.drain(timeout=10)
+    assert (writer.failed_writes, writer.written, writer.dropped) == (3, 5, 0)
+    assert _logged(engine) == 5
+
+
+def test_queue_must_hold_a_full_batch():
+    with pytest.raises(ValueError):
+        Settings(estimate_log_max_queue=100, estimate_batch_max_items=1_000)
+    Settings(estimate_log_max_queue=100, estimate_batch_max_items=1_000, estimate_log_enabled=False)
@@ -0,0 +1,35 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.routes.estimate import create_estimate_batch
+from app.schemas.estimate import BatchEstimateRequest, LandEstimateRequest, parse_estimate_request
+from app.services.reference_data import AreaRecord, ReferenceSnapshot
+
+LAND = {"property_type": "land", "area": "Karen", "land_size_acres": 0.5, "plot_shape": "normal"}
+
+
+@pytest.mark.parametrize("property_type", [None, "castle", ["land"], {"type": "land"}, 3])
+def test_unsupported_property_type_is_a_validation_error(property_type):
+    data = {**LAND, "property_type": property_type}
+    if property_type is None:
+        del data["property_type"]
+    with pytest.raises(ValidationError) as exc:
+        parse_estimate_request(data)
+    assert exc.value.errors()[0]["loc"] == ("property_type",)
+
+
+def test_property_type_selects_the_model():
+    assert isinstance(parse_estimate_request(LAND), LandEstimateRequest)
+
+
+def test_non_object_batch_items_fail_alone():
+    reference = ReferenceSnapshot(
+        [AreaRecord(uuid.uuid4(), "Karen", 5e7, 1.5e5, 1.2e5)], [], version=1, loaded_at=0.0
+    )
+    payload = BatchEstimateRequest(items=[LAND, "land", None, [LAND], {**LAND, "area": "Nowhere"}])
+    response = create_estimate_batch(payload, reference)
+    assert [item.status_code for item in response.results] == [200, 422, 422, 422, 400]
+    assert response.results[1].error == "Item must be a JSON object"
+    assert (response.succeeded, response.failed) == (1, 4)
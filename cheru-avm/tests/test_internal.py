@@ -0,0 +1,30 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import internal
+from app.routes.internal import INTERNAL_TOKEN_HEADER
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(internal.router, prefix="/internal")
+    return TestClient(app)
+
+
+def test_internal_endpoints_are_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(internal.settings, "internal_api_token", None)
+    assert client.get("/internal/admission").status_code == 404
+    assert client.delete("/internal/estimate-cache").status_code == 404
+
+
+def test_internal_endpoints_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(internal.settings, "internal_api_token", "s3cret")
+    for headers in ({}, {INTERNAL_TOKEN_HEADER: "guess"}):
+        assert client.get("/internal/admission", headers=headers).status_code == 401
+        assert client.delete("/internal/estimate-cache", headers=headers).status_code == 401
+
+    response = client.get("/internal/admission", headers={INTERNAL_TOKEN_HEADER: "s3cret"})
+    assert response.status_code == 200
+    assert "in_flight" in response.json()
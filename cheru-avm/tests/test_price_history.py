@@ -0,0 +1,162 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Area, AreaPrice
+from app.routes.estimate import _get_area
+from app.services.migrations import LEGACY_HISTORY_START, ensure_price_history
+from app.services.price_history import AreaPriceRecord
+from app.services.price_import import import_prices, parse_area
+from app.services.reference_data import AreaRecord, ReferenceSnapshot, load_snapshot
+from app.services.valuation import COEFFICIENTS_FORMAT, parse_coefficients, use_coefficients
+
+TODAY = date.today()
+PRICES = {
+    "land_price_per_acre": 50_000_000,
+    "apartment_price_per_sqm": 150_000,
+    "house_price_per_sqm": 120_000,
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _add_area(engine, name: str) -> uuid.UUID:
+    with Session(engine) as session:
+        area = Area(name=name, name_key=name.lower(), **PRICES)
+        session.add(area)
+        session.commit()
+        return area.id
+
+
+def _history(engine, area_id: uuid.UUID):
+    with Session(engine) as session:
+        return session.execute(
+            select(AreaPrice.effective_from, AreaPrice.land_price_per_acre)
+            .where(AreaPrice.area_id == area_id)
+            .order_by(AreaPrice.effective_from)
+        ).all()
+
+
+def test_baseline_history_starts_when_it_is_recorded(engine):
+    area_id = _add_area(engine, "Karen")
+    ensure_price_history(engine)
+    ensure_price_history(engine)
+    assert [row.effective_from for row in _history(engine, area_id)] == [TODAY]
+
+
+def test_legacy_baseline_rows_move_to_when_they_were_recorded(engine):
+    recorded = datetime(2024, 3, 5, 10, 30)
+    moved = _add_area(engine, "Karen")
+    dropped = _add_area(engine, "Kilimani")
+    with Session(engine) as session:
+        for area_id in (moved, dropped):
+            session.add(
+                AreaPrice(
+                    area_id=area_id,
+                    effective_from=LEGACY_HISTORY_START,
+                    created_at=recorded,
+                    **PRICES,
+                )
+            )
+        # A backdated import already priced Kilimani before the baseline was recorded.
+        session.add(AreaPrice(area_id=dropped, effective_from=date(2023, 1, 1), **PRICES))
+        session.commit()
+
+    ensure_price_history(engine)
+
+    assert [row.effective_from for row in _history(engine, moved)] == [date(2024, 3, 5)]
+    assert [row.effective_from for row in _history(engine, dropped)] == [date(2023, 1, 1)]
+
+
+def test_backdated_import_without_history_keeps_current_prices_from_today(engine):
+    area_id = _add_area(engine, "Karen")
+    backdated = TODAY - timedelta(days=400)
+    with Session(engine) as session:
+        row = parse_area({"name": "Karen", **PRICES, "land_price_per_acre": 40_000_000})
+        import_prices(session, [row], [], effective_from=backdated)
+        session.commit()
+        current = session.get(Area, area_id)
+        assert current.land_price_per_acre == PRICES["land_price_per_acre"]
+
+    assert [tuple(row) for row in _history(engine, area_id)] == [
+        (backdated, 40_000_000),
+        (TODAY, PRICES["land_price_per_acre"]),
+    ]
+
+
+def test_import_effective_today_replaces_the_baseline(engine):
+    area_id = _add_area(engine, "Karen")
+    with Session(engine) as session:
+        row = parse_area({"name": "Karen", **PRICES, "land_price_per_acre": 60_000_000})
+        import_prices(session, [row], [])
+        session.commit()
+    assert [tuple(row) for row in _history(engine, area_id)] == [(TODAY, 60_000_000)]
+
+
+def test_as_of_before_history_is_rejected():
+    area = AreaRecord(uuid.uuid4(), "Karen", 5e7, 1.5e5, 1.2e5)
+    starts = date(2024, 6, 1)
+    reference = ReferenceSnapshot(
+        [area],
+        [],
+        version=1,
+        loaded_at=0.0,
+        prices=[AreaPriceRecord(area.id, starts, 5e7, 1.5e5, 1.2e5)],
+    )
+
+    assert _get_area(reference.as_of(starts), "Karen").id == area.id
+    with pytest.raises(HTTPException) as exc:
+        _get_area(reference.as_of(date(2024, 5, 31)), "Karen")
+    assert exc.value.status_code == 422
+    assert exc.value.detail == (
+        "No prices recorded for Karen as of 2024-05-31; its price history starts on 2024-06-01"
+    )
+
+
+def test_as_of_keeps_trained_prices_and_moves_them_with_history(engine):
+    area_id = _add_area(engine, "Karen")
+    year_ago = TODAY - timedelta(days=365)
+    with Session(engine) as session:
+        history = ((year_ago, 100_000), (TODAY, PRICES["apartment_price_per_sqm"]))
+        for effective_from, apartment in history:
+            session.add(
+                AreaPrice(
+                    area_id=area_id,
+                    effective_from=effective_from,
+                    **{**PRICES, "apartment_price_per_sqm": apartment},
+                )
+            )
+        session.commit()
+    trained = parse_coefficients(
+        {
+            "format": COEFFICIENTS_FORMAT,
+            "version": "test",
+            "areas": {"Karen": {"apartment_price_per_sqm": 180_000}},
+        }
+    )
+    use_coefficients(trained)
+    try:
+        with Session(engine) as session:
+            reference = load_snapshot(session)
+    finally:
+        use_coefficients(None)
+
+    today = reference.as_of(TODAY).area("Karen")
+    assert today == reference.area("Karen")
+    assert today.apartment_price_per_sqm == 180_000
+    earlier = reference.as_of(year_ago).area("Karen")
+    # Trained price scaled by the stored history's change; untrained fields
+    # take the stored history as before.
+    assert earlier.apartment_price_per_sqm == pytest.approx(180_000 * 100_000 / 150_000)
+    assert earlier.land_price_per_acre == PRICES["land_price_per_acre"]
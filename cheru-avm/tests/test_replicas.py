@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, select
+
+import app.database as database
+from app.database import Base, ReadSessionLocal, run_read
+from app.models import Area
+from app.utils.replicas import ReplicaRouter
+
+
+def _database(path, area_name: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[Area.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            Area.__table__.insert().values(
+                name=area_name,
+                name_key=area_name.lower(),
+                land_price_per_acre=1,
+                apartment_price_per_sqm=1,
+                house_price_per_sqm=1,
+            )
+        )
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    engine = _database(tmp_path / "primary.db", "Primary")
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def _route(monkeypatch, primary, replica) -> ReplicaRouter:
+    router = ReplicaRouter(primary, [replica], retry_seconds=60)
+    monkeypatch.setattr(database, "replica_router", router)
+    return router
+
+
+def _read_area_name() -> str:
+    with ReadSessionLocal() as session:
+        return run_read(session, lambda read: read.scalar(select(Area.name)))
+
+
+def test_reads_go_to_the_replica(tmp_path, monkeypatch, primary):
+    replica = _database(tmp_path / "replica.db", "Replica")
+    _route(monkeypatch, primary, replica)
+
+    assert _read_area_name() == "Replica"
+    with ReadSessionLocal() as session:
+        session.info["pin_primary"] = True
+        assert session.scalar(select(Area.name)) == "Primary"
+    replica.dispose()
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(
+    tmp_path, monkeypatch, primary
+):
+    # A file in a missing directory cannot be opened, like an unreachable server.
+    replica = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = _route(monkeypatch, primary, replica)
+
+    assert _read_area_name() == "Primary"
+    assert router.failovers == 1
+    assert router.status()[0]["healthy"] is False
+    # The replica is skipped until its retry time, without another failover.
+    assert _read_area_name() == "Primary"
+    assert router.failovers == 1
+
+
+def test_read_sessions_refuse_writes(tmp_path, monkeypatch, primary):
+    _route(monkeypatch, primary, _database(tmp_path / "replica.db", "Replica"))
+    with ReadSessionLocal() as session:
+        session.add(
+            Area(
+                name="New",
+                land_price_per_acre=1,
+                apartment_price_per_sqm=1,
+                house_price_per_sqm=1,
+            )
+        )
+        with pytest.raises(RuntimeError):
+            session.flush()
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.estimate import EstimateBreakdown, EstimateResponse
+from app.services.cache_backend import LocalCacheBackend
+from app.services.reference_data import ReferenceSnapshot
+from app.services.result_cache import EstimateResultCache
+from app.utils.single_flight import AsyncSingleFlight
+
+CALLERS = 5
+
+
+async def _ticking(awaitable, ticks: list):
+    # Counts how often the loop ran something else while ``awaitable`` was pending.
+    async def tick() -> None:
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.ensure_future(tick())
+    try:
+        return await awaitable
+    finally:
+        ticker.cancel()
+
+
+def test_concurrent_callers_await_one_compute():
+    flights = AsyncSingleFlight()
+    calls = []
+    ticks = []
+
+    async def compute() -> str:
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        callers = [flights.do("key", compute) for _ in range(CALLERS)]
+        return await _ticking(asyncio.gather(*callers), ticks)
+
+    assert asyncio.run(main()) == ["value"] * CALLERS
+    assert len(calls) == 1
+    assert (flights.leaders, flights.coalesced, flights.in_flight) == (1, CALLERS - 1, 0)
+    assert len(ticks) > 5
+
+
+def test_callers_share_the_error():
+    flights = AsyncSingleFlight()
+
+    async def compute() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            *(flights.do("key", compute) for _ in range(CALLERS)),
+            return_exceptions=True,
+        )
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flights.in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flights = AsyncSingleFlight()
+
+    async def compute() -> str:
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "value"
+    assert flights.leaders == 1
+
+
+def test_result_cache_builds_off_the_loop_with_a_shared_backend():
+    cache = EstimateResultCache(
+        max_entries=10,
+        ttl_seconds=60,
+        shared=LocalCacheBackend("test", lock_timeout=1.0),
+    )
+    reference = ReferenceSnapshot([], [], version=1, loaded_at=0.0)
+    builds = []
+    ticks = []
+
+    def build() -> EstimateResponse:
+        builds.append(None)
+        time.sleep(0.05)
+        return EstimateResponse(
+            property_type="land",
+            area="Karen",
+            estimated_value=1.0,
+            value=1.0,
+            low_estimate=1.0,
+            high_estimate=1.0,
+            breakdown=EstimateBreakdown(),
+            confidence_score=0.5,
+            disclaimer="",
+        )
+
+    async def main():
+        callers = [cache.get_or_build_async(("key",), reference, build) for _ in range(CALLERS)]
+        return await _ticking(asyncio.gather(*callers), ticks)
+
+    results = asyncio.run(main())
+    assert len(builds) == 1
+    assert all(result == results[0] for result in results)
+    assert cache.stats()["coalesced"] == CALLERS - 1
+    # The blocking build ran in a thread, so the loop kept ticking meanwhile.
+    assert len(ticks) > 5
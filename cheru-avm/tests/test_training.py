@@ -0,0 +1,151 @@
+import io
+import json
+import math
+import random
+import uuid
+from datetime import date
+
+import pytest
+
+from app.services.reference_data import AmenityRecord, AreaRecord, ReferenceSnapshot
+from app.services.training import (
+    DEPRECIATION_BAND_YEARS,
+    TrainingStats,
+    build_artifact,
+    collect_columns,
+    parse_chunk,
+    train,
+    training_context,
+    transaction_chunks,
+)
+from app.services.valuation import (
+    SHAPE_MULTIPLIERS,
+    estimate_apartment,
+    parse_coefficients,
+    use_coefficients,
+)
+
+SOLD_ON = "2024-06-01"
+ROWS_PER_TYPE = 900
+AREAS = {"Karen": (40e6, 180_000.0), "Kilimani": (90e6, 240_000.0), "Ruaka": (15e6, 90_000.0)}
+UPLIFTS = {
+    "apartment": {"gym": 0.05, "pool": 0.08, "lift": 0.03},
+    "house": {"garden": 0.04, "solar": 0.02},
+}
+# True depreciation per 5-year age band; sales are 0-19 years old.
+BAND_FACTORS = (1.0, 0.93, 0.85, 0.8)
+
+
+def _reference() -> ReferenceSnapshot:
+    areas = [
+        AreaRecord(uuid.uuid4(), name, land, building, building)
+        for name, (land, building) in AREAS.items()
+    ]
+    amenities = [
+        AmenityRecord(uuid.uuid4(), name, property_type, 0.01)
+        for property_type, uplifts in UPLIFTS.items()
+        for name in uplifts
+    ]
+    return ReferenceSnapshot(areas, amenities, version=1, loaded_at=0.0)
+
+
+def _transactions(rng: random.Random) -> list:
+    # Noise-free prices in the model's own form, so the fit is exact.
+    records = []
+    for _ in range(ROWS_PER_TYPE):
+        area = rng.choice(list(AREAS))
+        land_price, building_price = AREAS[area]
+        shape = rng.choice(list(SHAPE_MULTIPLIERS))
+        acres = rng.uniform(0.05, 2.0)
+        records.append(
+            {
+                "property_type": "land",
+                "area": area,
+                "price": land_price * acres * SHAPE_MULTIPLIERS[shape],
+                "land_size_acres": acres,
+                "plot_shape": shape,
+                "sold_on": SOLD_ON,
+            }
+        )
+        for property_type in ("apartment", "house"):
+            age = rng.randrange(4 * DEPRECIATION_BAND_YEARS)
+            amenities = [name for name in UPLIFTS[property_type] if rng.random() < 0.5]
+            uplift = math.prod(1 + UPLIFTS[property_type][name] for name in amenities)
+            size = rng.uniform(40, 400)
+            record = {
+                "property_type": property_type,
+                "area": area,
+                "year_built": 2024 - age,
+                "amenities": amenities,
+                "sold_on": SOLD_ON,
+            }
+            building = building_price * uplift * size
+            if property_type == "apartment":
+                record.update(size_sqm=size, price=building * BAND_FACTORS[age // 5])
+            else:
+                land = land_price * acres * SHAPE_MULTIPLIERS[shape]
+                record.update(
+                    house_size_sqm=size,
+                    land_size_acres=acres,
+                    plot_shape=shape,
+                    price=(building + land) * BAND_FACTORS[age // 5],
+                )
+            records.append(record)
+    return records
+
+
+@pytest.fixture(scope="module")
+def artifact():
+    reference = _reference()
+    lines = "".join(json.dumps(record) + "\n" for record in _transactions(random.Random(4)))
+    stats = TrainingStats()
+    columns = collect_columns(
+        transaction_chunks(io.StringIO(lines), "ndjson", chunk_size=500),
+        training_context(reference),
+        stats,
+    )
+    fits = train(columns, reference, stats)
+    return build_artifact(fits, reference, stats, source="test")
+
+
+def test_training_recovers_known_coefficients(artifact):
+    for name, (land, building) in AREAS.items():
+        fitted = artifact["areas"][name]
+        assert fitted["land_price_per_acre"] == pytest.approx(land, rel=1e-6)
+        assert fitted["apartment_price_per_sqm"] == pytest.approx(building, rel=1e-6)
+        assert fitted["house_price_per_sqm"] == pytest.approx(building, rel=1e-5)
+    for property_type, uplifts in UPLIFTS.items():
+        assert artifact["amenities"][property_type] == pytest.approx(uplifts, abs=1e-5)
+        curve = artifact["depreciation"][property_type]
+        assert [curve[band * DEPRECIATION_BAND_YEARS] for band in range(4)] == pytest.approx(
+            BAND_FACTORS, abs=1e-5
+        )
+        # Older than any sale: the oldest fitted band carries on.
+        assert curve[-1] == pytest.approx(BAND_FACTORS[-1], abs=1e-5)
+
+
+def test_artifact_round_trips_into_serving(artifact):
+    coefficients = parse_coefficients(json.loads(json.dumps(artifact)))
+    assert coefficients.version == artifact["version"]
+    assert coefficients.area_prices["karen"]["apartment_price_per_sqm"] == pytest.approx(180_000)
+    assert coefficients.amenity_percents[("house", "garden")] == pytest.approx(0.04, abs=1e-5)
+
+    area = AreaRecord(uuid.uuid4(), "Karen", 40e6, 180_000.0, 180_000.0)
+    use_coefficients(coefficients)
+    try:
+        result = estimate_apartment(area, 100.0, 2024 - 12, [], 2024)
+    finally:
+        use_coefficients(None)
+    assert result["estimated_value"] == pytest.approx(180_000 * 100 * BAND_FACTORS[2], rel=1e-5)
+
+
+def test_sold_on_is_parsed_before_the_since_cutoff():
+    context = training_context(_reference(), since=date(2020, 1, 1))
+    rows = [
+        {"property_type": "land", "area": "Karen", "price": 1e6, "land_size_acres": 1,
+         "plot_shape": "normal", "sold_on": sold_on}
+        for sold_on in ("01/02/2023", "2019-12-31", "2020-01-01", "not a date")
+    ]
+    parsed = parse_chunk(None, [json.dumps(row) for row in rows], context)
+    assert parsed.skipped == {"invalid sold_on": 2, "before --since": 1}
+    assert len(parsed.columns["land"]["price"]) == 1
@@ -0,0 +1,197 @@
+import random
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services.reference_data import AmenityRecord, AreaRecord, ReferenceSnapshot
+from app.services.valuation import (
+    DEPRECIATION_MAX_AGE,
+    ValuationCoefficients,
+    estimate_apartment,
+    estimate_house,
+    estimate_land,
+    use_coefficients,
+)
+from app.services.vectorized import (
+    SHAPE_CODES,
+    ValuationTables,
+    amenity_values,
+    encode_shapes,
+    value_apartment,
+    value_house,
+    value_land,
+)
+
+CURRENT_YEAR = 2025
+ROWS = 2_000
+# Estimates and every breakdown column must match the scalar path to the
+# last bit: bulk output is documented to equal the API's.
+AMENITIES_PER_TYPE = 12
+
+
+def _reference(rng: random.Random) -> ReferenceSnapshot:
+    areas = [
+        AreaRecord(
+            id=uuid.uuid4(),
+            name=f"Area {index}",
+            land_price_per_acre=rng.uniform(5e6, 3e8),
+            apartment_price_per_sqm=rng.uniform(5e4, 4e5),
+            house_price_per_sqm=rng.uniform(5e4, 4e5),
+        )
+        for index in range(20)
+    ]
+    # Percentages like 0.1 + 0.2 that do not sum exactly in floating point,
+    # so a change in summation order shows up.
+    amenities = [
+        AmenityRecord(
+            id=uuid.uuid4(),
+            name=f"Amenity {index:02d}",
+            property_type=property_type,
+            value_percent=rng.choice((0.1, 0.2, 0.3, 0.07, rng.uniform(0.001, 0.15))),
+        )
+        for property_type in ("apartment", "house")
+        for index in range(AMENITIES_PER_TYPE)
+    ]
+    return ReferenceSnapshot(areas, amenities, version=1, loaded_at=0.0)
+
+
+class _Rows:
+    def __init__(self, reference: ReferenceSnapshot, seed: int, count: int = ROWS) -> None:
+        rng = random.Random(seed)
+        self.tables = ValuationTables(reference)
+        areas = list(reference.areas.values())
+        self.areas = [rng.randrange(len(areas)) for _ in range(count)]
+        self.area_records = [areas[index] for index in self.areas]
+        self.sizes = [rng.uniform(20, 900) for _ in range(count)]
+        self.acres = [rng.uniform(0.01, 5) for _ in range(count)]
+        # Includes future and very old years to hit both ends of the curve.
+        self.years = [rng.randint(1985, CURRENT_YEAR + 2) for _ in range(count)]
+        self.shapes = [rng.choice(SHAPE_CODES) for _ in range(count)]
+        self.amenities = {}
+        self.masks = {}
+        for property_type in ("apartment", "house"):
+            catalogue = reference.amenity_catalogue(property_type)
+            names = [amenity.name for amenity in catalogue]
+            resolved = []
+            for _ in range(count):
+                requested = rng.sample(names, rng.randint(0, len(names)))
+                rng.shuffle(requested)
+                found, missing = reference.resolve_amenities(requested, property_type)
+                assert not missing
+                resolved.append(found)
+            self.amenities[property_type] = resolved
+            self.masks[property_type] = np.array(
+                [self.tables.encode_amenities(found, property_type) for found in resolved],
+                dtype=np.uint64,
+            )
+
+
+def _assert_matches(vectorized: dict, scalar: list) -> None:
+    np.testing.assert_array_equal(
+        vectorized["estimated_value"],
+        [result["estimated_value"] for result in scalar],
+    )
+    for name, column in vectorized["breakdown"].items():
+        np.testing.assert_array_equal(
+            column,
+            [result["breakdown"][name] for result in scalar],
+            err_msg=name,
+        )
+
+
+@pytest.fixture(params=[11, 23, 2024])
+def rows(request) -> _Rows:
+    rng = random.Random(request.param)
+    return _Rows(_reference(rng), seed=request.param)
+
+
+def test_value_land_matches_estimate_land(rows):
+    vectorized = value_land(
+        rows.tables,
+        np.array(rows.areas),
+        np.array(rows.acres),
+        encode_shapes(rows.shapes),
+    )
+    scalar = [
+        estimate_land(area, acres, shape)
+        for area, acres, shape in zip(rows.area_records, rows.acres, rows.shapes)
+    ]
+    _assert_matches(vectorized, scalar)
+
+
+def test_value_apartment_matches_estimate_apartment(rows):
+    vectorized = value_apartment(
+        rows.tables,
+        np.array(rows.areas),
+        np.array(rows.sizes),
+        np.array(rows.years),
+        rows.masks["apartment"],
+        CURRENT_YEAR,
+    )
+    scalar = [
+        estimate_apartment(area, size, year, amenities, CURRENT_YEAR)
+        for area, size, year, amenities in zip(
+            rows.area_records, rows.sizes, rows.years, rows.amenities["apartment"]
+        )
+    ]
+    _assert_matches(vectorized, scalar)
+
+
+def test_value_house_matches_estimate_house(rows):
+    vectorized = value_house(
+        rows.tables,
+        np.array(rows.areas),
+        np.array(rows.sizes),
+        np.array(rows.acres),
+        np.array(rows.years),
+        encode_shapes(rows.shapes),
+        rows.masks["house"],
+        CURRENT_YEAR,
+    )
+    scalar = [
+        estimate_house(area, size, acres, year, shape, amenities, CURRENT_YEAR)
+        for area, size, acres, year, shape, amenities in zip(
+            rows.area_records,
+            rows.sizes,
+            rows.acres,
+            rows.years,
+            rows.shapes,
+            rows.amenities["house"],
+        )
+    ]
+    _assert_matches(vectorized, scalar)
+
+
+def test_amenity_values_match_sum_for_every_mask():
+    # Every subset of the first 10 amenities: amenity_values adds bit by
+    # bit while the scalar path uses sum() over the resolved records.
+    rng = random.Random(7)
+    reference = _reference(rng)
+    tables = ValuationTables(reference)
+    catalogue = reference.amenity_catalogue("apartment")[:10]
+    masks = np.arange(1 << len(catalogue), dtype=np.uint64)
+    base_values = np.array([rng.uniform(1e6, 5e8) for _ in range(len(masks))])
+    vectorized = amenity_values(base_values, masks, tables.amenity_percents["apartment"])
+    scalar = [
+        sum(
+            base * amenity.value_percent
+            for bit, amenity in enumerate(catalogue)
+            if mask >> bit & 1
+        )
+        for base, mask in zip(base_values.tolist(), masks.tolist())
+    ]
+    # Exact: a different summation order changes the last bits.
+    np.testing.assert_array_equal(vectorized, scalar)
+
+
+def test_trained_depreciation_curves_match(rows):
+    curve = tuple(1 - age * 0.011 for age in range(DEPRECIATION_MAX_AGE + 1))
+    use_coefficients(
+        ValuationCoefficients("test", {}, {}, {"apartment": curve, "house": curve[::-1]})
+    )
+    try:
+        test_value_apartment_matches_estimate_apartment(rows)
+        test_value_house_matches_estimate_house(rows)
+    finally:
+        use_coefficients(None)